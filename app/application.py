@@ -1,4 +1,5 @@
 # pylint: disable=c-extension-no-member
+from contextlib import asynccontextmanager
 from functools import lru_cache
 import json
 from typing import Any
@@ -10,9 +11,10 @@ from fastapi import FastAPI
 from max_core.application import setup_max_core
 
 from app.bindings import AppBindings
+from app.brp.lifespan import brp_lifespan
 from app.config.schemas import VadConfig, UvicornConfig
 from app.cbp import init_cbp_module
-from app.cbp.lifespan import prefetch_cbp_clients
+from app.cbp.lifespan import cbp_lifespan
 from app.docs import init_docs_module
 from app.logging import setup_logging
 from app.utils import load_config
@@ -75,7 +77,7 @@ def create_app(config: VadConfig) -> FastAPI:
         docs_url=None,
         redoc_url=None,
         openapi_url=config.swagger.openapi_endpoint if config.swagger.enabled else None,
-        lifespan=prefetch_cbp_clients,
+        lifespan=lifespan,
     )
 
     setup_max_core(app, config)
@@ -85,6 +87,12 @@ def create_app(config: VadConfig) -> FastAPI:
     return app
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with brp_lifespan(app), cbp_lifespan(app):
+        yield
+
+
 @lru_cache(maxsize=1)
 def _load_config_once() -> VadConfig:
     return load_config("app.conf")
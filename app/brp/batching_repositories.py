@@ -0,0 +1,104 @@
+from concurrent.futures import Future
+from threading import Condition
+from typing import Dict, Optional
+
+from .exceptions import BrpHttpResponseException
+from .repositories import BrpRepository
+from .schemas import BrpPersonsResponseDTO
+
+# Maximum number of BSNs in a single `RaadpleegMetBurgerservicenummer` query.
+MAX_BATCH_SIZE = 20
+
+_Batch = Dict[str, "Future[BrpPersonsResponseDTO]"]
+
+
+class BatchingBrpRepository(BrpRepository):
+    """
+    Combines the lookups that arrive within `window_seconds` of each other into a
+    single `find_many` call, and hands every caller the persons of its own BSN.
+
+    The first caller of a batch waits for the window to pass, or for the batch to
+    reach `max_batch_size`, and then looks up the batch on behalf of all its callers;
+    no background thread is needed. A batch of one BSN is looked up with `find`.
+    """
+
+    def __init__(
+        self,
+        brp_repository: BrpRepository,
+        window_seconds: float,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ) -> None:
+        self.__brp_repository = brp_repository
+        self.__window_seconds = window_seconds
+        self.__max_batch_size = min(max(max_batch_size, 1), MAX_BATCH_SIZE)
+        self.__condition = Condition()
+        self.__batch: Optional[_Batch] = None
+
+    def find(self, bsn: str) -> BrpPersonsResponseDTO:
+        with self.__condition:
+            batch = self.__batch
+            is_leader = batch is None
+            if batch is None:
+                batch = self.__batch = {}
+
+            future = batch.get(bsn)
+            if future is None:
+                future = batch[bsn] = Future()
+
+            if len(batch) >= self.__max_batch_size:
+                # Close the full batch, so later lookups start a new one.
+                self.__batch = None
+                self.__condition.notify_all()
+            elif is_leader:
+                self.__condition.wait_for(
+                    lambda: self.__batch is not batch, timeout=self.__window_seconds
+                )
+                if self.__batch is batch:
+                    self.__batch = None
+
+        if is_leader:
+            self.__look_up(batch)
+
+        return future.result()
+
+    def close(self) -> None:
+        self.__brp_repository.close()
+
+    def __look_up(self, batch: _Batch) -> None:
+        try:
+            if len(batch) == 1:
+                for bsn, future in batch.items():
+                    future.set_result(self.__brp_repository.find(bsn))
+                return
+
+            try:
+                persons = self.__brp_repository.find_many(list(batch))
+            except BrpHttpResponseException:
+                # BRP rejects the whole query if any of its BSNs is invalid, so look
+                # up the BSNs one by one to fail only the callers of the invalid ones.
+                self.__look_up_one_by_one(batch)
+                return
+
+            for bsn, future in batch.items():
+                future.set_result(
+                    BrpPersonsResponseDTO(
+                        type=persons.type,
+                        personen=[
+                            person
+                            for person in persons.personen
+                            if person.burgerservicenummer == bsn
+                        ],
+                    )
+                )
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            raise
+
+    def __look_up_one_by_one(self, batch: _Batch) -> None:
+        for bsn, future in batch.items():
+            try:
+                future.set_result(self.__brp_repository.find(bsn))
+            except BrpHttpResponseException as e:
+                future.set_exception(e)
@@ -1,7 +1,14 @@
+from typing import Optional
+
+import httpx
 from inject import Binder
 
 from app.config.schemas import BrpConfig
+from app.resilience import create_resilient_caller
 
+from .batching_repositories import BatchingBrpRepository
+from .caching_repositories import CachingBrpRepository
+from .hedging import RequestHedger
 from .repositories import ApiBrpRepository, BrpRepository, MockBrpRepository
 
 
@@ -23,5 +30,62 @@ class BrpBindings:
 
             binder.bind_to_constructor(
                 BrpRepository,
-                lambda: ApiBrpRepository(base_url, api_key=self.__brp_config.api_key),
+                lambda: self.__with_cache(
+                    self.__with_batching(
+                        ApiBrpRepository(
+                            base_url,
+                            api_key=self.__brp_config.api_key,
+                            client=self.__create_client(),
+                            resilient_caller=create_resilient_caller(
+                                "BRP", self.__brp_config
+                            ),
+                            hedger=self.__create_hedger(),
+                        )
+                    )
+                ),
             )
+
+    def __with_batching(self, brp_repository: BrpRepository) -> BrpRepository:
+        if self.__brp_config.batch_window <= 0:
+            return brp_repository
+
+        return BatchingBrpRepository(
+            brp_repository,
+            window_seconds=self.__brp_config.batch_window,
+            max_batch_size=self.__brp_config.batch_max_size,
+        )
+
+    def __with_cache(self, brp_repository: BrpRepository) -> BrpRepository:
+        if self.__brp_config.cache_ttl <= 0:
+            return brp_repository
+
+        return CachingBrpRepository(
+            brp_repository,
+            ttl_seconds=self.__brp_config.cache_ttl,
+            negative_ttl_seconds=self.__brp_config.cache_negative_ttl,
+            max_size=self.__brp_config.cache_max_size,
+        )
+
+    def __create_hedger(self) -> Optional[RequestHedger]:
+        if not self.__brp_config.hedging:
+            return None
+
+        return RequestHedger(
+            percentile=self.__brp_config.hedge_percentile,
+            min_delay_seconds=self.__brp_config.hedge_min_delay,
+            max_hedge_ratio=self.__brp_config.hedge_max_ratio,
+            max_workers=self.__brp_config.max_connections,
+        )
+
+    def __create_client(self) -> httpx.Client:
+        return httpx.Client(
+            http2=self.__brp_config.http2,
+            timeout=httpx.Timeout(
+                self.__brp_config.timeout, connect=self.__brp_config.connect_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=self.__brp_config.max_connections,
+                max_keepalive_connections=self.__brp_config.max_keepalive_connections,
+                keepalive_expiry=self.__brp_config.keepalive_expiry,
+            ),
+        )
@@ -0,0 +1,95 @@
+import hmac
+from collections import OrderedDict
+from hashlib import sha256
+from secrets import token_bytes
+from threading import Lock
+from time import monotonic
+from typing import Tuple
+
+from .repositories import BrpRepository
+from .schemas import BrpPersonsResponseDTO
+
+
+class CachingBrpRepository(BrpRepository):
+    """
+    Keeps the persons found in BRP in memory for `ttl_seconds`, so a citizen who logs
+    in again shortly after is not looked up in BRP again. Lookups that found no
+    person are kept for `negative_ttl_seconds` instead; failed lookups are not kept.
+
+    Entries are keyed by a hash of the BSN with a salt that is generated per process,
+    so the cache never holds the BSN itself. Once `max_size` entries are held, the
+    least recently used entry is evicted.
+    """
+
+    def __init__(
+        self,
+        brp_repository: BrpRepository,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        max_size: int,
+    ) -> None:
+        self.__brp_repository = brp_repository
+        self.__ttl_seconds = ttl_seconds
+        self.__negative_ttl_seconds = negative_ttl_seconds
+        self.__max_size = max(max_size, 1)
+        self.__salt = token_bytes(32)
+        self.__entries: OrderedDict[bytes, Tuple[float, BrpPersonsResponseDTO]] = (
+            OrderedDict()
+        )
+        self.__lock = Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def size(self) -> int:
+        return len(self.__entries)
+
+    def find(self, bsn: str) -> BrpPersonsResponseDTO:
+        key = self.__key(bsn)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] > monotonic():
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self.__entries[key]
+            self.__misses += 1
+
+        persons = self.__brp_repository.find(bsn)
+        ttl_seconds = (
+            self.__ttl_seconds if persons.personen else self.__negative_ttl_seconds
+        )
+        if ttl_seconds > 0:
+            self.__put(key, monotonic() + ttl_seconds, persons)
+
+        return persons
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    def close(self) -> None:
+        self.clear()
+        self.__brp_repository.close()
+
+    def __put(
+        self, key: bytes, expires_at: float, persons: BrpPersonsResponseDTO
+    ) -> None:
+        with self.__lock:
+            self.__entries[key] = (expires_at, persons)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+
+    def __key(self, bsn: str) -> bytes:
+        return hmac.new(self.__salt, bsn.encode("utf-8"), sha256).digest()
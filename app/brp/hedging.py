@@ -0,0 +1,106 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from math import ceil
+from threading import Event, Lock
+from time import monotonic
+from typing import Callable, Deque, List, Optional, TypeVar
+
+from app.resilience import RetryBudget
+
+T = TypeVar("T")
+
+# Latencies to observe before hedging, so the delay is based on a meaningful sample.
+MIN_LATENCY_SAMPLES = 20
+
+
+class RequestHedger:
+    """
+    Sends a second, identical request when the first one has not answered within
+    the `percentile` of recent latencies (but at least `min_delay_seconds`), and
+    returns whichever answers first. Hedges are limited to `max_hedge_ratio` of the
+    requests, so the load on the dependency stays bounded.
+
+    A request that is already running cannot be aborted: the slower request is left
+    to finish in the background and its response is discarded.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        min_delay_seconds: float,
+        max_hedge_ratio: float,
+        max_workers: int,
+        window_size: int = 1000,
+    ) -> None:
+        self.__percentile = min(max(percentile, 0), 100)
+        self.__min_delay_seconds = min_delay_seconds
+        self.__hedge_budget = RetryBudget(
+            ratio=max_hedge_ratio, min_retries_per_second=0
+        )
+        self.__latencies: Deque[float] = deque(maxlen=window_size)
+        self.__lock = Lock()
+        self.__executor = ThreadPoolExecutor(
+            max_workers=max(max_workers, 2), thread_name_prefix="brp-hedge"
+        )
+
+    def get_delay(self) -> Optional[float]:
+        """Returns the seconds after which to hedge, or `None` while still observing."""
+        with self.__lock:
+            if len(self.__latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            latencies = sorted(self.__latencies)
+
+        index = max(ceil(len(latencies) * self.__percentile / 100) - 1, 0)
+        return max(latencies[index], self.__min_delay_seconds)
+
+    def call(self, send: Callable[[], T]) -> T:
+        self.__hedge_budget.record_request()
+        delay = self.get_delay()
+        if delay is None:
+            return self.__timed(send)
+
+        # The delay starts once the primary is sent: a primary that still waits for
+        # a worker is not a slow response, and hedging it would only grow the queue
+        # while BRP is busiest.
+        started = Event()
+        primary = self.__executor.submit(self.__timed, send, started)
+        while not started.wait(timeout=delay):
+            if primary.done():
+                return primary.result()
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.__hedge_budget.try_spend():
+            return primary.result()
+
+        hedge = self.__executor.submit(self.__timed, send)
+        return self.__first_result([primary, hedge])
+
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def __first_result(futures: List["Future[T]"]) -> T:
+        """
+        Returns the first successful result; if all requests fail, the error of the
+        first request is raised.
+        """
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+
+        return futures[0].result()
+
+    def __timed(self, send: Callable[[], T], started: Optional[Event] = None) -> T:
+        if started is not None:
+            started.set()
+        started_at = monotonic()
+        result = send()
+        with self.__lock:
+            self.__latencies.append(monotonic() - started_at)
+
+        return result
@@ -0,0 +1,15 @@
+from contextlib import asynccontextmanager
+
+import inject
+from fastapi import FastAPI
+
+from app.brp.repositories import BrpRepository
+
+
+@asynccontextmanager
+async def brp_lifespan(_: FastAPI):
+    try:
+        yield
+    finally:
+        # Closes the connections to BRP that are kept alive between lookups.
+        inject.instance(BrpRepository).close()
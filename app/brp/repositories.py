@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import Callable, List, Optional, Sequence, Union
 
 import httpx
 
+from app.resilience import CircuitOpenError, ResilientCaller
+
 from .exceptions import BrpHttpRequestException, BrpHttpResponseException
+from .hedging import RequestHedger
 from .schemas import (
     BrpName,
     BrpPersonDTO,
@@ -17,6 +20,23 @@ class BrpRepository(ABC):
     @abstractmethod
     def find(self, bsn: str) -> BrpPersonsResponseDTO: ...  # pragma: no cover
 
+    def find_many(self, bsns: Sequence[str]) -> BrpPersonsResponseDTO:
+        """
+        Looks up the persons of several BSNs; every person found has its
+        `burgerservicenummer` set, so it can be matched to the BSN it was found for.
+        """
+        return BrpPersonsResponseDTO(
+            type="RaadpleegMetBurgerservicenummer",
+            personen=[
+                person.model_copy(update={"burgerservicenummer": bsn})
+                for bsn in bsns
+                for person in self.find(bsn).personen
+            ],
+        )
+
+    def close(self) -> None:
+        """Releases the resources held by the repository on shutdown."""
+
 
 class MockBrpRepository(BrpRepository):
     def find(self, bsn: str) -> BrpPersonsResponseDTO:
@@ -41,16 +61,37 @@ class MockBrpRepository(BrpRepository):
 
 
 class ApiBrpRepository(BrpRepository):
-    def __init__(self, base_url: str, api_key: Union[str, None] = None) -> None:
+    """
+    Looks up persons in the BRP Haal Centraal API. All lookups share one client, so
+    connections to BRP are kept alive and reused instead of being set up per login.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Union[str, None] = None,
+        client: Optional[httpx.Client] = None,
+        resilient_caller: Optional[ResilientCaller] = None,
+        hedger: Optional[RequestHedger] = None,
+    ) -> None:
         self.base_url = base_url
         self.api_key: str | None = api_key
+        self.__client = client if client is not None else httpx.Client()
+        self.__resilient_caller = resilient_caller or ResilientCaller("BRP")
+        self.__hedger = hedger
 
     def find(self, bsn: str) -> BrpPersonsResponseDTO:
+        return self.__find([bsn], ["naam", "leeftijd"])
+
+    def find_many(self, bsns: Sequence[str]) -> BrpPersonsResponseDTO:
+        return self.__find(bsns, ["burgerservicenummer", "naam", "leeftijd"])
+
+    def __find(self, bsns: Sequence[str], fields: List[str]) -> BrpPersonsResponseDTO:
         url = f"{self.base_url}/personen"
         payload = {
             "type": "RaadpleegMetBurgerservicenummer",
-            "burgerservicenummer": [bsn],
-            "fields": ["naam", "leeftijd"],
+            "burgerservicenummer": list(bsns),
+            "fields": fields,
         }
         headers: dict[str, str] = {"Content-Type": "application/json"}
 
@@ -58,17 +99,23 @@ class ApiBrpRepository(BrpRepository):
             headers["X-API-KEY"] = self.api_key
 
         try:
-            with httpx.Client() as client:
-                response = client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                return BrpPersonsResponseDTO.model_validate(data)
+            # Each attempt is hedged on its own, so a retry is not delayed by the
+            # slower copy of a failed attempt.
+            response = self.__resilient_caller.call(
+                lambda: self.__send(
+                    lambda: self.__client.post(url, json=payload, headers=headers)
+                ),
+                transient_errors=(httpx.TransportError,),
+            )
+            response.raise_for_status()
+            data = response.json()
+            return BrpPersonsResponseDTO.model_validate(data)
         except httpx.HTTPStatusError as exc:
             error_response = BrpPersonResponseError(**exc.response.json())
             raise BrpHttpResponseException(
                 status_code=exc.response.status_code, detail=error_response
             ) from exc
-        except httpx.RequestError as exc:
+        except (httpx.RequestError, CircuitOpenError) as exc:
             raise BrpHttpRequestException(
                 500,
                 {
@@ -76,3 +123,14 @@ class ApiBrpRepository(BrpRepository):
                     "error_description": str(exc),
                 },
             ) from exc
+
+    def close(self) -> None:
+        if self.__hedger is not None:
+            self.__hedger.close()
+        self.__client.close()
+
+    def __send(self, send: Callable[[], httpx.Response]) -> httpx.Response:
+        if self.__hedger is None:
+            return send()
+
+        return self.__hedger.call(send)
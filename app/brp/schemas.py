@@ -18,6 +18,7 @@ class BrpName(BaseModel):
 
 
 class BrpPersonDTO(BaseModel):
+    burgerservicenummer: Union[str, None] = None
     naam: BrpName
     leeftijd: Union[int, None] = None
 
@@ -4,13 +4,21 @@ from inject import instance
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 
-from .router import ClientsSyncRouter
+from .middleware import PinCbpClientGenerationMiddleware
+from .repositories import CbpClientRepository
+from .router import ClientsReadinessRouter, ClientsSyncRouter
 
 
 def init_cbp_module(app: FastAPI) -> None:
     app.state.limiter = instance(Limiter)
 
     app.include_router(instance(ClientsSyncRouter))
+    app.include_router(instance(ClientsReadinessRouter))
+
+    app.add_middleware(
+        PinCbpClientGenerationMiddleware,
+        client_repository=instance(CbpClientRepository),
+    )
 
     app.add_exception_handler(
         RateLimitExceeded,
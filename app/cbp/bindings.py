@@ -1,17 +1,38 @@
-from inject import Binder
+from inject import Binder, instance
+from redis import Redis
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from max_core.services.client_repository import ClientRepository
 
-from app.config.schemas import CbpSourceType, VadConfig
+from app.config.schemas import (
+    CbpCacheType,
+    CbpHttpClientConfig,
+    DirectoryCbpSourceConfig,
+    VadConfig,
+)
+from app.resilience import create_resilient_caller
 
-from .repositories import (
-    CbpClientRepository,
-    FilesystemCbpClientRepository,
+from .directory_sources import DirectoryCbpSource
+from .filesystem_repositories import FilesystemCbpClientRepository
+from .http_sources import CbpHttpClient
+from .notifications import (
+    CbpClientNotificationChannel,
+    NoOpCbpClientNotificationChannel,
+    RedisCbpClientNotificationChannel,
+)
+from .redis_repositories import RedisCbpClientRepository
+from .repositories import CbpClientRepository
+from .router import ClientsReadinessRouter, ClientsSyncRouter
+from .schedulers import CbpClientSyncScheduler
+from .services import CbpClientFetcher
+from .sources import CbpSource, NoOpCbpSource
+from .stores import RedisCbpClientStore
+from .watchers import (
+    CbpClientCacheWatcher,
+    CbpClientNotificationListener,
+    CbpClientSourceWatcher,
 )
-from .router import ClientsSyncRouter
-from .services import CbpHttpClient, CbpSource, NoOpCbpSource
 
 
 class CbpBindings:
@@ -27,23 +48,34 @@ class CbpBindings:
             Limiter,
             lambda: Limiter(key_func=get_remote_address),
         )
+        binder.bind_to_constructor(
+            CbpClientSyncScheduler,
+            lambda: CbpClientSyncScheduler(  # pylint: disable=no-value-for-parameter
+                debounce_seconds=self.__config.cbp.clients_sync_debounce,
+                retry_attempts=self.__config.cbp.clients_sync_retry_attempts,
+                retry_delay_seconds=self.__config.cbp.clients_sync_retry_delay,
+                retry_max_delay_seconds=self.__config.cbp.clients_sync_retry_max_delay,
+            ),
+        )
         binder.bind_to_constructor(
             ClientsSyncRouter,
             lambda: ClientsSyncRouter(  # pylint: disable=no-value-for-parameter
                 request_limit=self.__config.cbp.clients_sync_request_limit,
             ),
         )
+        binder.bind_to_constructor(
+            ClientsReadinessRouter,
+            lambda: ClientsReadinessRouter(),  # pylint: disable=no-value-for-parameter, unnecessary-lambda
+        )
 
     def __bindings_for_clients(self, binder: Binder) -> None:
+        binder.bind_to_constructor(CbpSource, self.__create_source)
+        binder.bind_to_constructor(CbpClientSourceWatcher, self.__create_source_watcher)
+
         binder.bind_to_constructor(
-            CbpSource,
-            lambda: (
-                CbpHttpClient(  # pylint: disable=no-value-for-parameter
-                    base_url=self.__config.cbp_source.base_url,
-                    timeout_seconds=self.__config.cbp_source.timeout,
-                )
-                if self.__config.cbp_source.type == CbpSourceType.HTTP
-                else NoOpCbpSource()
+            CbpClientFetcher,
+            lambda: CbpClientFetcher(  # pylint: disable=no-value-for-parameter
+                incremental_sync=self.__config.cbp.clients_sync_incremental,
             ),
         )
 
@@ -53,11 +85,92 @@ class CbpBindings:
             nonlocal client_repository
 
             if client_repository is None:
-                client_repository = FilesystemCbpClientRepository(
-                    filepath=self.__config.cbp_cache.filepath
-                )
+                client_repository = self.__create_client_repository()
 
             return client_repository
 
         binder.bind_to_constructor(ClientRepository, get_client_repository)
         binder.bind_to_constructor(CbpClientRepository, get_client_repository)
+        binder.bind_to_constructor(
+            CbpClientCacheWatcher,
+            lambda: CbpClientCacheWatcher(  # pylint: disable=no-value-for-parameter
+                interval_seconds=self.__config.cbp_cache.reload_interval,
+            ),
+        )
+        binder.bind_to_constructor(
+            CbpClientNotificationChannel, self.__create_notification_channel
+        )
+        binder.bind_to_constructor(
+            CbpClientNotificationListener,
+            lambda: CbpClientNotificationListener(  # pylint: disable=no-value-for-parameter
+                enabled=self.__config.cbp_cache.type == CbpCacheType.REDIS,
+            ),
+        )
+
+    def __create_source(self) -> CbpSource:
+        source_config = self.__config.cbp_source
+        if isinstance(source_config, CbpHttpClientConfig):
+            return CbpHttpClient(  # pylint: disable=no-value-for-parameter
+                base_url=source_config.base_url,
+                timeout_seconds=source_config.timeout,
+                validators_filepath=f"{self.__config.cbp_cache.snapshot_filepath}.validators",
+                streaming=source_config.streaming,
+                page_size=source_config.page_size,
+                max_concurrent_pages=source_config.max_concurrent_pages,
+                resilient_caller=create_resilient_caller("CBP", source_config),
+            )
+        if isinstance(source_config, DirectoryCbpSourceConfig):
+            return DirectoryCbpSource(  # pylint: disable=no-value-for-parameter
+                path=source_config.path
+            )
+
+        return NoOpCbpSource()
+
+    def __create_source_watcher(self) -> CbpClientSourceWatcher:
+        source_config = self.__config.cbp_source
+        if not isinstance(source_config, DirectoryCbpSourceConfig):
+            return CbpClientSourceWatcher(  # pylint: disable=no-value-for-parameter
+                source=None, interval_seconds=0
+            )
+
+        source = instance(CbpSource)
+        return CbpClientSourceWatcher(  # pylint: disable=no-value-for-parameter
+            source=source if isinstance(source, DirectoryCbpSource) else None,
+            interval_seconds=source_config.poll_interval,
+            lock_filepath=f"{self.__config.cbp_cache.snapshot_filepath}.watch.lock",
+        )
+
+    def __create_client_repository(self) -> CbpClientRepository:
+        cache_config = self.__config.cbp_cache
+        if cache_config.type == CbpCacheType.REDIS:
+            return RedisCbpClientRepository(
+                RedisCbpClientStore(
+                    redis=self.__get_redis(),
+                    key_prefix=cache_config.redis_key_prefix,
+                    lock_timeout=cache_config.fetch_lock_timeout,
+                    lock_blocking_timeout=cache_config.fetch_lock_blocking_timeout,
+                ),
+                notification_channel=instance(CbpClientNotificationChannel),
+            )
+
+        return FilesystemCbpClientRepository(
+            filepath=cache_config.snapshot_filepath,
+            lazy=cache_config.lazy_load,
+            legacy_filepath=cache_config.legacy_filepath,
+        )
+
+    def __create_notification_channel(self) -> CbpClientNotificationChannel:
+        cache_config = self.__config.cbp_cache
+        if cache_config.type == CbpCacheType.REDIS:
+            return RedisCbpClientNotificationChannel(
+                redis=self.__get_redis(),
+                channel=f"{cache_config.redis_key_prefix}:clients-updated",
+            )
+
+        return NoOpCbpClientNotificationChannel()
+
+    @staticmethod
+    def __get_redis() -> Redis:
+        # The client of the [cache] section, bound by the core bindings, so the CBP
+        # cache uses the same connection settings as the other caches.
+        return instance(Redis)
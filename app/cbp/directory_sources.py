@@ -0,0 +1,165 @@
+import json
+import os
+from datetime import datetime
+from logging import Logger
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from inject import autoparams
+
+from .exceptions import CbpClientsNotModified, CbpFetchError
+from .models import CbpClientChanges, CbpClientsResponse, CbpClientsUpdate
+from .sources import CbpSource
+from .validation import CbpClientBatchValidator
+
+# inode, mtime and size of a client file
+_FileSignature = Tuple[int, int, int]
+
+
+class DirectoryCbpSource(CbpSource):
+    """
+    Reads the clients from the local filesystem instead of CBP: either a directory
+    holding one JSON document per client in `*.json` files, or a single JSON Lines
+    file holding one client document per line.
+
+    Only files whose inode, mtime or size changed since the previous scan are read
+    again. `poll` reports the clients that changed since the previous scan, so only
+    those are applied to the repository.
+    """
+
+    @autoparams("logger")
+    def __init__(self, logger: Logger, path: str) -> None:
+        self.__logger = logger
+        self.__path = path
+        self.__client_validator = CbpClientBatchValidator(logger)
+        self.__lock = Lock()
+        self.__files: Dict[str, Tuple[_FileSignature, List[Dict[str, Any]]]] = {}
+        self.__documents: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def get_clients(self, conditional: bool = False) -> CbpClientsResponse:
+        with self.__lock:
+            previous_documents = self.__documents
+            self.__documents = self.__scan()
+
+            if conditional and self.__documents == previous_documents:
+                raise CbpClientsNotModified()
+
+            documents = list(self.__documents.values())
+
+        return CbpClientsResponse(clients=self.__client_validator.validate(documents))
+
+    def get_changed_clients(self, since: datetime) -> CbpClientChanges:
+        """
+        Returns the clients that changed since the previous scan; changes are tracked
+        per file, so `since` is not needed.
+        """
+        update = self.poll()
+        return CbpClientChanges(
+            clients=self.__client_validator.validate(update.clients),
+            deleted_client_ids=update.deleted_client_ids,
+        )
+
+    def get_clients_by_ids(self, client_ids: Sequence[str]) -> CbpClientChanges:
+        with self.__lock:
+            documents = self.__scan()
+
+        return CbpClientChanges(
+            clients=self.__client_validator.validate(
+                documents[client_id]
+                for client_id in client_ids
+                if client_id in documents
+            ),
+            deleted_client_ids=[i for i in client_ids if i not in documents],
+        )
+
+    def poll(self) -> CbpClientsUpdate:
+        """Returns the client documents that changed or were removed since the last scan."""
+        with self.__lock:
+            previous_documents = self.__documents or {}
+            self.__documents = self.__scan()
+            documents = self.__documents
+
+        return CbpClientsUpdate(
+            clients=[
+                document
+                for client_id, document in documents.items()
+                if previous_documents.get(client_id) != document
+            ],
+            deleted_client_ids=[
+                client_id
+                for client_id in previous_documents
+                if client_id not in documents
+            ],
+        )
+
+    def __scan(self) -> Dict[str, Dict[str, Any]]:
+        files: Dict[str, Tuple[_FileSignature, List[Dict[str, Any]]]] = {}
+        for filepath in self.__list_files():
+            try:
+                file_stat = os.stat(filepath)
+            except FileNotFoundError:
+                continue
+
+            signature = (file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size)
+            previous = self.__files.get(filepath)
+            if previous is not None and previous[0] == signature:
+                files[filepath] = previous
+            else:
+                previous_documents = [] if previous is None else previous[1]
+                files[filepath] = (signature, self.__read(filepath, previous_documents))
+
+        self.__files = files
+        return {
+            document["id"]: document
+            for _, documents in files.values()
+            for document in documents
+        }
+
+    def __list_files(self) -> List[str]:
+        if os.path.isfile(self.__path):
+            return [self.__path]
+
+        try:
+            with os.scandir(self.__path) as entries:
+                return sorted(
+                    entry.path
+                    for entry in entries
+                    if entry.name.endswith(".json") and entry.is_file()
+                )
+        except OSError as e:
+            raise CbpFetchError(
+                f"Failed to read CBP clients from {self.__path}: {e}"
+            ) from e
+
+    def __read(
+        self, filepath: str, previous_documents: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Reads the client documents of a file. An unreadable file, e.g. one that is
+        being written, keeps its previous documents until it changes again.
+        """
+        try:
+            with open(filepath, "r", encoding="utf-8") as file:
+                if filepath == self.__path:
+                    documents = [json.loads(line) for line in file if line.strip()]
+                else:
+                    documents = [json.load(file)]
+        except (OSError, ValueError) as e:
+            self.__logger.warning(
+                "Ignoring unreadable CBP client file %s: %s", filepath, e
+            )
+            return previous_documents
+
+        valid_documents = [
+            document
+            for document in documents
+            if isinstance(document, dict) and isinstance(document.get("id"), str)
+        ]
+        if len(valid_documents) != len(documents):
+            self.__logger.warning(
+                "Ignoring %d CBP client documents without an id in %s",
+                len(documents) - len(valid_documents),
+                filepath,
+            )
+
+        return valid_documents
@@ -0,0 +1,9 @@
+class CbpClientsNotModified(Exception):
+    """Raised by a `CbpSource` when the clients did not change since the last fetch."""
+
+
+class CbpFetchError(Exception):
+    """
+    Raised by a `CbpSource` when the clients could not be fetched or parsed, as
+    opposed to CBP returning no clients.
+    """
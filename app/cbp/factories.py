@@ -1,4 +1,7 @@
 from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple
+
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
@@ -9,37 +12,120 @@ from max_core.misc.utils import kid_from_certificate, load_certificate_with_jwk
 from max_core.models.certificate_with_jwk import CertificateWithJWK
 from max_core.models.enums import ClientAssertionMethods
 from max_core.models.response_type import ResponseType
+from pydantic import (
+    TypeAdapter,
+    ValidationError,
+    ValidatorFunctionWrapHandler,
+    WrapValidator,
+)
 
 from .models import CbpClient
 
 
+def _capture_validation_error(
+    client_data: Any, handler: ValidatorFunctionWrapHandler
+) -> Any:
+    """Returns the validation error of an invalid client instead of raising it."""
+    try:
+        return handler(client_data)
+    except ValidationError as e:
+        return e
+
+
 class CbpClientFactory:
+    __clients_adapter = TypeAdapter(
+        List[Annotated[CbpClient, WrapValidator(_capture_validation_error)]]
+    )
+
     @staticmethod
     def create(**kwargs) -> CbpClient:
-        token_endpoint_auth_method: str
-
-        if "token_endpoint_auth_method" in kwargs:
-            token_endpoint_auth_method = str(kwargs.get("token_endpoint_auth_method"))
-        else:
-            token_endpoint_auth_method = (
-                "none"  # nosec B105 as this is NOT a password nor secret
+        return CbpClient(  # nosec
+            **CbpClientFactory.__with_defaults(
+                kwargs, CertificateWithJWKFactory.get_placeholder()
             )
+        )
+
+    @classmethod
+    def create_many(
+        cls, clients_data: Sequence[Any]
+    ) -> Tuple[List[CbpClient], Dict[int, str]]:
+        """
+        Validates all clients in a single pass. Invalid clients are skipped; their
+        errors are returned by the index of the client in `clients_data`.
+        """
+        certificate = CertificateWithJWKFactory.get_placeholder()
+        results = cls.__clients_adapter.validate_python(
+            [
+                (
+                    cls.__with_defaults(client_data, certificate)
+                    if isinstance(client_data, dict)
+                    else client_data
+                )
+                for client_data in clients_data
+            ]
+        )
 
-        kwargs.pop("token_endpoint_auth_method", None)
+        clients: List[CbpClient] = []
+        errors: Dict[int, str] = {}
+        for index, result in enumerate(results):
+            if isinstance(result, ValidationError):
+                errors[index] = "; ".join(
+                    f"{'.'.join(map(str, error['loc'])) or 'client'}: {error['msg']}"
+                    for error in result.errors(include_url=False)
+                )
+            else:
+                clients.append(result)
 
-        return CbpClient(  # nosec
-            name="Acme",
-            response_types=[ResponseType.CODE],
-            token_endpoint_auth_method=token_endpoint_auth_method,
-            client_authentication_method=ClientAssertionMethods.NONE,
-            certificate=CertificateWithJWKFactory.create_dummy(),
-            login_methods=["digid_mock"],
-            exclude_login_methods=[],
-            **kwargs,
+        return clients, errors
+
+    @staticmethod
+    def __with_defaults(
+        client_data: Dict[str, Any], certificate: CertificateWithJWK
+    ) -> Dict[str, Any]:
+        token_endpoint_auth_method = str(
+            client_data.get(
+                "token_endpoint_auth_method",
+                "none",  # nosec B105 as this is NOT a password nor secret
+            )
         )
 
+        return {
+            "name": "Acme",
+            "response_types": [ResponseType.CODE],
+            "client_authentication_method": ClientAssertionMethods.NONE,
+            "login_methods": ["digid_mock"],
+            "exclude_login_methods": [],
+            **client_data,
+            "token_endpoint_auth_method": token_endpoint_auth_method,
+            "certificate": certificate,
+        }
+
 
 class CertificateWithJWKFactory:
+    __placeholder: Optional[CertificateWithJWK] = None
+    __placeholder_lock = Lock()
+
+    @classmethod
+    def get_placeholder(cls) -> CertificateWithJWK:
+        """
+        Returns a dummy certificate that is shared by all CBP clients.
+
+        CBP does not provide client certificates yet, so every client gets the same
+        placeholder. Generating a keypair per client made loading large registries
+        CPU-bound; the placeholder is only regenerated once it has expired.
+        """
+        with cls.__placeholder_lock:
+            if cls.__placeholder is None or cls.__is_expired(cls.__placeholder):
+                cls.__placeholder = cls.create_dummy()
+
+            return cls.__placeholder
+
+    @staticmethod
+    def __is_expired(certificate_with_jwk: CertificateWithJWK) -> bool:
+        return certificate_with_jwk.certificate.not_valid_after_utc <= datetime.now(
+            timezone.utc
+        )
+
     @staticmethod
     def create_dummy() -> CertificateWithJWK:
         key = rsa.generate_private_key(
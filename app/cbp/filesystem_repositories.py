@@ -0,0 +1,181 @@
+import fcntl
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from os import W_OK, access, path, stat, stat_result
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .models import CbpClient
+from .repositories import VersionedCbpClientRepository
+from .snapshots import CbpClientSnapshot
+
+
+class FilesystemCbpClientRepository(VersionedCbpClientRepository):
+    """
+    Client repository backed by a snapshot file. Writes are serialized.
+
+    In lazy mode only the snapshot index is read on startup; clients are hydrated
+    on first access and memoized, so startup time and memory scale with the clients
+    that are actually used rather than with the size of the registry.
+
+    Workers share the snapshot file: `reload_if_changed` picks up snapshots written
+    by other workers, by comparing the file's inode, mtime and size, and
+    `fetch_lock` is held across processes.
+    """
+
+    def __init__(
+        self, filepath: str, lazy: bool = False, legacy_filepath: Optional[str] = None
+    ) -> None:
+        super().__init__()
+        self.__filepath = filepath
+        self.__lazy = lazy
+        self.__file_signature: Optional[Tuple[int, int, int]] = None
+        self.__write_lock = Lock()
+        self.__fetch_lock = Lock()
+
+        file_dir, _ = path.split(self.__filepath)
+        if not path.isdir(file_dir) or not access(file_dir, W_OK):
+            raise ValueError(f"Cannot write to directory: {file_dir}")
+
+        if self.__is_non_empty_file(self.__filepath):
+            self.__load()
+        elif legacy_filepath is not None and self.__is_non_empty_file(legacy_filepath):
+            # Caches written before the snapshot format are plain JSON. They are only
+            # read to migrate and never written, so older versions can still read
+            # them after a rollback.
+            self._publish(self.__load_clients_from_json(legacy_filepath))
+
+    @contextmanager
+    def fetch_lock(self) -> Iterator[None]:
+        # Workers share the snapshot file, so they serialize fetches with a file lock
+        # next to it; a fetch in one worker reaches the others through
+        # `reload_if_changed`, and they skip their own fetch.
+        with self.__fetch_lock, open(
+            f"{self.__filepath}.lock", "a", encoding="utf-8"
+        ) as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def reload_if_changed(self) -> bool:
+        try:
+            file_stat = stat(self.__filepath)
+        except FileNotFoundError:
+            return False
+
+        if file_stat.st_size == 0 or self.__file_signature == self.__signature(
+            file_stat
+        ):
+            return False
+
+        with self.__write_lock:
+            self.__load()
+
+        return True
+
+    def __load(self) -> None:
+        if self.__lazy:
+            snapshot = CbpClientSnapshot.open(self.__filepath)
+            self.__file_signature = self.__signature(snapshot.file_stat)
+            self._publish({}, snapshot)
+        else:
+            self._publish(self.__load_clients_from_snapshot())
+
+    @staticmethod
+    def __is_non_empty_file(filepath: str) -> bool:
+        return path.isfile(filepath) and path.getsize(filepath) > 0
+
+    @staticmethod
+    def __signature(file_stat: stat_result) -> Tuple[int, int, int]:
+        return file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size
+
+    def __load_clients_from_json(self, filepath: str) -> Dict[str, CbpClient]:
+        with open(filepath, "r", encoding="utf-8") as file:
+            clients_data: List[Dict[str, Any]] = json.load(file)
+
+        return {
+            client_data["id"]: self._hydrate(client_data)
+            for client_data in clients_data
+        }
+
+    def __load_clients_from_snapshot(self) -> Dict[str, CbpClient]:
+        with CbpClientSnapshot.open(self.__filepath) as snapshot:
+            self.__file_signature = self.__signature(snapshot.file_stat)
+            return {
+                client_id: self._hydrate(json.loads(record))
+                for client_id, record in snapshot.records()
+            }
+
+    def __write_records_to_file(
+        self, records: Iterable[Tuple[str, bytes]], updated_at: Optional[datetime]
+    ) -> Optional[CbpClientSnapshot]:
+        file_stat = CbpClientSnapshot.write(self.__filepath, records, updated_at)
+        self.__file_signature = self.__signature(file_stat)
+
+        return CbpClientSnapshot.open(self.__filepath) if self.__lazy else None
+
+    def update(self, clients: Sequence[CbpClient]) -> None:
+        with self.__write_lock:
+            snapshot = self.__write_records_to_file(
+                ((client.id, self._serialize(client)) for client in clients),
+                max((client.updated_at for client in clients), default=None),
+            )
+            hydrated_clients = self._current.hydrated_clients
+            # In lazy mode, only clients that were already in use stay hydrated;
+            # the others are hydrated from the snapshot on first access again.
+            self._publish(
+                {
+                    client.id: client
+                    for client in clients
+                    if snapshot is None or client.id in hydrated_clients
+                },
+                snapshot,
+            )
+
+    def merge(
+        self, clients: Sequence[CbpClient], deleted_client_ids: Sequence[str]
+    ) -> None:
+        with self.__write_lock:
+            current = self._current
+            merged_clients = dict(current.hydrated_clients)
+            merged_clients.update({client.id: client for client in clients})
+            for client_id in deleted_client_ids:
+                merged_clients.pop(client_id, None)
+
+            if current.snapshot is not None:
+                records = self.__merge_records(
+                    current.snapshot, clients, deleted_client_ids
+                )
+            else:
+                records = {
+                    client.id: self._serialize(client)
+                    for client in merged_clients.values()
+                }
+
+            watermarks = [client.updated_at for client in clients]
+            if current.updated_at is not None:
+                watermarks.append(current.updated_at)
+
+            self._publish(
+                merged_clients,
+                self.__write_records_to_file(
+                    records.items(), max(watermarks, default=None)
+                ),
+            )
+
+    def __merge_records(
+        self,
+        snapshot: CbpClientSnapshot,
+        clients: Sequence[CbpClient],
+        deleted_client_ids: Sequence[str],
+    ) -> Dict[str, bytes]:
+        """Merges on serialized records, so unchanged clients are never hydrated."""
+        records = dict(snapshot.records())
+        records.update({client.id: self._serialize(client) for client in clients})
+        for client_id in deleted_client_ids:
+            records.pop(client_id, None)
+
+        return records
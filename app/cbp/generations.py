@@ -0,0 +1,125 @@
+import json
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, Iterator, KeysView, Mapping, Optional
+
+from .indexes import CbpClientIndex, CbpClientIndexEntry, get_effective_login_methods
+from .models import CbpClient
+from .snapshots import CbpClientSnapshot
+
+
+class CbpClientGeneration:
+    """
+    Immutable, versioned set of CBP clients.
+
+    A repository publishes a new generation on every change by swapping a single
+    reference, so readers never block and never observe a partially applied update.
+    A reader that holds on to a generation keeps seeing the same clients, even if
+    newer generations are published in the meantime.
+
+    When backed by a snapshot, clients are hydrated on first access and memoized;
+    memoizing does not change the content of the generation. The secondary indexes
+    are built on first use, from the snapshot's records when backed by one, so
+    building them does not hydrate the clients either.
+    """
+
+    def __init__(
+        self,
+        generation: int,
+        clients: Dict[str, CbpClient],
+        snapshot: Optional[CbpClientSnapshot] = None,
+        hydrate: Optional[Callable[[Dict], CbpClient]] = None,
+    ) -> None:
+        self.__generation = generation
+        self.__clients = clients
+        self.__snapshot = snapshot
+        self.__hydrate = hydrate
+        self.__index: Optional[CbpClientIndex] = None
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def snapshot(self) -> Optional[CbpClientSnapshot]:
+        return self.__snapshot
+
+    @property
+    def hydrated_clients(self) -> Mapping[str, CbpClient]:
+        """The clients that are hydrated; all clients unless backed by a snapshot."""
+        return self.__clients
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        """
+        The latest `updated_at` of the clients; `None` without clients. Read from the
+        snapshot when backed by one, so the clients are not hydrated for it.
+        """
+        if self.__snapshot is not None and self.__snapshot.updated_at is not None:
+            return self.__snapshot.updated_at
+
+        return max(
+            (self.get_by_id(client_id).updated_at for client_id in self.ids()),
+            default=None,
+        )
+
+    @property
+    def index(self) -> CbpClientIndex:
+        if self.__index is None:
+            self.__index = CbpClientIndex(self.__index_entries(), self.get_by_id)
+
+        return self.__index
+
+    def __index_entries(self) -> Iterator[CbpClientIndexEntry]:
+        if self.__snapshot is None:
+            return map(CbpClientIndexEntry.of_client, self.__clients.values())
+
+        return (
+            CbpClientIndexEntry.of_record(json.loads(record))
+            for _, record in self.__snapshot.records()
+        )
+
+    def get_effective_login_methods(self, client_id: str) -> FrozenSet[str]:
+        """
+        Returns the login methods of a client, minus its excluded login methods.
+        Computed from the client alone, so a lookup does not build the index.
+        """
+        if self.__index is not None:
+            return self.__index.get_effective_login_methods(client_id)
+
+        client = self.find_by_id(client_id)
+        if client is None:
+            return frozenset()
+
+        return get_effective_login_methods(
+            client.login_methods, client.exclude_login_methods
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids())
+
+    def ids(self) -> KeysView[str]:
+        if self.__snapshot is not None:
+            return self.__snapshot.ids()
+
+        return self.__clients.keys()
+
+    def get_by_id(self, client_id: str) -> CbpClient:
+        client = self.find_by_id(client_id)
+        if client is None:
+            raise KeyError(client_id)
+
+        return client
+
+    def find_by_id(self, client_id: str) -> Optional[CbpClient]:
+        client = self.__clients.get(client_id)
+        if client is not None or self.__snapshot is None or self.__hydrate is None:
+            return client
+
+        record = self.__snapshot.get(client_id)
+        if record is None:
+            return None
+
+        client = self.__hydrate(json.loads(record))
+        self.__clients[client_id] = client
+
+        return client
@@ -0,0 +1,284 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from hashlib import sha256
+from http import HTTPStatus
+from logging import Logger
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+from inject import autoparams
+from requests.adapters import HTTPAdapter
+
+from app.resilience import ResilientCaller
+
+from .exceptions import CbpClientsNotModified, CbpFetchError
+from .models import (
+    CbpClient,
+    CbpClientChanges,
+    CbpClientsResponse,
+    CbpResponseValidators,
+)
+from .sources import CbpSource
+from .streaming import JsonArrayStreamReader
+from .validation import CbpClientBatchValidator
+from .validators import CbpResponseValidatorsFile
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Number of streamed clients that are validated in a single pass.
+STREAM_BATCH_SIZE = 1000
+
+
+class CbpHttpClient(CbpSource):
+    @autoparams("logger")
+    def __init__(
+        self,
+        logger: Logger,
+        base_url: str,
+        timeout_seconds: int = 30,
+        validators_filepath: Optional[str] = None,
+        streaming: bool = False,
+        page_size: int = 0,
+        max_concurrent_pages: int = 4,
+        resilient_caller: Optional[ResilientCaller] = None,
+    ):
+        self.__logger = logger
+        self.__base_url = base_url
+        self.__timeout_seconds = timeout_seconds
+        self.__validators_file = CbpResponseValidatorsFile(logger, validators_filepath)
+        self.__client_validator = CbpClientBatchValidator(logger)
+        self.__streaming = streaming and page_size == 0
+        self.__page_size = page_size
+        self.__max_concurrent_pages = max(max_concurrent_pages, 1)
+        self.__resilient_caller = resilient_caller or ResilientCaller("CBP")
+
+        # A shared session reuses connections across requests and concurrent pages.
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.__max_concurrent_pages)
+        self.__session.mount("http://", adapter)
+        self.__session.mount("https://", adapter)
+
+    def get_clients(self, conditional: bool = False) -> CbpClientsResponse:
+        validators = (
+            self.__validators_file.load() if conditional else CbpResponseValidators()
+        )
+        response = self.__get(
+            "/clients",
+            headers=validators.as_request_headers(),
+            params=self.__page_params(1),
+            stream=self.__streaming,
+        )
+
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            self.__logger.debug("CBP clients not modified (HTTP 304)")
+            raise CbpClientsNotModified()
+
+        if self.__streaming:
+            clients, digest = self.__stream_clients(response, conditional, validators)
+        else:
+            pages, parsed_first_page = self.__get_pages(response)
+            digest = self.__digest(pages)
+            self.__raise_if_unchanged(conditional, digest, validators)
+            clients = self.__create_clients_from_pages(pages, parsed_first_page)
+
+        return CbpClientsResponse(
+            clients=clients,
+            validators=CbpResponseValidators(
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                digest=digest,
+            ),
+        )
+
+    def save_validators(self, validators: CbpResponseValidators) -> None:
+        self.__validators_file.save(validators)
+
+    def get_changed_clients(self, since: datetime) -> CbpClientChanges:
+        return self.__get_client_changes({"updated_since": since.isoformat()})
+
+    def get_clients_by_ids(self, client_ids: Sequence[str]) -> CbpClientChanges:
+        changes = self.__get_client_changes({"ids": ",".join(client_ids)})
+        found_client_ids = {client.id for client in changes.clients}
+        return CbpClientChanges(
+            clients=changes.clients,
+            deleted_client_ids=[i for i in client_ids if i not in found_client_ids],
+        )
+
+    def __get_client_changes(self, params: Dict[str, str]) -> CbpClientChanges:
+        response = self.__get("/clients", headers={}, params=params)
+        json_response = self.__parse_json(response)
+
+        deleted_client_ids = json_response.get("deleted", [])
+        if not isinstance(deleted_client_ids, list) or not all(
+            isinstance(client_id, str) for client_id in deleted_client_ids
+        ):
+            raise CbpFetchError(
+                "Expected a list of client ids as 'deleted' in CBP response"
+            )
+
+        return CbpClientChanges(
+            clients=self.__create_clients(json_response),
+            deleted_client_ids=deleted_client_ids,
+        )
+
+    def __page_params(self, page: int) -> Optional[Dict[str, str]]:
+        if self.__page_size == 0:
+            return None
+
+        return {"page": str(page), "page_size": str(self.__page_size)}
+
+    def __get_pages(
+        self, first_page: requests.Response
+    ) -> Tuple[List[requests.Response], Optional[Dict[str, Any]]]:
+        """
+        Returns the responses of all pages in order, fetching the pages after the first
+        one concurrently, and the first page's JSON if it was parsed to count the
+        pages. Fails if any page could not be fetched.
+        """
+        if self.__page_size == 0:
+            return [first_page], None
+
+        parsed_first_page = self.__parse_json(first_page)
+        total_pages = parsed_first_page.get("total_pages", 1)
+        if not isinstance(total_pages, int) or total_pages < 1:
+            raise CbpFetchError(f"Invalid 'total_pages' in CBP response: {total_pages}")
+
+        if total_pages == 1:
+            return [first_page], parsed_first_page
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.__max_concurrent_pages, total_pages - 1),
+            thread_name_prefix="cbp-pages",
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self.__get, "/clients", headers={}, params=self.__page_params(page)
+                )
+                for page in range(2, total_pages + 1)
+            ]
+
+            pages = [first_page]
+            for page, future in enumerate(futures, start=2):
+                try:
+                    pages.append(future.result())
+                except CbpFetchError as e:
+                    for pending in futures:
+                        pending.cancel()
+                    raise CbpFetchError(
+                        f"Page {page} of {total_pages} of CBP clients failed: {e}"
+                    ) from e
+
+        return pages, parsed_first_page
+
+    @staticmethod
+    def __digest(pages: List[requests.Response]) -> str:
+        digest = sha256()
+        for page in pages:
+            digest.update(page.content)
+
+        return digest.hexdigest()
+
+    def __create_clients_from_pages(
+        self,
+        pages: List[requests.Response],
+        parsed_first_page: Optional[Dict[str, Any]],
+    ) -> List[CbpClient]:
+        clients: List[CbpClient] = []
+        for index, page in enumerate(pages):
+            if index == 0 and parsed_first_page is not None:
+                clients.extend(self.__create_clients(parsed_first_page))
+            else:
+                clients.extend(self.__create_clients(self.__parse_json(page)))
+
+        return clients
+
+    def __raise_if_unchanged(
+        self, conditional: bool, digest: str, validators: CbpResponseValidators
+    ) -> None:
+        if conditional and digest == validators.digest:
+            self.__logger.debug("CBP clients payload digest is unchanged")
+            raise CbpClientsNotModified()
+
+    def __create_clients(self, json_response: Dict[str, Any]) -> List[CbpClient]:
+        if "clients" not in json_response:
+            raise CbpFetchError("Missing 'clients' property in CBP response")
+
+        clients_data = json_response["clients"]
+        if not isinstance(clients_data, list):
+            raise CbpFetchError("Expected a list of clients in CBP response")
+
+        return self.__client_validator.validate(clients_data)
+
+    def __stream_clients(
+        self,
+        response: requests.Response,
+        conditional: bool,
+        validators: CbpResponseValidators,
+    ) -> Tuple[List[CbpClient], str]:
+        """
+        Decodes and validates the clients one by one while they are being received,
+        instead of holding the raw body and its decoded JSON tree in memory at once.
+
+        A conditional fetch buffers the raw body first, so an unchanged payload is
+        detected by its digest before any client is decoded.
+        """
+        digest = sha256()
+
+        def chunks() -> Iterator[bytes]:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                digest.update(chunk)
+                yield chunk
+
+        try:
+            body: Iterable[bytes] = chunks()
+            if conditional:
+                body = list(body)
+                self.__raise_if_unchanged(conditional, digest.hexdigest(), validators)
+
+            clients = self.__client_validator.validate(
+                JsonArrayStreamReader(body, "clients"),
+                batch_size=STREAM_BATCH_SIZE,
+            )
+        except requests.RequestException as e:
+            raise CbpFetchError(f"Failed to connect to CBP: {e}") from e
+        except ValueError as e:
+            raise CbpFetchError(f"Failed to parse CBP client data: {e}") from e
+        finally:
+            response.close()
+
+        return clients, digest.hexdigest()
+
+    def __get(
+        self,
+        endpoint: str,
+        headers: Dict[str, str],
+        params: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        try:
+            response = self.__resilient_caller.call(
+                lambda: self.__session.get(
+                    f"{self.__base_url}{endpoint}",
+                    headers=headers,
+                    params=params,
+                    timeout=self.__timeout_seconds,
+                    stream=stream,
+                ),
+                transient_errors=(requests.ConnectionError, requests.Timeout),
+            )
+            response.raise_for_status()
+        except (ConnectionError, requests.RequestException) as e:
+            raise CbpFetchError(f"Failed to connect to CBP: {e}") from e
+
+        return response
+
+    @staticmethod
+    def __parse_json(response: requests.Response) -> Dict[str, Any]:
+        try:
+            json_response = response.json()
+        except requests.JSONDecodeError as e:
+            raise CbpFetchError(f"Failed to parse CBP response as JSON: {e}") from e
+
+        if not isinstance(json_response, dict):
+            raise CbpFetchError("Expected a JSON object in CBP response")
+
+        return json_response
@@ -0,0 +1,127 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .models import CbpClient
+
+
+def get_effective_login_methods(
+    login_methods: Optional[Sequence[str]],
+    exclude_login_methods: Optional[Sequence[str]],
+) -> FrozenSet[str]:
+    return frozenset(login_methods or ()).difference(exclude_login_methods or ())
+
+
+class CbpClientIndexEntry(NamedTuple):
+    """The fields of a CBP client that are indexed."""
+
+    client_id: str
+    active: bool
+    effective_login_methods: FrozenSet[str]
+
+    @classmethod
+    def of_client(cls, client: CbpClient) -> "CbpClientIndexEntry":
+        return cls(
+            client.id,
+            client.active,
+            get_effective_login_methods(
+                client.login_methods, client.exclude_login_methods
+            ),
+        )
+
+    @classmethod
+    def of_record(cls, client_data: Dict[str, Any]) -> "CbpClientIndexEntry":
+        """Reads the indexed fields from a serialized client, without hydrating it."""
+        return cls(
+            client_data["id"],
+            bool(client_data.get("active")),
+            get_effective_login_methods(
+                client_data.get("login_methods"),
+                client_data.get("exclude_login_methods"),
+            ),
+        )
+
+
+class CbpClientIndex:
+    """
+    Immutable secondary indexes over a set of CBP clients.
+
+    The indexes hold client ids, so they can be built from serialized clients
+    without hydrating them. The clients of a query are resolved through
+    `get_by_id` on its first call and memoized, so queries return precomputed
+    tuples instead of scanning and copying the registry, and only hydrate the
+    clients in their result.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[CbpClientIndexEntry],
+        get_by_id: Callable[[str], CbpClient],
+    ) -> None:
+        self.__get_by_id = get_by_id
+        self.__effective_login_methods: Dict[str, FrozenSet[str]] = {}
+
+        client_ids: List[str] = []
+        active_client_ids: List[str] = []
+        by_login_method: Dict[str, List[str]] = {}
+        for entry in entries:
+            client_ids.append(entry.client_id)
+            if entry.active:
+                active_client_ids.append(entry.client_id)
+            self.__effective_login_methods[entry.client_id] = (
+                entry.effective_login_methods
+            )
+            for login_method in entry.effective_login_methods:
+                by_login_method.setdefault(login_method, []).append(entry.client_id)
+
+        self.__client_ids = tuple(client_ids)
+        self.__active_client_ids = tuple(active_client_ids)
+        self.__client_ids_by_login_method: Dict[str, Tuple[str, ...]] = {
+            login_method: tuple(ids) for login_method, ids in by_login_method.items()
+        }
+        self.__results: Dict[Tuple[str, ...], Tuple[CbpClient, ...]] = {}
+
+    @classmethod
+    def of_clients(cls, clients: Iterable[CbpClient]) -> "CbpClientIndex":
+        clients_by_id = {client.id: client for client in clients}
+        return cls(
+            (CbpClientIndexEntry.of_client(c) for c in clients_by_id.values()),
+            clients_by_id.__getitem__,
+        )
+
+    @property
+    def clients(self) -> Tuple[CbpClient, ...]:
+        return self.__resolve(("clients",), self.__client_ids)
+
+    @property
+    def active_clients(self) -> Tuple[CbpClient, ...]:
+        return self.__resolve(("active",), self.__active_client_ids)
+
+    def find_by_login_method(self, login_method: str) -> Tuple[CbpClient, ...]:
+        return self.__resolve(
+            ("login_method", login_method),
+            self.__client_ids_by_login_method.get(login_method, ()),
+        )
+
+    def get_effective_login_methods(self, client_id: str) -> FrozenSet[str]:
+        return self.__effective_login_methods.get(client_id, frozenset())
+
+    def __resolve(
+        self, key: Tuple[str, ...], client_ids: Tuple[str, ...]
+    ) -> Tuple[CbpClient, ...]:
+        # Racing threads may both resolve a result; either one is kept.
+        result = self.__results.get(key)
+        if result is None:
+            result = tuple(self.__get_by_id(client_id) for client_id in client_ids)
+            self.__results[key] = result
+
+        return result
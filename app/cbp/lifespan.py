@@ -1,14 +1,96 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from logging import Logger
 
 import inject
 from fastapi import FastAPI
 
-from app.cbp.services import CbpClientFetcher
+from app.cbp.schedulers import CbpClientSyncScheduler
+from app.cbp.watchers import (
+    CbpClientCacheWatcher,
+    CbpClientNotificationListener,
+    CbpClientSourceWatcher,
+)
+
+
+@asynccontextmanager
+async def cbp_lifespan(app: FastAPI):
+    async with prefetch_cbp_clients(app), watch_cbp_client_cache(app):
+        async with listen_for_cbp_client_notifications(app):
+            async with watch_cbp_client_source(app):
+                yield
 
 
 @asynccontextmanager
 async def prefetch_cbp_clients(_: FastAPI):
-    fetcher = inject.instance(CbpClientFetcher)
-    fetcher.fetch(use_cache=True)
+    # Serve from the cached clients right away and refresh them in the background,
+    # so startup does not wait for CBP. The scheduler merges the refresh with any
+    # webhook call that arrives in the meantime.
+    scheduler = inject.instance(CbpClientSyncScheduler)
+    if not scheduler.request():
+        yield
+        return
+
+    task = asyncio.create_task(_refresh_cbp_clients(scheduler))
+    try:
+        yield
+    finally:
+        scheduler.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+async def _refresh_cbp_clients(scheduler: CbpClientSyncScheduler) -> None:
+    try:
+        await asyncio.to_thread(scheduler.run)
+    except (OSError, ValueError) as e:
+        inject.instance(Logger).exception("Failed to refresh CBP clients", exc_info=e)
+
+
+@asynccontextmanager
+async def watch_cbp_client_cache(_: FastAPI):
+    watcher = inject.instance(CbpClientCacheWatcher)
+    if not watcher.enabled:
+        yield
+        return
+
+    task = asyncio.create_task(watcher.run())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+@asynccontextmanager
+async def listen_for_cbp_client_notifications(_: FastAPI):
+    listener = inject.instance(CbpClientNotificationListener)
+    if not listener.enabled:
+        yield
+        return
+
+    task = asyncio.create_task(listener.run())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+@asynccontextmanager
+async def watch_cbp_client_source(_: FastAPI):
+    watcher = inject.instance(CbpClientSourceWatcher)
+    if not watcher.enabled:
+        yield
+        return
 
-    yield
+    task = asyncio.create_task(watcher.run())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
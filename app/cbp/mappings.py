@@ -0,0 +1,73 @@
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    KeysView,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
+
+from max_core.services.client_repository import ClientMapping
+
+from .models import CbpClient
+
+
+class CbpClientMappingView(MutableMapping[str, ClientMapping]):
+    """
+    Dictionary view on a CBP client repository for the `Provider` from PyOP.
+
+    Clients are looked up in the repository and dumped when PyOP first accesses them,
+    so only the clients that are actually used are held as dictionaries. Dumps are
+    memoized together with the client they were made from; a dump is only returned
+    while the repository still holds that client instance, so a concurrent update
+    never serves a stale dump. The view is read-only.
+    """
+
+    def __init__(
+        self,
+        find_by_id: Callable[[str], Optional[CbpClient]],
+        client_ids: Callable[[], KeysView[str]],
+    ) -> None:
+        self.__find_by_id = find_by_id
+        self.__client_ids = client_ids
+        self.__dumps: Dict[str, Tuple[CbpClient, ClientMapping]] = {}
+
+    def invalidate(self, client_ids: Optional[Iterable[str]] = None) -> None:
+        """Drops the memoized dumps of the given clients, or of all clients."""
+        if client_ids is None:
+            self.__dumps = {}
+            return
+
+        for client_id in client_ids:
+            self.__dumps.pop(client_id, None)
+
+    def __getitem__(self, client_id: str) -> ClientMapping:
+        client = self.__find_by_id(client_id)
+        if client is None:
+            raise KeyError(client_id)
+
+        memoized = self.__dumps.get(client_id)
+        if memoized is not None and memoized[0] is client:
+            return memoized[1]
+
+        dump = client.model_dump()
+        self.__dumps[client_id] = (client, dump)
+
+        return dump
+
+    def __contains__(self, client_id: object) -> bool:
+        return client_id in self.__client_ids()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__client_ids())
+
+    def __len__(self) -> int:
+        return len(self.__client_ids())
+
+    def __setitem__(self, client_id: str, value: ClientMapping) -> None:
+        raise TypeError("CBP clients can only be changed through the repository")
+
+    def __delitem__(self, client_id: str) -> None:
+        raise TypeError("CBP clients can only be changed through the repository")
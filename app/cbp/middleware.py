@@ -0,0 +1,23 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .repositories import CbpClientRepository
+
+
+class PinCbpClientGenerationMiddleware:
+    """
+    Pins the current generation of CBP clients for each HTTP request, so all client
+    lookups while handling a request, including those made by PyOP, see the same
+    clients even if a sync publishes a new generation halfway through.
+    """
+
+    def __init__(self, app: ASGIApp, client_repository: CbpClientRepository) -> None:
+        self.__app = app
+        self.__client_repository = client_repository
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.__app(scope, receive, send)
+            return
+
+        with self.__client_repository.pin():
+            await self.__app(scope, receive, send)
@@ -1,8 +1,9 @@
 from datetime import datetime
+from typing import Any, Dict, List, Sequence
 
 from max_core.models.certificate_with_jwk import CertificateWithJWK
 from max_core.models.client import Client
-from pydantic import Field, field_serializer
+from pydantic import BaseModel, Field, field_serializer
 
 
 class CbpClient(Client):
@@ -15,3 +16,101 @@ class CbpClient(Client):
     @field_serializer("created_at", "updated_at")
     def serialize_dates(self, date: datetime) -> str:
         return date.isoformat() if date else ""
+
+
+class CbpClientChanges(BaseModel):
+    clients: Sequence[CbpClient] = Field(default_factory=list)
+    deleted_client_ids: Sequence[str] = Field(default_factory=list)
+
+
+class CbpClientsUpdate(BaseModel):
+    """
+    The clients to sync, as requested through the clients-updated webhook or by a
+    `DirectoryCbpSource`. `client_ids` are fetched from the source; `clients` and
+    `deleted_client_ids` are applied as-is, so they are only set by trusted sources.
+    An update without any clients requests a sync of all clients.
+    """
+
+    client_ids: List[str] = Field(default_factory=list)
+    deleted_client_ids: List[str] = Field(default_factory=list)
+    clients: List[Dict[str, Any]] = Field(default_factory=list)
+
+    @property
+    def is_targeted(self) -> bool:
+        return bool(self.client_ids or self.deleted_client_ids or self.clients)
+
+    def merge(self, other: "CbpClientsUpdate") -> "CbpClientsUpdate":
+        """Combines two updates; `other` takes precedence for clients in both."""
+        other_ids = {
+            *other.client_ids,
+            *other.deleted_client_ids,
+            *(client.get("id") for client in other.clients),
+        }
+
+        return CbpClientsUpdate(
+            client_ids=[i for i in self.client_ids if i not in other_ids]
+            + other.client_ids,
+            deleted_client_ids=[
+                i for i in self.deleted_client_ids if i not in other_ids
+            ]
+            + other.deleted_client_ids,
+            clients=[c for c in self.clients if c.get("id") not in other_ids]
+            + other.clients,
+        )
+
+
+class CbpClientsWebhookBody(BaseModel):
+    """
+    Optional body of the clients-updated webhook, naming the clients that changed.
+    The webhook is not authenticated, so the body is only a hint: every client it
+    names, including deleted clients and the ids of full records in `clients`, is
+    fetched from CBP and only what CBP returns is applied.
+    """
+
+    client_ids: List[str] = Field(default_factory=list)
+    deleted_client_ids: List[str] = Field(default_factory=list)
+    clients: List[Dict[str, Any]] = Field(default_factory=list)
+
+    def to_update(self) -> CbpClientsUpdate:
+        client_ids = [
+            *self.client_ids,
+            *self.deleted_client_ids,
+            *(
+                client["id"]
+                for client in self.clients
+                if isinstance(client.get("id"), str)
+            ),
+        ]
+        return CbpClientsUpdate(client_ids=list(dict.fromkeys(client_ids)))
+
+
+class CbpResponseValidators(BaseModel):
+    """
+    Validators of the last successfully processed CBP clients response, used to make
+    conditional requests and to detect unchanged payloads.
+    """
+
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: str | None = None
+
+    def as_request_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class CbpClientsResponse(BaseModel):
+    """
+    All clients of a source, along with the validators of the response they were
+    read from. The validators are only saved once the clients are cached, so a
+    failed update does not make the next conditional request skip them.
+    """
+
+    clients: Sequence[CbpClient] = Field(default_factory=list)
+    validators: CbpResponseValidators | None = None
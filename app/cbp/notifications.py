@@ -0,0 +1,99 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from queue import Empty, Queue
+from typing import Iterator, Optional
+
+from redis import Redis
+from redis.client import PubSub
+from redis.exceptions import RedisError
+
+
+class CbpClientNotificationChannel(ABC):
+    """
+    Broadcasts the generation of the CBP clients after they were written, so every
+    process in the cluster can reload them without contacting CBP itself.
+    """
+
+    @abstractmethod
+    def publish(self, generation: int) -> None:
+        pass
+
+    @abstractmethod
+    def receive(self, timeout_seconds: float) -> Optional[int]:
+        """
+        Waits at most `timeout_seconds` for a published generation. Not safe to call
+        from multiple threads at the same time.
+        """
+
+
+class NoOpCbpClientNotificationChannel(CbpClientNotificationChannel):
+    def publish(self, generation: int) -> None:
+        pass
+
+    def receive(self, timeout_seconds: float) -> Optional[int]:
+        return None
+
+
+class InMemoryCbpClientNotificationChannel(CbpClientNotificationChannel):
+    """Channel with a single receiver in the same process, e.g. for tests."""
+
+    def __init__(self) -> None:
+        self.__queue: Queue[int] = Queue()
+
+    def publish(self, generation: int) -> None:
+        self.__queue.put(generation)
+
+    def receive(self, timeout_seconds: float) -> Optional[int]:
+        try:
+            return self.__queue.get(timeout=timeout_seconds)
+        except Empty:
+            return None
+
+
+class RedisCbpClientNotificationChannel(CbpClientNotificationChannel):
+    """
+    Channel using Redis pub/sub. The subscription is made on the first `receive`
+    and made again after a Redis error; generations published in between are
+    missed, so receivers should also check for changes after an error.
+    """
+
+    def __init__(self, redis: Redis, channel: str) -> None:
+        self.__redis = redis
+        self.__channel = channel
+        self.__pubsub: Optional[PubSub] = None
+
+    def publish(self, generation: int) -> None:
+        with self.__translate_errors():
+            self.__redis.publish(self.__channel, generation)
+
+    def receive(self, timeout_seconds: float) -> Optional[int]:
+        with self.__translate_errors():
+            if self.__pubsub is None:
+                self.__pubsub = self.__redis.pubsub(ignore_subscribe_messages=True)
+                self.__pubsub.subscribe(self.__channel)
+
+            message = self.__pubsub.get_message(timeout=timeout_seconds)
+
+        if message is None or message["type"] != "message":
+            return None
+
+        try:
+            return int(message["data"])
+        except ValueError:
+            return None
+
+    def __unsubscribe(self) -> None:
+        if self.__pubsub is not None:
+            pubsub, self.__pubsub = self.__pubsub, None
+            try:
+                pubsub.close()
+            except RedisError:
+                pass
+
+    @contextmanager
+    def __translate_errors(self) -> Iterator[None]:
+        try:
+            yield
+        except RedisError as e:
+            self.__unsubscribe()
+            raise ConnectionError(str(e)) from e
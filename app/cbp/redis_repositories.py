@@ -0,0 +1,101 @@
+import json
+from threading import Lock
+from typing import ContextManager, Dict, Optional, Sequence
+
+from .models import CbpClient
+from .notifications import CbpClientNotificationChannel
+from .repositories import VersionedCbpClientRepository
+from .stores import CbpClientStore
+
+
+class RedisCbpClientRepository(VersionedCbpClientRepository):
+    """
+    Client repository backed by a `CbpClientStore` that is shared by all processes in
+    the cluster, such as Redis.
+
+    Every process keeps a local copy of the clients, so reads never reach the store;
+    `reload_if_changed` reloads the copy when the store's generation differs from the
+    local generation. The fetch lock is held in the store, so only one process in the
+    cluster fetches from CBP at a time.
+
+    After every write the new generation is published on the notification channel,
+    so the other processes reload right away instead of on their next poll.
+    """
+
+    def __init__(
+        self,
+        store: CbpClientStore,
+        notification_channel: Optional[CbpClientNotificationChannel] = None,
+    ) -> None:
+        super().__init__()
+        self.__store = store
+        self.__notification_channel = notification_channel
+        self.__write_lock = Lock()
+
+        try:
+            self.__load()
+        except ConnectionError:
+            # The store is unreachable, e.g. Redis is down at boot. The clients stay
+            # empty, so the app reports not ready, until `reload_if_changed` reaches
+            # the store.
+            pass
+
+    def fetch_lock(self) -> ContextManager[None]:
+        return self.__store.lock()
+
+    def reload_if_changed(self) -> bool:
+        if self.__store.get_generation() == self._current.generation:
+            return False
+
+        with self.__write_lock:
+            self.__load()
+
+        return True
+
+    def __load(self) -> None:
+        generation, records = self.__store.load()
+        self._publish(
+            {
+                client_id: self._hydrate(json.loads(record))
+                for client_id, record in records.items()
+            },
+            generation=generation,
+        )
+
+    def update(self, clients: Sequence[CbpClient]) -> None:
+        with self.__write_lock:
+            generation = self.__store.replace(
+                {client.id: self._serialize(client) for client in clients}
+            )
+            self._publish(
+                {client.id: client for client in clients}, generation=generation
+            )
+
+        self.__notify(generation)
+
+    def merge(
+        self, clients: Sequence[CbpClient], deleted_client_ids: Sequence[str]
+    ) -> None:
+        with self.__write_lock:
+            current = self._current
+            generation = self.__store.merge(
+                {client.id: self._serialize(client) for client in clients},
+                deleted_client_ids,
+            )
+
+            if generation != current.generation + 1:
+                # Another process wrote in between, so the local copy misses changes.
+                self.__load()
+            else:
+                merged_clients: Dict[str, CbpClient] = dict(current.hydrated_clients)
+                merged_clients.update({client.id: client for client in clients})
+                for client_id in deleted_client_ids:
+                    merged_clients.pop(client_id, None)
+
+                self._publish(merged_clients, generation=generation)
+
+        self.__notify(generation)
+
+    def __notify(self, generation: int) -> None:
+        if self.__notification_channel is not None:
+            self.__notification_channel.publish(generation)
@@ -1,12 +1,25 @@
-import json
 from abc import ABC, abstractmethod
-from os import W_OK, access, path
-from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    FrozenSet,
+    Iterator,
+    KeysView,
+    MutableMapping,
+    Optional,
+    Sequence,
+)
 
 from max_core.services.client_repository import ClientMapping, ClientRepository
 
 from .factories import CertificateWithJWKFactory
+from .generations import CbpClientGeneration
+from .mappings import CbpClientMappingView
 from .models import CbpClient
+from .snapshots import CbpClientSnapshot
 
 
 class CbpClientRepository(ClientRepository, ABC):
@@ -19,69 +32,159 @@ class CbpClientRepository(ClientRepository, ABC):
     @abstractmethod
     def get_all(self) -> Sequence[CbpClient]: ...
 
+    # The queries below are not used within this service yet. They serve the login
+    # flow, which offers a client only its effective login methods, and listings of
+    # the clients that are active or allow a login method, without a scan per call.
+
+    @abstractmethod
+    def get_active(self) -> Sequence[CbpClient]: ...
+
+    @abstractmethod
+    def find_by_login_method(self, login_method: str) -> Sequence[CbpClient]:
+        """Returns the clients whose effective login methods include `login_method`."""
+
+    @abstractmethod
+    def get_effective_login_methods(self, client_id: str) -> FrozenSet[str]:
+        """
+        Returns the login methods of a client, minus its excluded login methods.
+        Only the client itself is looked up, so lazily loaded clients stay unhydrated.
+        """
+
     @abstractmethod
     def update(self, clients: Sequence[CbpClient]) -> None: ...
 
+    @abstractmethod
+    def merge(
+        self, clients: Sequence[CbpClient], deleted_client_ids: Sequence[str]
+    ) -> None: ...
 
-class FilesystemCbpClientRepository(CbpClientRepository):
-    def __init__(self, filepath: str) -> None:
-        self.__filepath = filepath
-        self.__clients: Mapping[str, CbpClient] = {}
-        self.__clients_as_mapping: MutableMapping[str, ClientMapping] = {}
+    @abstractmethod
+    def get_generation(self) -> CbpClientGeneration:
+        """Returns the current generation of clients, which never changes afterwards."""
 
-        file_dir, _ = path.split(self.__filepath)
-        if not path.isdir(file_dir) or not access(file_dir, W_OK):
-            raise ValueError(f"Cannot write to directory: {file_dir}")
+    @abstractmethod
+    def pin(self) -> ContextManager[CbpClientGeneration]:
+        """
+        Pins the current generation for the current context, so every read within the
+        context, including reads through `clients_as_mapping`, sees the same clients.
+        """
 
-        if path.isfile(self.__filepath) and path.getsize(self.__filepath) > 0:
-            self.__update_clients(
-                {
-                    client_data["id"]: CbpClient(**client_data)
-                    for client_data in self.__load_clients_from_file()
-                }
-            )
+    @abstractmethod
+    def fetch_lock(self) -> ContextManager[None]:
+        """
+        Lock that is held while fetching clients from CBP, so processes that share
+        the underlying storage do not fetch concurrently.
+        """
 
-    def __load_clients_from_file(self) -> List[Dict[str, Any]]:
-        with open(self.__filepath, "r", encoding="utf-8") as file:
-            clients: List[Dict[str, Any]] = json.load(file)
+    @abstractmethod
+    def reload_if_changed(self) -> bool:
+        """
+        Reloads the clients if another process changed the underlying storage.
+        Returns whether the clients were reloaded.
+        """
+
+
+class VersionedCbpClientRepository(CbpClientRepository, ABC):
+    """
+    Base class for repositories that publish every change as a new immutable
+    `CbpClientGeneration` by swapping a single reference, so reads are lock-free
+    and never observe a partially applied update.
+    """
+
+    def __init__(self) -> None:
+        self.__current = CbpClientGeneration(0, {})
+        self.__pinned: ContextVar[Optional[CbpClientGeneration]] = ContextVar(
+            f"pinned_cbp_client_generation_{id(self)}", default=None
+        )
+        self.__clients_as_mapping = CbpClientMappingView(
+            self.find_by_id, self.__client_ids
+        )
+
+    def get_generation(self) -> CbpClientGeneration:
+        pinned = self.__pinned.get()
+        if pinned is not None:
+            return pinned
 
-        for client in clients:
-            client["certificate"] = CertificateWithJWKFactory.create_dummy()
+        return self.__current
 
-        return clients
+    @contextmanager
+    def pin(self) -> Iterator[CbpClientGeneration]:
+        generation = self.get_generation()
+        token = self.__pinned.set(generation)
+        try:
+            yield generation
+        finally:
+            self.__pinned.reset(token)
 
-    def __write_clients_to_file(self, clients: Sequence[CbpClient]) -> None:
-        with open(self.__filepath, "w", encoding="utf-8") as file:
-            json.dump(
-                [client.model_dump() for client in clients],
-                file,
-                ensure_ascii=False,
-                indent=2,
-            )
+    def __client_ids(self) -> KeysView[str]:
+        return self.get_generation().ids()
 
     def get_by_id(self, client_id: str) -> CbpClient:
-        return self.__clients[client_id]
+        return self.get_generation().get_by_id(client_id)
 
     def find_by_id(self, client_id: str) -> Optional[CbpClient]:
-        return self.__clients.get(client_id)
+        return self.get_generation().find_by_id(client_id)
 
     def get_all(self) -> Sequence[CbpClient]:
-        return list[CbpClient](self.__clients.values())
-
-    def update(self, clients: Sequence[CbpClient]) -> None:
-        self.__write_clients_to_file(clients)
-        self.__update_clients({client.id: client for client in clients})
-
-    def __update_clients(self, clients: Mapping[str, CbpClient]) -> None:
-        self.__clients = clients
-        # Sync the __clients_as_mapping attribute with the updated __clients attribute.
-        # This attribute is added (temporarily) to accommodate the `Provider` from PyOP, that only accepts a dictionary.
-        # Important: update the existing dictionary instead of reassigning it, to ensure the reference passed to PyOP is kept intact.
-        self.__clients_as_mapping.clear()
-        self.__clients_as_mapping.update(
-            {client.id: client.model_dump() for client in self.__clients.values()}
-        )
+        return self.get_generation().index.clients
+
+    def get_active(self) -> Sequence[CbpClient]:
+        return self.get_generation().index.active_clients
+
+    def find_by_login_method(self, login_method: str) -> Sequence[CbpClient]:
+        return self.get_generation().index.find_by_login_method(login_method)
+
+    def get_effective_login_methods(self, client_id: str) -> FrozenSet[str]:
+        return self.get_generation().get_effective_login_methods(client_id)
 
     @property
     def clients_as_mapping(self) -> MutableMapping[str, ClientMapping]:
         return self.__clients_as_mapping
+
+    @property
+    def _current(self) -> CbpClientGeneration:
+        """The latest published generation, regardless of any pinned generation."""
+        return self.__current
+
+    def _publish(
+        self,
+        clients: Dict[str, CbpClient],
+        snapshot: Optional[CbpClientSnapshot] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        previous = self.__current
+        # Copy, as readers may still hydrate clients into the previous generation.
+        previous_clients = dict(previous.hydrated_clients)
+
+        # Keep the instances of unchanged clients, so their memoized dumps in the
+        # __clients_as_mapping view (passed to the `Provider` from PyOP) stay valid.
+        for client_id, client in clients.items():
+            previous_client = previous_clients.get(client_id)
+            if (
+                previous_client is not None
+                and previous_client is not client
+                and previous_client == client
+            ):
+                clients[client_id] = previous_client
+
+        # Superseded snapshots are not closed: pinned readers may still use them.
+        self.__current = CbpClientGeneration(
+            previous.generation + 1 if generation is None else generation,
+            clients,
+            snapshot,
+            self._hydrate,
+        )
+        self.__clients_as_mapping.invalidate(
+            client_id
+            for client_id, client in previous_clients.items()
+            if clients.get(client_id) is not client
+        )
+
+    @staticmethod
+    def _hydrate(client_data: Dict[str, Any]) -> CbpClient:
+        client_data["certificate"] = CertificateWithJWKFactory.get_placeholder()
+        return CbpClient(**client_data)
+
+    @staticmethod
+    def _serialize(client: CbpClient) -> bytes:
+        return client.model_dump_json().encode("utf-8")
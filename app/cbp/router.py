@@ -1,23 +1,29 @@
+from contextvars import Context
+from datetime import datetime, timezone
 from logging import Logger
+from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Request, Response
+from fastapi import APIRouter, BackgroundTasks, Body, Request, Response
+from fastapi.responses import JSONResponse
 from inject import autoparams
 from slowapi import Limiter
 
+from .models import CbpClientsWebhookBody
+from .schedulers import CbpClientSyncScheduler
 from .services import CbpClientFetcher
 
 
 class ClientsSyncRouter(APIRouter):
-    @autoparams("fetcher", "limiter", "logger")
+    @autoparams("sync_scheduler", "limiter", "logger")
     def __init__(
         self,
-        fetcher: CbpClientFetcher,
+        sync_scheduler: CbpClientSyncScheduler,
         limiter: Limiter,
         logger: Logger,
         request_limit: int,
     ):
         super().__init__(prefix="/api/v1", tags=["vad"])
-        self.__fetcher = fetcher
+        self.__sync_scheduler = sync_scheduler
         self.__limiter = limiter
         self.__logger = logger
         self.__request_limit = request_limit
@@ -34,15 +40,55 @@ class ClientsSyncRouter(APIRouter):
         )(path)
 
     async def clients_update(  # pylint: disable=unused-argument
-        self, request: Request, background_tasks: BackgroundTasks
+        self,
+        request: Request,
+        background_tasks: BackgroundTasks,
+        body: Optional[CbpClientsWebhookBody] = Body(default=None),
     ) -> Response:
         # NOTE: `request` is required by slowapi for rate limiting, even though it is not used in this handler.
-        self.__logger.info(
-            "Queueing background task for updating local CBP clients cache."
-        )
-        background_tasks.add_task(self._fetch_cbp_clients)
+        if self.__sync_scheduler.request(body.to_update() if body else None):
+            self.__logger.info(
+                "Queueing background task for updating local CBP clients cache."
+            )
+            # Run the sync in a fresh context, so it does not read the generation of
+            # CBP clients that is pinned for this request.
+            background_tasks.add_task(Context().run, self.__sync_scheduler.run)
+        else:
+            self.__logger.info("Merged request into already queued CBP clients sync.")
+
         return Response(status_code=202)
 
-    def _fetch_cbp_clients(self) -> None:
-        self.__logger.info("Running background task for fetching CBP clients.")
-        self.__fetcher.fetch(use_cache=False)
+
+class ClientsReadinessRouter(APIRouter):
+    @autoparams("fetcher")
+    def __init__(self, fetcher: CbpClientFetcher):
+        super().__init__(tags=["vad"])
+        self.__fetcher = fetcher
+        self._register_routes()
+
+    def _register_routes(self):
+        self.get(
+            "/ready",
+            responses={
+                200: {"description": "CBP clients are loaded"},
+                503: {"description": "CBP clients are not loaded yet"},
+            },
+        )(self.ready)
+
+    async def ready(self) -> Response:
+        last_fetched_at = self.__fetcher.last_fetched_at
+        # A failed fetch keeps serving the cached clients, so it does not affect
+        # readiness; the age shows how stale the clients may be. This route is
+        # public, so why a fetch failed is only logged, never returned.
+        fetch_status = {
+            "age_seconds": (
+                round((datetime.now(timezone.utc) - last_fetched_at).total_seconds())
+                if last_fetched_at
+                else None
+            ),
+        }
+
+        if self.__fetcher.ready:
+            return JSONResponse({"status": "ready", **fetch_status})
+
+        return JSONResponse({"status": "not ready", **fetch_status}, status_code=503)
@@ -0,0 +1,141 @@
+from logging import Logger
+from threading import Event, Lock
+from time import sleep
+from typing import Optional
+
+from inject import autoparams
+
+from .exceptions import CbpFetchError
+from .models import CbpClientsUpdate
+from .services import CbpClientFetcher
+
+
+class CbpClientSyncScheduler:
+    """
+    Collapses requests to synchronise the CBP clients into at most one running fetch
+    plus one trailing fetch.
+
+    Requests that arrive during the debounce window or while a fetch is running are
+    merged, so a burst of webhook calls results in a constant number of fetches.
+    Targeted updates are merged into a single update, unless any of the merged
+    requests asks for a sync of all clients.
+
+    A sync that fails to fetch from CBP is retried with exponential backoff; the
+    cached clients are served in the meantime.
+    """
+
+    @autoparams("fetcher", "logger")
+    def __init__(
+        self,
+        fetcher: CbpClientFetcher,
+        logger: Logger,
+        debounce_seconds: float = 0,
+        retry_attempts: int = 0,
+        retry_delay_seconds: float = 1,
+        retry_max_delay_seconds: float = 60,
+    ) -> None:
+        self.__fetcher = fetcher
+        self.__logger = logger
+        self.__debounce_seconds = debounce_seconds
+        self.__retry_delays = [
+            min(retry_delay_seconds * 2**attempt, retry_max_delay_seconds)
+            for attempt in range(retry_attempts)
+        ]
+        self.__stopped = Event()
+        self.__lock = Lock()
+        self.__scheduled = False
+        self.__pending = False
+        self.__full_sync = False
+        self.__update = CbpClientsUpdate()
+
+    def request(self, update: Optional[CbpClientsUpdate] = None) -> bool:
+        """
+        Registers a sync request, of all clients or only of those in a targeted
+        `update`. Returns whether the caller must schedule `run`; if not, the request
+        was merged into a sync that is already scheduled.
+        """
+        with self.__lock:
+            if update is None or not update.is_targeted:
+                self.__full_sync = True
+            else:
+                self.__update = self.__update.merge(update)
+
+            if self.__scheduled:
+                self.__pending = True
+                return False
+
+            self.__scheduled = True
+            return True
+
+    def run(self) -> None:
+        attempt = 0
+        try:
+            while True:
+                if self.__debounce_seconds > 0:
+                    sleep(self.__debounce_seconds)
+
+                with self.__lock:
+                    self.__pending = False
+                    full_sync, update = self.__full_sync, self.__update
+                    self.__full_sync, self.__update = False, CbpClientsUpdate()
+
+                self.__logger.info("Running background task for fetching CBP clients.")
+                try:
+                    self.__sync(full_sync, update)
+                    attempt = 0
+                except CbpFetchError:
+                    attempt += 1
+                    if attempt > len(self.__retry_delays):
+                        # Only the failed sync is dropped; requests that arrived
+                        # while it ran are still synced below.
+                        self.__logger.error(
+                            "Giving up fetching CBP clients after %d attempts", attempt
+                        )
+                        attempt = 0
+                    elif not self.__retry_later(attempt, full_sync, update):
+                        self.__reset()
+                        return
+
+                with self.__lock:
+                    if not self.__pending:
+                        self.__scheduled = False
+                        return
+        except Exception:
+            self.__reset()
+            raise
+
+    def stop(self) -> None:
+        """Interrupts a pending retry, e.g. on shutdown."""
+        self.__stopped.set()
+
+    def __sync(self, full_sync: bool, update: CbpClientsUpdate) -> None:
+        if full_sync:
+            self.__fetcher.fetch(use_cache=False)
+        elif update.is_targeted:
+            self.__fetcher.fetch_update(update)
+
+    def __retry_later(
+        self, attempt: int, full_sync: bool, update: CbpClientsUpdate
+    ) -> bool:
+        """
+        Waits with exponential backoff and requeues the failed sync, merged with any
+        requests that arrived in the meantime. Returns `False` if stopped while waiting.
+        """
+        delay = self.__retry_delays[attempt - 1]
+        self.__logger.info("Retrying CBP clients fetch in %.1f seconds", delay)
+
+        with self.__lock:
+            self.__full_sync = self.__full_sync or full_sync
+            self.__update = update.merge(self.__update)
+            self.__pending = True
+
+        return not self.__stopped.wait(delay)
+
+    def __reset(self) -> None:
+        """
+        Unschedules the sync after it was aborted. Requests that were not taken up
+        yet are kept, so they are synced by the next scheduled run.
+        """
+        with self.__lock:
+            self.__scheduled = False
+            self.__pending = False
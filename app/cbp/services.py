@@ -1,92 +1,186 @@
-from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from logging import Logger
-from typing import Any, Dict, Sequence
+from threading import Event
+from typing import Iterator, Optional
 
-import requests
 from inject import autoparams
 
-from .factories import CbpClientFactory
-from .models import CbpClient
+from .exceptions import CbpClientsNotModified, CbpFetchError
+from .models import CbpClientsUpdate
 from .repositories import CbpClientRepository
-
-
-class CbpSource(ABC):
-    @abstractmethod
-    def get_clients(self) -> Sequence[CbpClient]: ...
-
-
-class CbpHttpClient(CbpSource):
-    @autoparams("logger")
-    def __init__(self, logger: Logger, base_url: str, timeout_seconds: int = 30):
-        self.__logger = logger
-        self.__base_url = base_url
-        self.__timeout_seconds = timeout_seconds
-
-    def get_clients(self) -> Sequence[CbpClient]:
-        json_response = self.__get("/clients")
-
-        if "clients" not in json_response:
-            self.__logger.error(
-                "Missing 'clients' property in CBP response: %s", json_response
-            )
-            return []
-
-        try:
-            clients = [
-                CbpClientFactory.create(**client_data)
-                for client_data in json_response["clients"]
-            ]
-        except ValueError as e:
-            self.__logger.exception("Failed to parse CBP client data", exc_info=e)
-            return []
-
-        return clients
-
-    def __get(self, endpoint: str) -> Dict[str, Any]:
-        try:
-            response = requests.get(
-                f"{self.__base_url}{endpoint}", timeout=self.__timeout_seconds
-            )
-            response.raise_for_status()
-        except (ConnectionError, requests.RequestException) as e:
-            self.__logger.exception("Failed to connect to CBP", exc_info=e)
-            return {}
-
-        try:
-            json_response = response.json()
-        except requests.JSONDecodeError as e:
-            self.__logger.exception("Failed to parse CBP response as JSON", exc_info=e)
-            return {}
-
-        return json_response
-
-
-class NoOpCbpSource(CbpSource):
-    def get_clients(self) -> Sequence[CbpClient]:
-        return []
+from .sources import CbpSource
+from .validation import CbpClientBatchValidator
 
 
 class CbpClientFetcher:
-    @autoparams()
+    @autoparams("logger", "cached_cbp_client_repository", "cbp_source")
     def __init__(
         self,
         logger: Logger,
         cached_cbp_client_repository: CbpClientRepository,
         cbp_source: CbpSource,
+        incremental_sync: bool = False,
     ):
         super().__init__()
 
         self.__logger = logger
         self.__cached_client_repository = cached_cbp_client_repository
         self.__cbp_source = cbp_source
+        self.__incremental_sync = incremental_sync
+        self.__client_validator = CbpClientBatchValidator(logger)
+        self.__fetched = Event()
+        self.__last_fetched_at: Optional[datetime] = None
+        self.__last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether a usable set of clients is available: either the cache held clients
+        on startup or a fetch has completed since.
+        """
+        if self.__fetched.is_set():
+            return True
+
+        return len(self.__cached_client_repository.clients_as_mapping) > 0
+
+    @property
+    def last_fetched_at(self) -> Optional[datetime]:
+        """When this worker last fetched the clients, or found them unchanged."""
+        return self.__last_fetched_at
+
+    @property
+    def last_error(self) -> Optional[str]:
+        """Why the last fetch failed; `None` if it succeeded."""
+        return self.__last_error
 
     def fetch(self, use_cache: bool) -> None:
         self.__logger.debug("Fetch CBP clients using cache: %s", use_cache)
-        clients = self.__cached_client_repository.get_all() if use_cache else []
+        with self.__tracked():
+            # Catch up before queueing for the lock, so a newer generation once
+            # holding it means that another process fetched while this one waited.
+            # The clients may already have been reloaded while waiting, e.g. by a
+            # notification.
+            self.__cached_client_repository.reload_if_changed()
+            queued_generation = (
+                self.__cached_client_repository.get_generation().generation
+            )
+            with self.__cached_client_repository.fetch_lock():
+                self.__cached_client_repository.reload_if_changed()
+                generation = self.__cached_client_repository.get_generation()
+                if generation.generation != queued_generation and len(generation) > 0:
+                    self.__logger.info("Using CBP clients fetched by another process")
+                    return
+
+                self.__fetch(use_cache)
+
+    def fetch_update(self, update: CbpClientsUpdate) -> None:
+        """
+        Fetches only the clients named in a targeted update and merges them into the
+        cache. Falls back to fetching all clients while the cache is empty.
+        """
+        with self.__tracked(), self.__cached_client_repository.fetch_lock():
+            self.__cached_client_repository.reload_if_changed()
+            if len(self.__cached_client_repository.get_generation()) == 0:
+                self.__fetch(use_cache=False)
+            else:
+                self.__fetch_update(update)
+
+    @contextmanager
+    def __tracked(self) -> Iterator[None]:
+        """
+        Records the outcome of a fetch. A failed fetch leaves the cache untouched, so
+        the last known clients keep being served.
+        """
+        try:
+            with self.__cache_errors_as_fetch_errors():
+                yield
+        except CbpFetchError as e:
+            self.__last_error = str(e)
+            generation = self.__cached_client_repository.get_generation()
+            self.__logger.warning(
+                "Failed to fetch CBP clients, serving %d cached clients fetched at %s: %s",
+                len(generation),
+                self.__last_fetched_at or "an unknown time",
+                e,
+            )
+            raise
+
+        self.__last_fetched_at = datetime.now(timezone.utc)
+        self.__last_error = None
+        self.__fetched.set()
+
+    @staticmethod
+    @contextmanager
+    def __cache_errors_as_fetch_errors() -> Iterator[None]:
+        """
+        A shared cache that is unreachable, or whose fetch lock is not acquired in
+        time, fails the fetch like CBP being unreachable, so it is retried.
+        """
+        try:
+            yield
+        except (ConnectionError, TimeoutError) as e:
+            raise CbpFetchError(f"CBP client cache is unavailable: {e}") from e
 
-        if len(clients) == 0:
-            self.__logger.debug("No cached clients; fetching clients from source")
-            clients = self.__cbp_source.get_clients()
+    def __fetch_update(self, update: CbpClientsUpdate) -> None:
+        clients = self.__client_validator.validate(update.clients)
+        deleted_client_ids = list(update.deleted_client_ids)
+
+        if update.client_ids:
+            self.__logger.debug(
+                "Fetching %d changed CBP clients", len(update.client_ids)
+            )
+            changes = self.__cbp_source.get_clients_by_ids(update.client_ids)
+            clients.extend(changes.clients)
+            deleted_client_ids.extend(changes.deleted_client_ids)
+
+        self.__logger.debug(
+            "Merging %d changed and %d deleted CBP clients",
+            len(clients),
+            len(deleted_client_ids),
+        )
+        self.__cached_client_repository.merge(clients, deleted_client_ids)
+
+    def __fetch(self, use_cache: bool) -> None:
+        # Only the generation's size and watermark are used, so the clients of a
+        # lazily loaded cache are not hydrated by a sync.
+        if use_cache and len(self.__cached_client_repository.get_generation()) > 0:
+            return
+
+        if not use_cache and self.__incremental_sync and self.__fetch_changes():
+            return
+
+        self.__logger.debug("Fetching all clients from source")
+        try:
+            response = self.__cbp_source.get_clients(conditional=not use_cache)
+        except CbpClientsNotModified:
+            if len(self.__cached_client_repository.get_generation()) > 0:
+                self.__logger.info("CBP clients not modified; keeping cache")
+                return
+
+            response = self.__cbp_source.get_clients()
+
+        self.__logger.debug("Caching fetched clients")
+        self.__cached_client_repository.update(response.clients)
+        if response.validators is not None:
+            self.__cbp_source.save_validators(response.validators)
+
+    def __fetch_changes(self) -> bool:
+        since = self.__cached_client_repository.get_generation().updated_at
+        if since is None:
+            return False
+
+        self.__logger.debug("Fetching CBP clients changed since %s", since)
+        changes = self.__cbp_source.get_changed_clients(since)
+
+        if changes.clients or changes.deleted_client_ids:
+            self.__logger.debug(
+                "Merging %d changed and %d deleted CBP clients",
+                len(changes.clients),
+                len(changes.deleted_client_ids),
+            )
+            self.__cached_client_repository.merge(
+                changes.clients, changes.deleted_client_ids
+            )
 
-            self.__logger.debug("Caching fetched clients")
-            self.__cached_client_repository.update(clients)
+        return True
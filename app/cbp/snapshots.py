@@ -0,0 +1,199 @@
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, KeysView, List, Optional, Tuple
+
+MAGIC = b"CBPSNAP\x00"
+VERSION = 2
+
+# magic, version, record count
+_HEADER = struct.Struct("<8sHI")
+# length of the `updated_at` watermark that follows the header
+_WATERMARK_HEADER = struct.Struct("<H")
+# id length, record offset, record length (the id bytes follow each entry)
+_INDEX_ENTRY = struct.Struct("<HQI")
+
+
+class CbpClientSnapshot:
+    """
+    Read-only view on a CBP client snapshot file.
+
+    A snapshot consists of a header, an index of `(client id, offset, length)` entries
+    and the serialized client records. The header holds the latest `updated_at` of
+    the clients, so it is known without hydrating them. The file is memory-mapped, so opening it only
+    parses the index; records are read from the mapping when they are requested.
+
+    Snapshots are written to a temporary file that atomically replaces the previous
+    snapshot, so readers never observe a partially written file.
+    """
+
+    def __init__(
+        self,
+        data: Optional[mmap.mmap],
+        index: Dict[str, Tuple[int, int]],
+        file_stat: os.stat_result,
+        updated_at: Optional[datetime] = None,
+    ) -> None:
+        self.__data = data
+        self.__index = index
+        self.__file_stat = file_stat
+        self.__updated_at = updated_at
+
+    @classmethod
+    def open(cls, filepath: str) -> "CbpClientSnapshot":
+        with open(filepath, "rb") as file:
+            file_stat = os.fstat(file.fileno())
+            if file_stat.st_size == 0:
+                return cls(None, {}, file_stat)
+
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            updated_at, index = cls.__read_index(data)
+            return cls(data, index, file_stat, updated_at)
+        except ValueError:
+            data.close()
+            raise
+
+    @staticmethod
+    def is_snapshot(filepath: str) -> bool:
+        with open(filepath, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+
+    @staticmethod
+    def write(
+        filepath: str,
+        records: Iterable[Tuple[str, bytes]],
+        updated_at: Optional[datetime] = None,
+    ) -> os.stat_result:
+        """Writes a snapshot and returns the stat of the file that was written."""
+        record_list = list(records)
+        encoded_ids = [client_id.encode("utf-8") for client_id, _ in record_list]
+        watermark = b"" if updated_at is None else updated_at.isoformat().encode()
+
+        offset = (
+            _HEADER.size
+            + _WATERMARK_HEADER.size
+            + len(watermark)
+            + sum(_INDEX_ENTRY.size + len(encoded_id) for encoded_id in encoded_ids)
+        )
+        index: List[bytes] = []
+        for encoded_id, (_, record) in zip(encoded_ids, record_list):
+            index.append(_INDEX_ENTRY.pack(len(encoded_id), offset, len(record)))
+            index.append(encoded_id)
+            offset += len(record)
+
+        file_dir, file_name = os.path.split(filepath)
+        fd, temp_filepath = tempfile.mkstemp(dir=file_dir, prefix=f".{file_name}.")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(_HEADER.pack(MAGIC, VERSION, len(record_list)))
+                file.write(_WATERMARK_HEADER.pack(len(watermark)))
+                file.write(watermark)
+                file.writelines(index)
+                file.writelines(record for _, record in record_list)
+                file.flush()
+                os.fsync(file.fileno())
+                file_stat = os.fstat(file.fileno())
+
+            os.replace(temp_filepath, filepath)
+        except BaseException:
+            if os.path.exists(temp_filepath):
+                os.unlink(temp_filepath)
+            raise
+
+        return file_stat
+
+    @property
+    def file_stat(self) -> os.stat_result:
+        return self.__file_stat
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        """The latest `updated_at` of the clients; `None` if it was not recorded."""
+        return self.__updated_at
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def __contains__(self, client_id: object) -> bool:
+        return client_id in self.__index
+
+    def ids(self) -> KeysView[str]:
+        return self.__index.keys()
+
+    def get(self, client_id: str) -> Optional[bytes]:
+        location = self.__index.get(client_id)
+        if location is None or self.__data is None:
+            return None
+
+        offset, length = location
+        return self.__data[offset : offset + length]
+
+    def records(self) -> Iterator[Tuple[str, bytes]]:
+        for client_id in self.__index:
+            record = self.get(client_id)
+            if record is not None:
+                yield client_id, record
+
+    def close(self) -> None:
+        if self.__data is not None:
+            self.__data.close()
+            self.__data = None
+
+    def __enter__(self) -> "CbpClientSnapshot":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    @staticmethod
+    def __read_index(
+        data: mmap.mmap,
+    ) -> Tuple[Optional[datetime], Dict[str, Tuple[int, int]]]:
+        size = len(data)
+        if size < _HEADER.size:
+            raise ValueError("CBP snapshot is truncated")
+
+        magic, version, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("File is not a CBP snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported CBP snapshot version: {version}")
+
+        position = _HEADER.size
+        if position + _WATERMARK_HEADER.size > size:
+            raise ValueError("CBP snapshot is truncated")
+
+        (watermark_length,) = _WATERMARK_HEADER.unpack_from(data, position)
+        position += _WATERMARK_HEADER.size
+        if position + watermark_length > size:
+            raise ValueError("CBP snapshot is truncated")
+
+        updated_at = (
+            datetime.fromisoformat(
+                data[position : position + watermark_length].decode("utf-8")
+            )
+            if watermark_length > 0
+            else None
+        )
+        position += watermark_length
+
+        index: Dict[str, Tuple[int, int]] = {}
+        for _ in range(count):
+            if position + _INDEX_ENTRY.size > size:
+                raise ValueError("CBP snapshot index is truncated")
+
+            id_length, offset, length = _INDEX_ENTRY.unpack_from(data, position)
+            position += _INDEX_ENTRY.size
+            client_id = data[position : position + id_length].decode("utf-8")
+            position += id_length
+
+            if offset + length > size:
+                raise ValueError(f"CBP snapshot record '{client_id}' is truncated")
+
+            index[client_id] = (offset, length)
+
+        return updated_at, index
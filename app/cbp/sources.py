@@ -0,0 +1,46 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Sequence
+
+from .models import CbpClientChanges, CbpClientsResponse, CbpResponseValidators
+
+
+class CbpSource(ABC):
+    @abstractmethod
+    def get_clients(self, conditional: bool = False) -> CbpClientsResponse:
+        """
+        Returns all clients. When `conditional` is set, a source may raise
+        `CbpClientsNotModified` if the clients did not change since the validators
+        were last saved.
+        """
+
+    @abstractmethod
+    def get_changed_clients(self, since: datetime) -> CbpClientChanges:
+        """
+        Returns the clients that were created or updated at or after `since`, along
+        with the ids of clients that were deleted.
+        """
+
+    @abstractmethod
+    def get_clients_by_ids(self, client_ids: Sequence[str]) -> CbpClientChanges:
+        """
+        Returns the requested clients; requested clients that no longer exist are
+        returned as deleted.
+        """
+
+    def save_validators(self, validators: CbpResponseValidators) -> None:
+        """
+        Saves the validators of a response once its clients are cached. Sources
+        without conditional requests have no validators to save.
+        """
+
+
+class NoOpCbpSource(CbpSource):
+    def get_clients(self, conditional: bool = False) -> CbpClientsResponse:
+        return CbpClientsResponse()
+
+    def get_changed_clients(self, since: datetime) -> CbpClientChanges:
+        return CbpClientChanges()
+
+    def get_clients_by_ids(self, client_ids: Sequence[str]) -> CbpClientChanges:
+        return CbpClientChanges()
@@ -0,0 +1,174 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from threading import Lock
+from typing import ContextManager, Dict, Iterator, Sequence, Tuple
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+
+class CbpClientStore(ABC):
+    """
+    Storage of serialized CBP client records that is shared by all processes in a
+    cluster. Every write increments the store's generation number, so processes can
+    cheaply detect that their local copy of the clients is stale.
+    """
+
+    @abstractmethod
+    def get_generation(self) -> int:
+        pass
+
+    @abstractmethod
+    def load(self) -> Tuple[int, Dict[str, bytes]]:
+        """Returns the generation and the records of that generation."""
+
+    @abstractmethod
+    def replace(self, records: Dict[str, bytes]) -> int:
+        """Replaces all records and returns the new generation."""
+
+    @abstractmethod
+    def merge(
+        self, records: Dict[str, bytes], deleted_client_ids: Sequence[str]
+    ) -> int:
+        """Upserts and deletes records and returns the new generation."""
+
+    @abstractmethod
+    def lock(self) -> ContextManager[None]:
+        """
+        Context manager holding a lock that is exclusive across all processes sharing
+        the store. Raises `TimeoutError` if the lock cannot be acquired in time.
+        """
+
+
+class InMemoryCbpClientStore(CbpClientStore):
+    """
+    Store kept in memory, e.g. to stand in for Redis in tests; repositories sharing
+    an instance behave like processes sharing a Redis server.
+    """
+
+    def __init__(self, lock_blocking_timeout: float = -1) -> None:
+        self.__records: Dict[str, bytes] = {}
+        self.__generation = 0
+        self.__data_lock = Lock()
+        self.__lock = Lock()
+        self.__lock_blocking_timeout = lock_blocking_timeout
+
+    def get_generation(self) -> int:
+        return self.__generation
+
+    def load(self) -> Tuple[int, Dict[str, bytes]]:
+        with self.__data_lock:
+            return self.__generation, dict(self.__records)
+
+    def replace(self, records: Dict[str, bytes]) -> int:
+        with self.__data_lock:
+            self.__records = dict(records)
+            self.__generation += 1
+            return self.__generation
+
+    def merge(
+        self, records: Dict[str, bytes], deleted_client_ids: Sequence[str]
+    ) -> int:
+        with self.__data_lock:
+            self.__records.update(records)
+            for client_id in deleted_client_ids:
+                self.__records.pop(client_id, None)
+            self.__generation += 1
+            return self.__generation
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        if not self.__lock.acquire(timeout=self.__lock_blocking_timeout):
+            raise TimeoutError("Timed out acquiring the CBP client store lock")
+
+        try:
+            yield
+        finally:
+            self.__lock.release()
+
+
+class RedisCbpClientStore(CbpClientStore):
+    """
+    Store backed by a Redis hash of client records and a generation counter, which
+    are written in a single transaction.
+
+    The lock expires after `lock_timeout` seconds, so a process that dies while
+    holding it cannot block the other processes indefinitely. Redis errors are raised
+    as `ConnectionError`, like other I/O errors of the client repositories.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key_prefix: str,
+        lock_timeout: float,
+        lock_blocking_timeout: float,
+    ) -> None:
+        self.__redis = redis
+        self.__records_key = f"{key_prefix}:clients"
+        self.__generation_key = f"{key_prefix}:generation"
+        self.__lock_key = f"{key_prefix}:fetch-lock"
+        self.__lock_timeout = lock_timeout
+        self.__lock_blocking_timeout = lock_blocking_timeout
+
+    def get_generation(self) -> int:
+        with self.__translate_errors():
+            return int(self.__redis.get(self.__generation_key) or 0)
+
+    def load(self) -> Tuple[int, Dict[str, bytes]]:
+        with self.__translate_errors(), self.__redis.pipeline() as pipeline:
+            pipeline.get(self.__generation_key)
+            pipeline.hgetall(self.__records_key)
+            generation, records = pipeline.execute()
+
+        return int(generation or 0), {
+            client_id.decode("utf-8"): record for client_id, record in records.items()
+        }
+
+    def replace(self, records: Dict[str, bytes]) -> int:
+        with self.__translate_errors(), self.__redis.pipeline() as pipeline:
+            pipeline.delete(self.__records_key)
+            if records:
+                pipeline.hset(self.__records_key, mapping=records)
+            pipeline.incr(self.__generation_key)
+            return int(pipeline.execute()[-1])
+
+    def merge(
+        self, records: Dict[str, bytes], deleted_client_ids: Sequence[str]
+    ) -> int:
+        with self.__translate_errors(), self.__redis.pipeline() as pipeline:
+            if records:
+                pipeline.hset(self.__records_key, mapping=records)
+            if deleted_client_ids:
+                pipeline.hdel(self.__records_key, *deleted_client_ids)
+            pipeline.incr(self.__generation_key)
+            return int(pipeline.execute()[-1])
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        lock = self.__redis.lock(
+            self.__lock_key,
+            timeout=self.__lock_timeout,
+            blocking_timeout=self.__lock_blocking_timeout,
+        )
+        with self.__translate_errors():
+            acquired = lock.acquire()
+        if not acquired:
+            raise TimeoutError("Timed out acquiring the CBP client store lock")
+
+        try:
+            yield
+        finally:
+            try:
+                lock.release()
+            except RedisError:
+                # The lock expired, or expires on its own once Redis is reachable.
+                pass
+
+    @staticmethod
+    @contextmanager
+    def __translate_errors() -> Iterator[None]:
+        try:
+            yield
+        except RedisError as e:
+            raise ConnectionError(str(e)) from e
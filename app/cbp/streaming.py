@@ -0,0 +1,119 @@
+import codecs
+from json import JSONDecodeError, JSONDecoder
+from typing import Any, Iterable, Iterator, Tuple
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonArrayStreamReader:
+    """
+    Incrementally decodes the items of an array stored under a top-level key of a JSON
+    object, e.g. `{"clients": [{...}, {...}]}`.
+
+    Only the current chunk and the item being decoded are buffered, so memory usage
+    does not grow with the number of items in the array. Other top-level values are
+    decoded and discarded.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], key: str) -> None:
+        self.__chunks = iter(chunks)
+        self.__key = key
+        self.__decoder = JSONDecoder()
+        self.__text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.__buffer = ""
+        self.__position = 0
+        self.__exhausted = False
+
+    def __iter__(self) -> Iterator[Any]:
+        self.__expect("{")
+
+        while self.__peek() != "}":
+            key = self.__decode_value()
+            if not isinstance(key, str):
+                raise ValueError("Expected a string as object key")
+
+            self.__expect(":")
+
+            if key == self.__key:
+                yield from self.__iter_array()
+                return
+
+            self.__decode_value()
+            if self.__peek() != "}":
+                self.__expect(",")
+
+        raise ValueError(f"Missing '{self.__key}' property in JSON document")
+
+    def __iter_array(self) -> Iterator[Any]:
+        self.__expect("[")
+
+        if self.__peek() == "]":
+            return
+
+        while True:
+            yield self.__decode_value()
+
+            if self.__peek() == "]":
+                return
+
+            self.__expect(",")
+
+    def __decode_value(self) -> Any:
+        self.__peek()
+
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__position)
+            except JSONDecodeError:
+                if not self.__read():
+                    raise
+                continue
+
+            # A value ending exactly at the end of the buffer may be a truncated
+            # number or literal; only accept it once more data proves otherwise.
+            if end == len(self.__buffer) and self.__read():
+                continue
+
+            self.__position = end
+            return value
+
+    def __expect(self, character: str) -> None:
+        if self.__peek() != character:
+            raise ValueError(
+                f"Expected '{character}' at position {self.__position} of JSON stream"
+            )
+
+        self.__position += 1
+
+    def __peek(self) -> str:
+        while True:
+            while (
+                self.__position < len(self.__buffer)
+                and self.__buffer[self.__position] in _WHITESPACE
+            ):
+                self.__position += 1
+
+            if self.__position < len(self.__buffer):
+                return self.__buffer[self.__position]
+
+            if not self.__read():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def __read(self) -> bool:
+        if self.__exhausted:
+            return False
+
+        chunk, self.__exhausted = self.__next_chunk()
+        text = self.__text_decoder.decode(chunk, final=self.__exhausted)
+
+        # Drop everything that was already consumed before appending the new text.
+        self.__buffer = self.__buffer[self.__position :] + text
+        self.__position = 0
+
+        return text != "" or not self.__exhausted
+
+    def __next_chunk(self) -> Tuple[bytes, bool]:
+        try:
+            return next(self.__chunks), False
+        except StopIteration:
+            return b"", True
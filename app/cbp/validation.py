@@ -0,0 +1,43 @@
+from itertools import islice
+from logging import Logger
+from typing import Any, Iterable, List, Optional
+
+from .factories import CbpClientFactory
+from .models import CbpClient
+
+
+class CbpClientBatchValidator:
+    """
+    Validates CBP client data in batches. Invalid clients are skipped and reported,
+    so a single malformed client does not discard the other clients.
+    """
+
+    def __init__(self, logger: Logger) -> None:
+        self.__logger = logger
+
+    def validate(
+        self, clients_data: Iterable[Any], batch_size: Optional[int] = None
+    ) -> List[CbpClient]:
+        """
+        Validates the clients in passes of `batch_size` clients, or in a single pass
+        if no batch size is given.
+        """
+        clients: List[CbpClient] = []
+        items = iter(clients_data)
+        offset = 0
+
+        while batch := list(islice(items, batch_size)):
+            valid_clients, errors = CbpClientFactory.create_many(batch)
+            for index, error in errors.items():
+                client_data = batch[index]
+                self.__logger.warning(
+                    "Skipping invalid CBP client %s at index %d: %s",
+                    client_data.get("id") if isinstance(client_data, dict) else None,
+                    offset + index,
+                    error,
+                )
+
+            clients.extend(valid_clients)
+            offset += len(batch)
+
+        return clients
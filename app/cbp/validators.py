@@ -0,0 +1,39 @@
+from logging import Logger
+from os import path, replace
+from typing import Optional
+
+from .models import CbpResponseValidators
+
+
+class CbpResponseValidatorsFile:
+    """
+    Stores the validators of the last processed CBP clients response. Without a
+    filepath, nothing is stored and no validators are loaded.
+    """
+
+    def __init__(self, logger: Logger, filepath: Optional[str]) -> None:
+        self.__logger = logger
+        self.__filepath = filepath
+
+    def load(self) -> CbpResponseValidators:
+        if self.__filepath is None or not path.isfile(self.__filepath):
+            return CbpResponseValidators()
+
+        try:
+            with open(self.__filepath, "r", encoding="utf-8") as file:
+                return CbpResponseValidators.model_validate_json(file.read())
+        except (OSError, ValueError) as e:
+            self.__logger.warning("Ignoring unreadable CBP validators: %s", e)
+            return CbpResponseValidators()
+
+    def save(self, validators: CbpResponseValidators) -> None:
+        if self.__filepath is None:
+            return
+
+        temp_filepath = f"{self.__filepath}.tmp"
+        try:
+            with open(temp_filepath, "w", encoding="utf-8") as file:
+                file.write(validators.model_dump_json())
+            replace(temp_filepath, self.__filepath)
+        except OSError as e:
+            self.__logger.warning("Failed to store CBP validators: %s", e)
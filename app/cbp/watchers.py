@@ -0,0 +1,193 @@
+import asyncio
+import fcntl
+from logging import Logger
+from typing import IO, Optional
+
+from inject import autoparams
+
+from .directory_sources import DirectoryCbpSource
+from .exceptions import CbpFetchError
+from .notifications import CbpClientNotificationChannel
+from .repositories import CbpClientRepository
+from .schedulers import CbpClientSyncScheduler
+
+
+class CbpClientCacheWatcher:
+    """
+    Polls the client repository for changes made by other workers, so a single
+    fetch from CBP refreshes the clients in every worker sharing the repository.
+    """
+
+    @autoparams("logger", "client_repository")
+    def __init__(
+        self,
+        logger: Logger,
+        client_repository: CbpClientRepository,
+        interval_seconds: float,
+    ) -> None:
+        self.__logger = logger
+        self.__client_repository = client_repository
+        self.__interval_seconds = interval_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.__interval_seconds > 0
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.__interval_seconds)
+            await asyncio.to_thread(self.poll)
+
+    def poll(self) -> None:
+        try:
+            if self.__client_repository.reload_if_changed():
+                self.__logger.info("Reloaded CBP clients changed by another worker")
+        except (OSError, ValueError) as e:
+            self.__logger.exception("Failed to reload CBP clients", exc_info=e)
+
+
+class CbpClientNotificationListener:
+    """
+    Reloads the client repository as soon as another process publishes a new
+    generation of the clients, e.g. after CBP called the webhook on another node.
+    Generations missed while the channel is unavailable are picked up by the
+    `CbpClientCacheWatcher`.
+    """
+
+    @autoparams("logger", "client_repository", "notification_channel")
+    def __init__(
+        self,
+        logger: Logger,
+        client_repository: CbpClientRepository,
+        notification_channel: CbpClientNotificationChannel,
+        enabled: bool,
+        receive_timeout_seconds: float = 1.0,
+        retry_interval_seconds: float = 5.0,
+    ) -> None:
+        self.__logger = logger
+        self.__client_repository = client_repository
+        self.__notification_channel = notification_channel
+        self.__enabled = enabled
+        self.__receive_timeout_seconds = receive_timeout_seconds
+        self.__retry_interval_seconds = retry_interval_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    async def run(self) -> None:
+        while True:
+            if not await asyncio.to_thread(self.receive):
+                await asyncio.sleep(self.__retry_interval_seconds)
+
+    def receive(self) -> bool:
+        """Handles at most one notification; returns False if the channel failed."""
+        try:
+            generation = self.__notification_channel.receive(
+                self.__receive_timeout_seconds
+            )
+        except OSError as e:
+            self.__logger.warning("Failed to receive CBP client notifications: %s", e)
+            return False
+
+        if (
+            generation is None
+            or generation == self.__client_repository.get_generation().generation
+        ):
+            return True
+
+        try:
+            if self.__client_repository.reload_if_changed():
+                self.__logger.info(
+                    "Reloaded CBP clients generation %d published by another worker",
+                    generation,
+                )
+        except (OSError, ValueError) as e:
+            self.__logger.exception("Failed to reload CBP clients", exc_info=e)
+
+        return True
+
+
+class CbpClientSourceWatcher:
+    """
+    Polls a `DirectoryCbpSource` for changed client files and syncs only the clients
+    in those files, through the sync scheduler so the sync is merged with any other
+    sync that is running.
+
+    Only the worker holding the file lock at `lock_filepath` polls, so a changed file
+    is synced once rather than once per worker; the other workers reload the synced
+    clients from the cache. Another worker takes over once the polling worker exits.
+    """
+
+    @autoparams("logger", "sync_scheduler")
+    def __init__(
+        self,
+        logger: Logger,
+        sync_scheduler: CbpClientSyncScheduler,
+        source: Optional[DirectoryCbpSource],
+        interval_seconds: float,
+        lock_filepath: Optional[str] = None,
+    ) -> None:
+        self.__logger = logger
+        self.__sync_scheduler = sync_scheduler
+        self.__source = source
+        self.__interval_seconds = interval_seconds
+        self.__lock_filepath = lock_filepath
+        self.__lock_file: Optional[IO[str]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.__source is not None and self.__interval_seconds > 0
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.__interval_seconds)
+                await asyncio.to_thread(self.poll)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Releases the lock, so the watcher in another worker takes over."""
+        if self.__lock_file is not None:
+            self.__lock_file.close()
+            self.__lock_file = None
+
+    def poll(self) -> None:
+        if self.__source is None or not self.__acquire_lock():
+            return
+
+        try:
+            update = self.__source.poll()
+        except CbpFetchError as e:
+            self.__logger.warning("Failed to poll CBP client files: %s", e)
+            return
+
+        if not update.is_targeted:
+            return
+
+        self.__logger.info(
+            "Syncing %d changed and %d removed CBP client files",
+            len(update.clients),
+            len(update.deleted_client_ids),
+        )
+        if self.__sync_scheduler.request(update):
+            self.__sync_scheduler.run()
+
+    def __acquire_lock(self) -> bool:
+        if self.__lock_filepath is None or self.__lock_file is not None:
+            return True
+
+        # Held until the worker exits, so the file stays open outside of `with`.
+        lock_file = open(  # pylint: disable=consider-using-with
+            self.__lock_filepath, "a", encoding="utf-8"
+        )
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        self.__logger.info("Watching CBP client files in this worker")
+        self.__lock_file = lock_file
+        return True
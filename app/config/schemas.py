@@ -1,4 +1,6 @@
 from enum import Enum
+from importlib.util import find_spec
+from os import path
 from typing import Literal
 
 from pydantic import (
@@ -24,6 +26,12 @@ class PrsRepositoryType(str, Enum):
 class CbpSourceType(str, Enum):
     HTTP = "http"
     NOOP = "no-op"
+    DIRECTORY = "directory"
+
+
+class CbpCacheType(str, Enum):
+    FILE = "file"
+    REDIS = "redis"
 
 
 class UvicornConfig(BaseModel):
@@ -38,10 +46,21 @@ class UvicornConfig(BaseModel):
     reload_includes: str | None = Field(default=None)
 
 
-class PrsConfig(BaseModel):
+class ResilienceConfig(BaseModel):
+    retry_attempts: int = Field(default=1)
+    retry_delay: float = Field(default=0.1)
+    retry_max_delay: float = Field(default=1.0)
+    retry_budget_ratio: float = Field(default=0.2)
+    retry_budget_min_per_second: float = Field(default=1.0)
+    circuit_failure_threshold: int = Field(default=5)
+    circuit_reset_timeout: float = Field(default=30.0)
+
+
+class PrsConfig(ResilienceConfig):
     prs_repository: PrsRepositoryType
     repo_base_url: str | None = Field(default=None)
     organisation_id: str
+    timeout: float = Field(default=5.0)
 
     @model_validator(mode="after")
     def validate_repo_base_url_required(self) -> "PrsConfig":
@@ -50,28 +69,71 @@ class PrsConfig(BaseModel):
         return self
 
 
-class BrpConfig(BaseModel):
+class BrpConfig(ResilienceConfig):
     mock_brp: bool = Field(default=False)
     base_url: str | None = Field(default=None)
     api_key: str | None = Field(default=None)
+    timeout: float = Field(default=5.0)
+    connect_timeout: float = Field(default=5.0)
+    max_connections: int = Field(default=20)
+    max_keepalive_connections: int = Field(default=10)
+    keepalive_expiry: float = Field(default=30.0)
+    http2: bool = Field(default=False)
+    cache_ttl: float = Field(default=0.0)
+    cache_negative_ttl: float = Field(default=30.0)
+    cache_max_size: int = Field(default=10000)
+    batch_window: float = Field(default=0.0)
+    batch_max_size: int = Field(default=20)
+    hedging: bool = Field(default=False)
+    hedge_percentile: float = Field(default=95.0)
+    hedge_min_delay: float = Field(default=0.05)
+    hedge_max_ratio: float = Field(default=0.05)
+
+    @field_validator("http2")
+    @classmethod
+    def validate_http2_supported(cls, http2: bool) -> bool:
+        # httpx only imports `h2` once the first request is sent.
+        if http2 and find_spec("h2") is None:
+            raise ValueError("http2 requires the 'h2' package (httpx[http2])")
+        return http2
 
 
 class CbpConfig(BaseModel):
     clients_sync_request_limit: str = Field(default="10/second")
+    clients_sync_incremental: bool = Field(default=False)
+    clients_sync_debounce: float = Field(default=0)
+    clients_sync_retry_attempts: int = Field(default=5)
+    clients_sync_retry_delay: float = Field(default=1.0)
+    clients_sync_retry_max_delay: float = Field(default=60.0)
 
 
-class CbpHttpClientConfig(BaseModel):
+class CbpHttpClientConfig(ResilienceConfig):
     type: Literal[CbpSourceType.HTTP] = Field(default=CbpSourceType.HTTP)
     base_url: str
     timeout: int = Field(default=30)
+    streaming: bool = Field(default=False)
+    page_size: int = Field(default=0)
+    max_concurrent_pages: int = Field(default=4)
 
 
 class NoOpCbpSourceConfig(BaseModel):
     type: Literal[CbpSourceType.NOOP] = Field(default=CbpSourceType.NOOP)
 
 
+class DirectoryCbpSourceConfig(BaseModel):
+    type: Literal[CbpSourceType.DIRECTORY] = Field(default=CbpSourceType.DIRECTORY)
+    path: str
+    poll_interval: float = Field(default=1.0)
+
+
 class CbpFileCacheConfig(BaseModel):
+    type: CbpCacheType = Field(default=CbpCacheType.FILE)
     filepath: str
+    lazy_load: bool = Field(default=False)
+    reload_interval: float = Field(default=2.0)
+    redis_key_prefix: str = Field(default="vad:cbp")
+    fetch_lock_timeout: float = Field(default=300.0)
+    fetch_lock_blocking_timeout: float = Field(default=120.0)
 
     @model_validator(mode="after")
     def validate_filepath(self) -> "CbpFileCacheConfig":
@@ -80,6 +142,21 @@ class CbpFileCacheConfig(BaseModel):
 
         return self
 
+    @property
+    def snapshot_filepath(self) -> str:
+        """
+        Where the clients snapshot is written. Never a `.json` file: versions before
+        the snapshot format read the cache as JSON, so a rollback would fail on it.
+        """
+        root, extension = path.splitext(self.filepath)
+        return f"{root}.snap" if extension == ".json" else self.filepath
+
+    @property
+    def legacy_filepath(self) -> str:
+        """The JSON cache of versions before the snapshot format, to migrate from."""
+        root, _ = path.splitext(self.filepath)
+        return f"{root}.json"
+
 
 class SwaggerConfig(BaseModel):
     enabled: bool = Field(default=False)
@@ -105,6 +182,8 @@ class VadConfig(CoreConfig):
     prs: PrsConfig
     brp: BrpConfig
     cbp: CbpConfig = Field(default_factory=CbpConfig)
-    cbp_source: CbpHttpClientConfig | NoOpCbpSourceConfig = Field(discriminator="type")
+    cbp_source: CbpHttpClientConfig | NoOpCbpSourceConfig | DirectoryCbpSourceConfig = (
+        Field(discriminator="type")
+    )
     cbp_cache: CbpFileCacheConfig
     swagger: SwaggerConfig = Field(default_factory=SwaggerConfig)
@@ -2,6 +2,7 @@ import httpx
 from inject import Binder
 
 from app.config.schemas import PrsConfig, PrsRepositoryType
+from app.resilience import create_resilient_caller
 
 from .repositories import ApiPrsRepository, MockPrsRepository, PrsRepository
 
@@ -23,7 +24,8 @@ class PrsBindings:
                     # Pydantic validates this
                     repo_base_url=self.__prs_config.repo_base_url,  # type: ignore
                     organisation_id=self.__prs_config.organisation_id,
-                    client=httpx.Client(),
+                    client=httpx.Client(timeout=self.__prs_config.timeout),
+                    resilient_caller=create_resilient_caller("PRS", self.__prs_config),
                 ),
             )
         else:
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
 from hashlib import sha256
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from httpx import Client, HTTPStatusError, RequestError
+from httpx import Client, HTTPStatusError, RequestError, TransportError
+
+from app.resilience import CircuitOpenError, ResilientCaller
 
 from .schemas import GetVadPdnResponse
 
@@ -29,15 +31,22 @@ class MockPrsRepository(PrsRepository):
 
 class ApiPrsRepository(PrsRepository):
     def __init__(
-        self, client: Client, repo_base_url: str, organisation_id: str
+        self,
+        client: Client,
+        repo_base_url: str,
+        organisation_id: str,
+        resilient_caller: Optional[ResilientCaller] = None,
     ) -> None:
         self.__client = client
         self.__repo_base_url = repo_base_url
         self.__organisation_id = organisation_id
+        self.__resilient_caller = resilient_caller or ResilientCaller("PRS")
 
     def __handle_request(self, url: str) -> Dict[str, Any]:
         try:
-            response = self.__client.post(url)
+            response = self.__resilient_caller.call(
+                lambda: self.__client.post(url), transient_errors=(TransportError,)
+            )
             response.raise_for_status()
 
             return response.json() or {}
@@ -46,7 +55,7 @@ class ApiPrsRepository(PrsRepository):
             raise RuntimeError(
                 f"HTTP error occurred: {e.response.status_code} - {e.response.text}"
             ) from e
-        except RequestError as e:
+        except (RequestError, CircuitOpenError) as e:
             raise RuntimeError(f"Request error occurred: {str(e)}") from e
         except Exception as e:
             raise RuntimeError(f"An unexpected error occurred: {str(e)}") from e
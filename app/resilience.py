@@ -0,0 +1,288 @@
+import random
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from time import monotonic, sleep
+from typing import (
+    Callable,
+    Deque,
+    Mapping,
+    Optional,
+    Protocol,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from app.config.schemas import ResilienceConfig
+
+# Responses that are worth retrying; only the 5xx ones count as a failure of the
+# dependency, as a 429 means it is protecting itself rather than failing.
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+class _Response(Protocol):
+    @property
+    def status_code(self) -> int: ...
+
+    @property
+    def headers(self) -> Mapping[str, str]: ...
+
+    def close(self) -> None: ...
+
+
+R = TypeVar("R", bound=_Response)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling a dependency while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency after `failure_threshold` consecutive failures, so
+    callers fail fast instead of each waiting for a timeout. After
+    `reset_timeout_seconds` a single trial call is let through: the circuit closes
+    again if it succeeds and stays open for another period if it fails.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_seconds: float) -> None:
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout_seconds = reset_timeout_seconds
+        self.__lock = Lock()
+        self.__failures = 0
+        self.__opened_at: Optional[float] = None
+        self.__trial_in_progress = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.__opened_at is not None
+
+    def allow_request(self) -> bool:
+        with self.__lock:
+            if self.__opened_at is None:
+                return True
+
+            if (
+                self.__trial_in_progress
+                or monotonic() - self.__opened_at < self.__reset_timeout_seconds
+            ):
+                return False
+
+            self.__trial_in_progress = True
+            return True
+
+    def record_success(self) -> None:
+        with self.__lock:
+            self.__failures = 0
+            self.__opened_at = None
+            self.__trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self.__lock:
+            self.__failures += 1
+            if (
+                self.__trial_in_progress
+                or 0 < self.__failure_threshold <= self.__failures
+            ):
+                self.__opened_at = monotonic()
+            self.__trial_in_progress = False
+
+
+class RetryBudget:
+    """
+    Limits the retries within the last `window_seconds` to `ratio` of the requests
+    in that window, plus `min_retries_per_second`, so retries cannot multiply the
+    load on a dependency that is already struggling.
+    """
+
+    def __init__(
+        self, ratio: float, min_retries_per_second: float, window_seconds: float = 10
+    ) -> None:
+        self.__ratio = ratio
+        self.__min_retries = min_retries_per_second * window_seconds
+        self.__window_seconds = window_seconds
+        self.__lock = Lock()
+        self.__requests: Deque[float] = deque()
+        self.__retries: Deque[float] = deque()
+
+    def record_request(self) -> None:
+        with self.__lock:
+            self.__requests.append(self.__prune())
+
+    def try_spend(self) -> bool:
+        with self.__lock:
+            now = self.__prune()
+            if len(self.__retries) >= self.__min_retries + self.__ratio * len(
+                self.__requests
+            ):
+                return False
+
+            self.__retries.append(now)
+            return True
+
+    def __prune(self) -> float:
+        now = monotonic()
+        for timestamps in (self.__requests, self.__retries):
+            while timestamps and timestamps[0] <= now - self.__window_seconds:
+                timestamps.popleft()
+
+        return now
+
+
+class RetryPolicy:
+    """
+    Retries a call at most `attempts` times, waiting a random delay of up to
+    `delay_seconds` doubled per retry and capped at `max_delay_seconds`. A
+    `Retry-After` from the dependency is respected, but a call is not retried if
+    that would mean waiting longer than `max_delay_seconds`.
+    """
+
+    def __init__(
+        self, attempts: int, delay_seconds: float, max_delay_seconds: float
+    ) -> None:
+        self.__attempts = max(attempts, 0)
+        self.__delay_seconds = delay_seconds
+        self.__max_delay_seconds = max_delay_seconds
+
+    @property
+    def attempts(self) -> int:
+        return self.__attempts
+
+    def get_delay(self, retry: int, retry_after: Optional[float]) -> Optional[float]:
+        """Returns the seconds to wait before the given retry, or `None` to give up."""
+        if retry > self.__attempts:
+            return None
+
+        if retry_after is not None:
+            return retry_after if retry_after <= self.__max_delay_seconds else None
+
+        backoff = min(self.__delay_seconds * 2 ** (retry - 1), self.__max_delay_seconds)
+        return random.uniform(
+            0, backoff
+        )  # nosec B311 as jitter is not security related
+
+
+class ResilientCaller:
+    """
+    Calls a dependency through its circuit breaker, retrying connection errors and
+    retryable responses within the retry policy and budget. Without retries and a
+    breaker, calls are passed through as they are.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.__name = name
+        self.__retry_policy = retry_policy or RetryPolicy(0, 0, 0)
+        self.__retry_budget = retry_budget
+        self.__circuit_breaker = circuit_breaker
+
+    def call(
+        self, send: Callable[[], R], transient_errors: Tuple[Type[Exception], ...]
+    ) -> R:
+        """
+        Returns the response of `send`; the last response is returned if it is still
+        retryable once the retries are exhausted. Raises `CircuitOpenError` without
+        calling `send` while the circuit breaker is open.
+        """
+        if self.__retry_policy.attempts == 0 and self.__circuit_breaker is None:
+            return send()
+
+        if self.__retry_budget is not None:
+            self.__retry_budget.record_request()
+
+        retry = 0
+        while True:
+            if (
+                self.__circuit_breaker is not None
+                and not self.__circuit_breaker.allow_request()
+            ):
+                raise CircuitOpenError(f"Circuit breaker for {self.__name} is open")
+
+            retry += 1
+            try:
+                response = send()
+            except transient_errors:
+                self.__record(failed=True)
+                if not self.__wait_before_retry(retry, None):
+                    raise
+                continue
+            except BaseException:
+                # Not retried, but still recorded, so a trial call cannot leave the
+                # circuit breaker waiting for its outcome forever.
+                self.__record(failed=True)
+                raise
+
+            self.__record(failed=response.status_code >= 500)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                return response
+
+            if not self.__wait_before_retry(retry, get_retry_after(response.headers)):
+                return response
+            response.close()
+
+    def __record(self, failed: bool) -> None:
+        if self.__circuit_breaker is None:
+            return
+
+        if failed:
+            self.__circuit_breaker.record_failure()
+        else:
+            self.__circuit_breaker.record_success()
+
+    def __wait_before_retry(self, retry: int, retry_after: Optional[float]) -> bool:
+        delay = self.__retry_policy.get_delay(retry, retry_after)
+        if delay is None:
+            return False
+
+        if self.__retry_budget is not None and not self.__retry_budget.try_spend():
+            return False
+
+        sleep(delay)
+        return True
+
+
+def get_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Parses a `Retry-After` header given in seconds or as an HTTP date."""
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def create_resilient_caller(name: str, config: ResilienceConfig) -> ResilientCaller:
+    return ResilientCaller(
+        name,
+        retry_policy=RetryPolicy(
+            config.retry_attempts, config.retry_delay, config.retry_max_delay
+        ),
+        retry_budget=RetryBudget(
+            config.retry_budget_ratio, config.retry_budget_min_per_second
+        ),
+        circuit_breaker=(
+            CircuitBreaker(
+                config.circuit_failure_threshold, config.circuit_reset_timeout
+            )
+            if config.circuit_failure_threshold > 0
+            else None
+        ),
+    )
@@ -0,0 +1,175 @@
+"""
+Benchmarks the stages of synchronising CBP clients against a local fake CBP server.
+
+Every size runs in fresh processes, once for wall time and peak RSS and once for
+allocations, so the stages of one size do not affect the measurements of another:
+
+    poetry run python -m benchmarks.cbp_sync --sizes 1000 10000 100000
+"""
+
+import json
+import logging
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.cbp.filesystem_repositories import FilesystemCbpClientRepository
+from app.cbp.http_sources import CbpHttpClient
+from app.cbp.services import CbpClientFetcher
+
+from .fake_cbp import FakeCbpServer, generate_clients
+from .measurements import StageRecorder
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def run_stages(arguments: Namespace) -> List[Dict[str, Any]]:
+    logger = logging.getLogger("benchmarks.cbp_sync")
+    recorder = StageRecorder(trace_allocations=arguments.trace_allocations)
+
+    with FakeCbpServer(generate_clients(arguments.size, arguments.seed)) as server:
+        if arguments.page_size:
+            server.prepare_pages(arguments.page_size)
+
+        source = CbpHttpClient(
+            logger=logger,
+            base_url=server.base_url,
+            streaming=arguments.streaming,
+            page_size=arguments.page_size,
+        )
+
+        with recorder.stage("http.get_clients"):
+            clients = source.get_clients().clients
+
+        with TemporaryDirectory(prefix="cbp-benchmark-") as directory:
+            filepath = path.join(directory, "clients.snap")
+            repository = FilesystemCbpClientRepository(filepath)
+            fetcher = CbpClientFetcher(
+                logger=logger,
+                cached_cbp_client_repository=repository,
+                cbp_source=source,
+            )
+
+            with recorder.stage("fetcher.fetch"):
+                fetcher.fetch(use_cache=False)
+
+            with recorder.stage("repository.update_unchanged"):
+                repository.update(clients)
+
+            with recorder.stage("repository.load"):
+                loaded_repository = FilesystemCbpClientRepository(filepath)
+
+            with recorder.stage("repository.load_lazy"):
+                lazy_repository = FilesystemCbpClientRepository(filepath, lazy=True)
+
+            with recorder.stage("mapping.rebuild"):
+                _materialize_mapping(loaded_repository)
+
+            with recorder.stage("mapping.rebuild_lazy"):
+                _materialize_mapping(lazy_repository)
+
+    return [measurement.as_dict() for measurement in recorder.measurements]
+
+
+def _materialize_mapping(repository: FilesystemCbpClientRepository) -> None:
+    """Dumps every client, like PyOP looking up all clients of a fresh worker."""
+    mapping = repository.clients_as_mapping
+    for client_id in mapping:
+        _ = mapping[client_id]
+
+
+def run_size(arguments: Namespace, size: int) -> List[Dict[str, Any]]:
+    measurements: Dict[str, Dict[str, Any]] = {}
+    for trace_allocations in (False, True):
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.cbp_sync",
+            "--worker",
+            "--size",
+            str(size),
+            "--seed",
+            str(arguments.seed),
+            "--page-size",
+            str(arguments.page_size),
+        ]
+        if arguments.streaming:
+            command.append("--streaming")
+        if trace_allocations:
+            command.append("--trace-allocations")
+
+        output = subprocess.run(  # nosec B603
+            command, check=True, capture_output=True, text=True
+        ).stdout
+        for measurement in json.loads(output):
+            stage = measurements.setdefault(measurement["stage"], {"size": size})
+            stage.update({k: v for k, v in measurement.items() if v is not None})
+
+    return list(measurements.values())
+
+
+def print_table(results: Sequence[Dict[str, Any]]) -> None:
+    columns = [
+        ("size", "clients", "{:d}"),
+        ("stage", "stage", "{}"),
+        ("wall_seconds", "wall (s)", "{:.3f}"),
+        ("peak_rss_bytes", "peak RSS (MiB)", "{:.1f}"),
+        ("allocated_peak_bytes", "alloc peak (MiB)", "{:.1f}"),
+        ("allocated_retained_bytes", "alloc retained (MiB)", "{:.1f}"),
+    ]
+    rows = [[title for _, title, _ in columns]]
+    for result in results:
+        row = []
+        for key, _, template in columns:
+            value = result.get(key)
+            if key.endswith("_bytes") and value is not None:
+                value /= 1024 * 1024
+            row.append("-" if value is None else template.format(value))
+        rows.append(row)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> Namespace:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=0,
+        help="request the clients in pages of this size; 0 requests a single page",
+    )
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--worker", action="store_true", help="internal")
+    parser.add_argument("--size", type=int, help="internal")
+    parser.add_argument("--trace-allocations", action="store_true", help="internal")
+
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    arguments = parse_arguments()
+    if arguments.worker:
+        logging.basicConfig(level=logging.ERROR)
+        print(json.dumps(run_stages(arguments)))
+        return
+
+    results = [
+        result for size in arguments.sizes for result in run_size(arguments, size)
+    ]
+    print_table(results)
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Type
+from urllib.parse import parse_qs, urlsplit
+
+LOGIN_METHODS = ["digid", "digid_mock", "eherkenning", "yivi"]
+
+
+def generate_clients(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generates `count` client documents shaped like the CBP response. The same seed
+    always generates the same clients, so runs can be compared with each other.
+    """
+    rng = random.Random(seed)
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    clients = []
+
+    for index in range(count):
+        created_at = epoch + timedelta(minutes=rng.randrange(500_000))
+        login_methods = rng.sample(LOGIN_METHODS, rng.randint(1, 3))
+        clients.append(
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "name": f"Benchmark client {index}",
+                "redirect_uris": [
+                    f"https://client-{index}.example.com/callback",
+                    f"https://client-{index}.example.com/silent-callback",
+                ],
+                "response_types": ["code"],
+                "token_endpoint_auth_method": "none",
+                "client_authentication_method": "none",
+                "login_methods": login_methods,
+                "exclude_login_methods": [],
+                "client_secret": None,
+                "active": rng.random() > 0.05,
+                "created_at": created_at.isoformat(),
+                "updated_at": (
+                    created_at + timedelta(minutes=rng.randrange(100_000))
+                ).isoformat(),
+            }
+        )
+
+    return clients
+
+
+class FakeCbpServer:
+    """
+    Serves generated clients on `GET /clients` from a local HTTP server, with the
+    same `page`/`page_size` pagination as CBP. Response bodies are encoded once up
+    front, so the server adds as little as possible to the measurements.
+    """
+
+    def __init__(self, clients: List[Dict[str, Any]]) -> None:
+        self.__clients = clients
+        self.__bodies: Dict[Optional[int], Dict[int, bytes]] = {
+            None: {1: json.dumps({"clients": clients}).encode("utf-8")}
+        }
+        self.__server = ThreadingHTTPServer(("127.0.0.1", 0), self.__handler())
+        self.__server.daemon_threads = True
+        self.__thread = Thread(
+            target=self.__server.serve_forever, name="fake-cbp", daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def prepare_pages(self, page_size: int) -> None:
+        total_pages = max(-(-len(self.__clients) // page_size), 1)
+        self.__bodies[page_size] = {
+            page: json.dumps(
+                {
+                    "clients": self.__clients[
+                        (page - 1) * page_size : page * page_size
+                    ],
+                    "total_pages": total_pages,
+                }
+            ).encode("utf-8")
+            for page in range(1, total_pages + 1)
+        }
+
+    def __enter__(self) -> "FakeCbpServer":
+        self.__thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+
+    def __body(self, page: int, page_size: Optional[int]) -> Optional[bytes]:
+        if page_size is not None and page_size not in self.__bodies:
+            self.prepare_pages(page_size)
+
+        return self.__bodies[page_size].get(page)
+
+    def __handler(self) -> Type[BaseHTTPRequestHandler]:
+        get_body = self.__body
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                page_size = int(query["page_size"][0]) if "page_size" in query else None
+                body = (
+                    get_body(int(query.get("page", ["1"])[0]), page_size)
+                    if url.path == "/clients"
+                    else None
+                )
+
+                if body is None:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                    return
+
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,84 @@
+import gc
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class StageMeasurement:
+    stage: str
+    wall_seconds: Optional[float] = None
+    peak_rss_bytes: Optional[int] = None
+    allocated_peak_bytes: Optional[int] = None
+    allocated_retained_bytes: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class StageRecorder:
+    """
+    Measures a sequence of stages in one process, either their wall time and peak
+    RSS, or their Python allocations through `tracemalloc`. The two are recorded in
+    separate runs, as tracing allocations slows the stages down considerably.
+    """
+
+    def __init__(self, trace_allocations: bool) -> None:
+        self.__trace_allocations = trace_allocations
+        self.measurements: List[StageMeasurement] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        measurement = StageMeasurement(name)
+        gc.collect()
+
+        if self.__trace_allocations:
+            tracemalloc.start()
+            before, _ = tracemalloc.get_traced_memory()
+            try:
+                yield
+            finally:
+                retained, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            measurement.allocated_peak_bytes = peak - before
+            measurement.allocated_retained_bytes = retained - before
+        else:
+            reset_peak_rss()
+            started_at = time.perf_counter()
+            yield
+            measurement.wall_seconds = time.perf_counter() - started_at
+            measurement.peak_rss_bytes = get_peak_rss_bytes()
+
+        self.measurements.append(measurement)
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak RSS of this process, so it can be measured per stage. Only
+    supported on Linux; elsewhere the peak covers the whole process so far.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as file:
+            file.write("5")
+    except OSError:
+        return False
+
+    return True
+
+
+def get_peak_rss_bytes() -> int:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
@@ -1,5 +1,7 @@
 import json
+import time
 from pathlib import Path
+from typing import Callable
 
 from fastapi.testclient import TestClient
 from faker import Faker
@@ -7,6 +9,7 @@ from pytest_mock import MockerFixture, MockType
 from requests import Response
 
 from app.application import create_app
+from app.cbp.snapshots import CbpClientSnapshot
 from app.config.schemas import CbpFileCacheConfig, CbpHttpClientConfig, VadConfig
 from tests.utils import configure_bindings
 
@@ -28,6 +31,22 @@ def _set_mock_response(
         for _ in range(count)
     ]
     response.json.return_value = {"clients": clients}
+    response.content = json.dumps({"clients": clients}).encode("utf-8")
+
+
+def _wait_until(condition: Callable[[], bool], timeout_seconds: float = 5) -> None:
+    deadline = time.monotonic() + timeout_seconds
+    while not condition():
+        assert time.monotonic() < deadline, "Condition not met before timeout"
+        time.sleep(0.01)
+
+
+def _count_cached_clients(filepath: Path) -> int:
+    if not filepath.is_file():
+        return 0
+
+    with CbpClientSnapshot.open(str(filepath)) as snapshot:
+        return len(snapshot)
 
 
 def test_clients_update_triggers_async_fetch_from_source(
@@ -36,8 +55,12 @@ def test_clients_update_triggers_async_fetch_from_source(
     tmp_path: Path,
     config: VadConfig,
 ) -> None:
-    response = mocker.Mock(spec=Response)
-    mocker.patch("app.cbp.services.requests.get", return_value=response, autospec=True)
+    response = mocker.Mock(spec=Response, status_code=200, headers={})
+    mocker.patch(
+        "app.cbp.http_sources.requests.Session.get",
+        return_value=response,
+        autospec=True,
+    )
     cbp_clients_cache_filepath = tmp_path.joinpath("cbp_clients.json")
 
     config.cbp_source = CbpHttpClientConfig(base_url="http://cbp.source")
@@ -48,19 +71,14 @@ def test_clients_update_triggers_async_fetch_from_source(
     _set_mock_response(response, 3, faker)
 
     with TestClient(create_app(config)) as test_client:
-        with cbp_clients_cache_filepath.open("r", encoding="utf-8") as cache_file:
-            cached_clients = json.load(cache_file)
-
-        # Verify that on application boot 3 clients were fetched from the source and cached
-        assert len(cached_clients) == 3
+        # Verify that after application boot 3 clients were fetched from the source and cached
+        _wait_until(lambda: test_client.get("/ready").status_code == 200)
+        assert _count_cached_clients(cbp_clients_cache_filepath) == 3
 
         _set_mock_response(response, 5, faker)
         response = test_client.post("/api/v1/clients-updated")
 
         assert response.status_code == 202
 
-        with cbp_clients_cache_filepath.open("r", encoding="utf-8") as cache_file:
-            cached_clients = json.load(cache_file)
-
         # Verify that upon invoking the webhook 5 clients were fetched from the source and cached
-        assert len(cached_clients) == 5
+        _wait_until(lambda: _count_cached_clients(cbp_clients_cache_filepath) == 5)
@@ -4,6 +4,7 @@ from pytest_mock import MockerFixture
 from slowapi import Limiter
 
 from app.application import create_app
+from app.cbp.models import CbpClientsUpdate
 from app.cbp.services import CbpClientFetcher
 from app.config.schemas import VadConfig
 from tests.utils import configure_bindings
@@ -33,3 +34,32 @@ def test_rate_limit_exceeded(config: VadConfig, mocker: MockerFixture):
     response = test_client.post("/api/v1/clients-updated")
     assert response.status_code == 429
     assert "Too many requests" in response.text
+
+
+def test_clients_updated_syncs_only_clients_in_body(
+    config: VadConfig, mocker: MockerFixture
+):
+    cbp_client_fetcher = mocker.Mock(spec=CbpClientFetcher)
+
+    def override_bindings(binder: Binder) -> None:
+        binder.bind_to_constructor(CbpClientFetcher, lambda: cbp_client_fetcher)
+
+    configure_bindings(config, override_bindings)
+
+    test_client = TestClient(create_app(config))
+
+    response = test_client.post(
+        "/api/v1/clients-updated",
+        json={
+            "client_ids": ["changed"],
+            "deleted_client_ids": ["deleted"],
+            "clients": [{"id": "included", "active": True}],
+        },
+    )
+
+    assert response.status_code == 202
+    cbp_client_fetcher.fetch.assert_not_called()
+    # The webhook is not authenticated, so every named client is fetched from CBP.
+    cbp_client_fetcher.fetch_update.assert_called_once_with(
+        CbpClientsUpdate(client_ids=["changed", "deleted", "included"])
+    )
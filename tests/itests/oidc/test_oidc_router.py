@@ -84,9 +84,11 @@ def test_authorize_with_client_added_after_update_succeeds(
     config.cbp_source = CbpHttpClientConfig(base_url="http://cbp.source")
     config.cbp_cache = CbpFileCacheConfig(filepath=str(clients_cache_file))
 
-    cbp_clients_response_mock = mocker.Mock(spec=Response)
+    cbp_clients_response_mock = mocker.Mock(
+        spec=Response, status_code=200, headers={}, content=b""
+    )
     mocker.patch(
-        "app.cbp.services.requests.get",
+        "app.cbp.http_sources.requests.Session.get",
         return_value=cbp_clients_response_mock,
         autospec=True,
     )
@@ -149,9 +151,11 @@ def test_authorize_with_client_deleted_after_update_fails(
     config.cbp_source = CbpHttpClientConfig(base_url="http://cbp.source")
     config.cbp_cache = CbpFileCacheConfig(filepath=str(clients_cache_file))
 
-    cbp_clients_response_mock = mocker.Mock(spec=Response)
+    cbp_clients_response_mock = mocker.Mock(
+        spec=Response, status_code=200, headers={}, content=b""
+    )
     mocker.patch(
-        "app.cbp.services.requests.get",
+        "app.cbp.http_sources.requests.Session.get",
         return_value=cbp_clients_response_mock,
         autospec=True,
     )
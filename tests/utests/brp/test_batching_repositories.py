@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from typing import List, Sequence
+
+import pytest
+from pytest_mock import MockerFixture
+
+from app.brp.batching_repositories import BatchingBrpRepository
+from app.brp.exceptions import BrpHttpRequestException, BrpHttpResponseException
+from app.brp.repositories import BrpRepository
+from app.brp.schemas import BrpName, BrpPersonDTO, BrpPersonsResponseDTO
+
+RESPONSE_TYPE = "RaadpleegMetBurgerservicenummer"
+
+
+def _persons(*bsns: str) -> BrpPersonsResponseDTO:
+    return BrpPersonsResponseDTO(
+        type=RESPONSE_TYPE,
+        personen=[
+            BrpPersonDTO(burgerservicenummer=bsn, naam=BrpName(voornamen=bsn))
+            for bsn in bsns
+        ],
+    )
+
+
+class TestBatchingBrpRepository:
+    @pytest.fixture
+    def brp_repository(self, mocker: MockerFixture) -> BrpRepository:
+        brp_repository = mocker.Mock(spec=BrpRepository)
+        brp_repository.find.side_effect = _persons
+        brp_repository.find_many.side_effect = lambda bsns: _persons(*bsns)
+        return brp_repository
+
+    def _find_concurrently(
+        self, sut: BatchingBrpRepository, bsns: Sequence[str]
+    ) -> List[BrpPersonsResponseDTO]:
+        barrier = Barrier(len(bsns))
+
+        def find(bsn: str) -> BrpPersonsResponseDTO:
+            barrier.wait()
+            return sut.find(bsn)
+
+        with ThreadPoolExecutor(max_workers=len(bsns)) as executor:
+            return list(executor.map(find, bsns))
+
+    def test_find_looks_up_single_bsn_with_find(
+        self, brp_repository: BrpRepository
+    ) -> None:
+        sut = BatchingBrpRepository(brp_repository, window_seconds=0.001)
+
+        result = sut.find("111111111")
+
+        assert result == _persons("111111111")
+        brp_repository.find_many.assert_not_called()
+
+    def test_find_combines_concurrent_lookups_into_one_request(
+        self, brp_repository: BrpRepository
+    ) -> None:
+        sut = BatchingBrpRepository(brp_repository, window_seconds=1, max_batch_size=3)
+        bsns = ["111111111", "222222222", "333333333"]
+
+        results = self._find_concurrently(sut, bsns)
+
+        assert results == [_persons(bsn) for bsn in bsns]
+        brp_repository.find_many.assert_called_once()
+        assert sorted(brp_repository.find_many.call_args.args[0]) == bsns
+
+    def test_find_returns_no_persons_for_bsn_not_found(
+        self, brp_repository: BrpRepository
+    ) -> None:
+        brp_repository.find_many.side_effect = lambda bsns: _persons(bsns[0])
+        sut = BatchingBrpRepository(brp_repository, window_seconds=1, max_batch_size=2)
+
+        results = self._find_concurrently(sut, ["111111111", "222222222"])
+
+        assert sorted(len(result.personen) for result in results) == [0, 1]
+
+    def test_find_propagates_request_error_to_all_callers(
+        self, brp_repository: BrpRepository
+    ) -> None:
+        brp_repository.find_many.side_effect = BrpHttpRequestException(500, "down")
+        sut = BatchingBrpRepository(brp_repository, window_seconds=1, max_batch_size=2)
+
+        with pytest.raises(BrpHttpRequestException):
+            self._find_concurrently(sut, ["111111111", "222222222"])
+
+        brp_repository.find_many.assert_called_once()
+        brp_repository.find.assert_not_called()
+
+    def test_find_looks_up_bsns_one_by_one_if_batch_is_rejected(
+        self, brp_repository: BrpRepository, mocker: MockerFixture
+    ) -> None:
+        rejected = BrpHttpResponseException(400, mocker.Mock())
+        brp_repository.find_many.side_effect = rejected
+
+        def find_one(bsn: str) -> BrpPersonsResponseDTO:
+            if bsn == "invalid":
+                raise rejected
+            return _persons(bsn)
+
+        brp_repository.find.side_effect = find_one
+        sut = BatchingBrpRepository(brp_repository, window_seconds=1, max_batch_size=2)
+        barrier = Barrier(2)
+
+        def find(bsn: str) -> BrpPersonsResponseDTO:
+            barrier.wait()
+            return sut.find(bsn)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            valid = executor.submit(find, "111111111")
+            invalid = executor.submit(find, "invalid")
+
+            assert valid.result() == _persons("111111111")
+            with pytest.raises(BrpHttpResponseException):
+                invalid.result()
+
+    def test_close_closes_repository(self, brp_repository: BrpRepository) -> None:
+        BatchingBrpRepository(brp_repository, window_seconds=0.001).close()
+
+        brp_repository.close.assert_called_once()
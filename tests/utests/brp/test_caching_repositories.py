@@ -0,0 +1,103 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from app.brp.caching_repositories import CachingBrpRepository
+from app.brp.exceptions import BrpHttpRequestException
+from app.brp.repositories import BrpRepository, MockBrpRepository
+from app.brp.schemas import BrpPersonsResponseDTO
+
+NO_PERSONS = BrpPersonsResponseDTO(type="RaadpleegMetBurgerservicenummer", personen=[])
+
+
+@pytest.mark.usefixtures("clock")
+class TestCachingBrpRepository:
+    @pytest.fixture
+    def brp_repository(self, mocker: MockerFixture) -> BrpRepository:
+        brp_repository = mocker.Mock(spec=BrpRepository)
+        brp_repository.find.return_value = MockBrpRepository().find("123456789")
+        return brp_repository
+
+    @pytest.fixture
+    def clock(self, mocker: MockerFixture):
+        return mocker.patch(
+            "app.brp.caching_repositories.monotonic", return_value=1000.0
+        )
+
+    @pytest.fixture
+    def sut(self, brp_repository: BrpRepository) -> CachingBrpRepository:
+        return CachingBrpRepository(
+            brp_repository, ttl_seconds=60, negative_ttl_seconds=5, max_size=2
+        )
+
+    def test_find_returns_cached_persons_until_ttl_expires(
+        self, sut: CachingBrpRepository, brp_repository: BrpRepository, clock
+    ) -> None:
+        first = sut.find("123456789")
+        clock.return_value = 1059.0
+        second = sut.find("123456789")
+        clock.return_value = 1060.0
+        sut.find("123456789")
+
+        assert second is first
+        assert brp_repository.find.call_count == 2
+        assert (sut.hits, sut.misses) == (1, 2)
+
+    def test_find_keeps_no_person_found_for_negative_ttl(
+        self, sut: CachingBrpRepository, brp_repository: BrpRepository, clock
+    ) -> None:
+        brp_repository.find.return_value = NO_PERSONS
+
+        sut.find("123456789")
+        clock.return_value = 1004.0
+        sut.find("123456789")
+        clock.return_value = 1005.0
+        sut.find("123456789")
+
+        assert brp_repository.find.call_count == 2
+
+    def test_find_does_not_cache_failed_lookups(
+        self, sut: CachingBrpRepository, brp_repository: BrpRepository
+    ) -> None:
+        brp_repository.find.side_effect = BrpHttpRequestException(500, "unreachable")
+
+        for _ in range(2):
+            with pytest.raises(BrpHttpRequestException):
+                sut.find("123456789")
+
+        assert brp_repository.find.call_count == 2
+        assert sut.size == 0
+
+    def test_find_evicts_least_recently_used_entry(
+        self, sut: CachingBrpRepository, brp_repository: BrpRepository
+    ) -> None:
+        sut.find("111111111")
+        sut.find("222222222")
+        sut.find("111111111")
+        sut.find("333333333")
+
+        sut.find("111111111")
+        sut.find("222222222")
+
+        assert sut.size == 2
+        assert [c.args[0] for c in brp_repository.find.call_args_list] == [
+            "111111111",
+            "222222222",
+            "333333333",
+            "222222222",
+        ]
+
+    def test_entries_are_not_keyed_by_bsn(self, sut: CachingBrpRepository) -> None:
+        sut.find("123456789")
+
+        entries = getattr(sut, "_CachingBrpRepository__entries")
+        assert all(b"123456789" not in key for key in entries)
+
+    def test_close_clears_cache_and_closes_repository(
+        self, sut: CachingBrpRepository, brp_repository: BrpRepository
+    ) -> None:
+        sut.find("123456789")
+
+        sut.close()
+
+        assert sut.size == 0
+        brp_repository.close.assert_called_once()
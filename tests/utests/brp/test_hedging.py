@@ -0,0 +1,125 @@
+from threading import Event, Timer
+from typing import Generator, List
+
+import pytest
+
+from app.brp.hedging import MIN_LATENCY_SAMPLES, RequestHedger
+
+
+class TestRequestHedger:
+    @pytest.fixture
+    def sut(self) -> Generator[RequestHedger, None, None]:
+        sut = RequestHedger(
+            percentile=95, min_delay_seconds=0.01, max_hedge_ratio=1, max_workers=4
+        )
+        yield sut
+        sut.close()
+
+    def _observe_fast_requests(self, sut: RequestHedger) -> None:
+        for _ in range(MIN_LATENCY_SAMPLES):
+            sut.call(lambda: "fast")
+
+    def test_call_does_not_hedge_before_latencies_are_observed(
+        self, sut: RequestHedger
+    ) -> None:
+        calls: List[str] = []
+
+        assert sut.call(lambda: calls.append("call") or "result") == "result"
+        assert calls == ["call"]
+        assert sut.get_delay() is None
+
+    def test_get_delay_is_percentile_of_latencies_but_at_least_min_delay(
+        self, sut: RequestHedger
+    ) -> None:
+        self._observe_fast_requests(sut)
+
+        assert sut.get_delay() == 0.01
+
+    def test_call_returns_hedge_if_first_request_is_slow(
+        self, sut: RequestHedger
+    ) -> None:
+        self._observe_fast_requests(sut)
+        release = Event()
+        responses = iter(["slow", "hedged"])
+
+        def send() -> str:
+            response = next(responses)
+            if response == "slow":
+                release.wait(timeout=5)
+            return response
+
+        try:
+            assert sut.call(send) == "hedged"
+        finally:
+            release.set()
+
+    def test_call_returns_hedge_if_first_request_fails(
+        self, sut: RequestHedger
+    ) -> None:
+        self._observe_fast_requests(sut)
+        hedged = Event()
+        responses = iter(["failed", "hedged"])
+
+        def send() -> str:
+            response = next(responses)
+            if response == "failed":
+                hedged.wait(timeout=5)
+                raise ConnectionError("failed")
+            hedged.set()
+            return response
+
+        assert sut.call(send) == "hedged"
+
+    def test_call_raises_error_of_first_request_if_all_fail(
+        self, sut: RequestHedger
+    ) -> None:
+        self._observe_fast_requests(sut)
+        errors = iter([ConnectionError("first"), ConnectionError("second")])
+
+        def send() -> str:
+            error = next(errors)
+            if str(error) == "first":
+                Event().wait(timeout=0.05)
+            raise error
+
+        with pytest.raises(ConnectionError, match="first"):
+            sut.call(send)
+
+    def test_call_does_not_hedge_beyond_max_hedge_ratio(self) -> None:
+        sut = RequestHedger(
+            percentile=95, min_delay_seconds=0.01, max_hedge_ratio=0, max_workers=4
+        )
+        self._observe_fast_requests(sut)
+        calls: List[str] = []
+
+        def send() -> str:
+            calls.append("call")
+            Event().wait(timeout=0.05)
+            return "slow"
+
+        try:
+            assert sut.call(send) == "slow"
+        finally:
+            sut.close()
+
+        assert calls == ["call"]
+
+    def test_call_does_not_hedge_while_primary_waits_for_worker(
+        self, sut: RequestHedger
+    ) -> None:
+        self._observe_fast_requests(sut)
+        release = Event()
+        executor = sut._RequestHedger__executor  # type: ignore[attr-defined]
+        for _ in range(4):
+            executor.submit(release.wait, 5)
+        calls: List[str] = []
+        timer = Timer(0.1, release.set)
+        timer.start()
+
+        try:
+            assert sut.call(lambda: calls.append("call") or "result") == "result"
+        finally:
+            timer.cancel()
+            release.set()
+
+        assert calls == ["call"]
@@ -4,8 +4,11 @@ import httpx
 import pytest
 from pytest_mock import MockerFixture
 
+from app.brp.exceptions import BrpHttpRequestException
+from app.brp.hedging import RequestHedger
 from app.brp.repositories import ApiBrpRepository, MockBrpRepository
 from app.brp.schemas import BrpPersonsResponseDTO
+from app.resilience import CircuitBreaker, ResilientCaller, RetryPolicy
 
 
 class TestMockBrpRepository:
@@ -139,3 +142,101 @@ class TestApiBrpRepository:
             },
             headers={"Content-Type": "application/json", "X-API-KEY": api_key},
         )
+
+    def test_find_reuses_client_across_lookups(self, mocker: MockerFixture) -> None:
+        brp_api_response = {"type": "RaadpleegMetBurgerservicenummer", "personen": []}
+        client = mocker.Mock(spec=httpx.Client)
+        client.post.return_value = mocker.Mock(
+            status_code=200, json=lambda: brp_api_response
+        )
+
+        repository = ApiBrpRepository(base_url="https://api.example.com", client=client)
+        repository.find("123456789")
+        repository.find("987654321")
+
+        assert client.post.call_count == 2
+        client.close.assert_not_called()
+
+    def test_close_closes_client(self, mocker: MockerFixture) -> None:
+        client = mocker.Mock(spec=httpx.Client)
+        repository = ApiBrpRepository(base_url="https://api.example.com", client=client)
+
+        repository.close()
+
+        client.close.assert_called_once()
+
+    def test_find_many_requests_all_bsns_with_their_burgerservicenummer(
+        self, mocker: MockerFixture
+    ) -> None:
+        base_url = "https://api.example.com"
+        brp_api_response = {"type": "RaadpleegMetBurgerservicenummer", "personen": []}
+        client = mocker.Mock(spec=httpx.Client)
+        client.post.return_value = mocker.Mock(
+            status_code=200, json=lambda: brp_api_response
+        )
+
+        repository = ApiBrpRepository(base_url=base_url, client=client)
+        repository.find_many(["123456789", "987654321"])
+
+        client.post.assert_called_once_with(
+            f"{base_url}/personen",
+            json={
+                "type": "RaadpleegMetBurgerservicenummer",
+                "burgerservicenummer": ["123456789", "987654321"],
+                "fields": ["burgerservicenummer", "naam", "leeftijd"],
+            },
+            headers={"Content-Type": "application/json"},
+        )
+
+    def test_find_raises_request_exception_while_circuit_is_open(
+        self, mocker: MockerFixture
+    ) -> None:
+        client = mocker.Mock(spec=httpx.Client)
+        client.post.side_effect = httpx.ConnectError("unreachable")
+        repository = ApiBrpRepository(
+            base_url="https://api.example.com",
+            client=client,
+            resilient_caller=ResilientCaller(
+                "BRP", circuit_breaker=CircuitBreaker(1, reset_timeout_seconds=30)
+            ),
+        )
+
+        for _ in range(2):
+            with pytest.raises(BrpHttpRequestException):
+                repository.find("123456789")
+
+        client.post.assert_called_once()
+
+    def test_find_hedges_each_attempt(self, mocker: MockerFixture) -> None:
+        mocker.patch("app.resilience.sleep")
+        brp_api_response = {"type": "RaadpleegMetBurgerservicenummer", "personen": []}
+        client = mocker.Mock(spec=httpx.Client)
+        client.post.side_effect = [
+            httpx.ConnectError("unreachable"),
+            mocker.Mock(status_code=200, json=lambda: brp_api_response),
+        ]
+        hedger = mocker.Mock(spec=RequestHedger)
+        hedger.call.side_effect = lambda send: send()
+        repository = ApiBrpRepository(
+            base_url="https://api.example.com",
+            client=client,
+            resilient_caller=ResilientCaller("BRP", RetryPolicy(1, 0.1, 1)),
+            hedger=hedger,
+        )
+
+        result = repository.find("123456789")
+
+        assert result == BrpPersonsResponseDTO.model_validate(brp_api_response)
+        assert hedger.call.call_count == 2
+
+    def test_close_closes_hedger(self, mocker: MockerFixture) -> None:
+        hedger = mocker.Mock(spec=RequestHedger)
+        repository = ApiBrpRepository(
+            base_url="https://api.example.com",
+            client=mocker.Mock(spec=httpx.Client),
+            hedger=hedger,
+        )
+
+        repository.close()
+
+        hedger.close.assert_called_once()
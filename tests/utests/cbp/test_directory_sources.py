@@ -0,0 +1,141 @@
+import json
+import os
+from logging import Logger
+from pathlib import Path
+from typing import Any, Dict
+
+from faker import Faker
+from pytest import fixture, raises
+from pytest_mock import MockerFixture
+
+from app.cbp.directory_sources import DirectoryCbpSource
+from app.cbp.exceptions import CbpClientsNotModified, CbpFetchError
+
+
+class TestDirectoryCbpSource:
+    @fixture
+    def logger(self, mocker: MockerFixture) -> Logger:
+        return mocker.Mock(spec=Logger)
+
+    @fixture
+    def sut(self, logger: Logger, tmp_path: Path) -> DirectoryCbpSource:
+        return DirectoryCbpSource(logger=logger, path=str(tmp_path))
+
+    def _client_data(self, faker: Faker, **kwargs: Any) -> Dict[str, Any]:
+        return {
+            "id": faker.uuid4(),
+            "redirect_uris": [faker.uri()],
+            "client_secret": None,
+            "active": True,
+            "created_at": str(faker.date_time()),
+            "updated_at": str(faker.date_time()),
+            **kwargs,
+        }
+
+    def _write(self, filepath: Path, client_data: Dict[str, Any]) -> None:
+        filepath.write_text(json.dumps(client_data), encoding="utf-8")
+        # Make the change visible even within the mtime resolution of the filesystem.
+        os.utime(filepath, ns=(0, filepath.stat().st_mtime_ns + 1_000_000))
+
+    def test_get_clients_reads_one_client_per_json_file(
+        self, sut: DirectoryCbpSource, tmp_path: Path, faker: Faker
+    ) -> None:
+        first, second = self._client_data(faker), self._client_data(faker)
+        self._write(tmp_path / "first.json", first)
+        self._write(tmp_path / "second.json", second)
+        (tmp_path / "ignored.txt").write_text("not a client", encoding="utf-8")
+
+        result = sut.get_clients().clients
+
+        assert [client.id for client in result] == [first["id"], second["id"]]
+
+    def test_get_clients_reads_json_lines_file(
+        self, logger: Logger, tmp_path: Path, faker: Faker
+    ) -> None:
+        clients = [self._client_data(faker), self._client_data(faker)]
+        filepath = tmp_path / "clients.jsonl"
+        filepath.write_text(
+            "\n".join(json.dumps(client) for client in clients), encoding="utf-8"
+        )
+        sut = DirectoryCbpSource(logger=logger, path=str(filepath))
+
+        result = sut.get_clients().clients
+
+        assert [client.id for client in result] == [c["id"] for c in clients]
+
+    def test_get_clients_raises_not_modified_if_conditional_and_unchanged(
+        self, sut: DirectoryCbpSource, tmp_path: Path, faker: Faker
+    ) -> None:
+        self._write(tmp_path / "client.json", self._client_data(faker))
+        sut.get_clients()
+
+        with raises(CbpClientsNotModified):
+            sut.get_clients(conditional=True)
+
+    def test_get_clients_raises_fetch_error_if_path_does_not_exist(
+        self, logger: Logger, tmp_path: Path
+    ) -> None:
+        sut = DirectoryCbpSource(logger=logger, path=str(tmp_path / "missing"))
+
+        with raises(CbpFetchError):
+            sut.get_clients()
+
+    def test_poll_returns_only_changed_and_removed_clients(
+        self, sut: DirectoryCbpSource, tmp_path: Path, faker: Faker
+    ) -> None:
+        unchanged, changed, removed = (self._client_data(faker) for _ in range(3))
+        self._write(tmp_path / "unchanged.json", unchanged)
+        self._write(tmp_path / "changed.json", changed)
+        self._write(tmp_path / "removed.json", removed)
+        sut.get_clients()
+        changed = {**changed, "name": "Renamed"}
+        self._write(tmp_path / "changed.json", changed)
+        (tmp_path / "removed.json").unlink()
+
+        update = sut.poll()
+
+        assert update.clients == [changed]
+        assert update.deleted_client_ids == [removed["id"]]
+        assert not sut.poll().is_targeted
+
+    def test_poll_does_not_read_unchanged_files(
+        self,
+        sut: DirectoryCbpSource,
+        tmp_path: Path,
+        faker: Faker,
+        mocker: MockerFixture,
+    ) -> None:
+        self._write(tmp_path / "client.json", self._client_data(faker))
+        sut.poll()
+        open_spy = mocker.patch("builtins.open", side_effect=AssertionError)
+
+        sut.poll()
+
+        open_spy.assert_not_called()
+
+    def test_poll_keeps_previous_client_if_file_is_unreadable(
+        self, sut: DirectoryCbpSource, tmp_path: Path, faker: Faker, logger: Logger
+    ) -> None:
+        filepath = tmp_path / "client.json"
+        self._write(filepath, self._client_data(faker))
+        sut.poll()
+        filepath.write_text('{"id": ', encoding="utf-8")
+
+        update = sut.poll()
+
+        assert not update.is_targeted
+        logger.warning.assert_called_once()
+
+    def test_get_clients_by_ids_returns_missing_clients_as_deleted(
+        self, sut: DirectoryCbpSource, tmp_path: Path, faker: Faker
+    ) -> None:
+        client = self._client_data(faker)
+        self._write(tmp_path / "client.json", client)
+        missing_client_id = faker.uuid4()
+
+        result = sut.get_clients_by_ids([client["id"], missing_client_id])
+
+        assert [c.id for c in result.clients] == [client["id"]]
+        assert result.deleted_client_ids == [missing_client_id]
+        # Looking up clients does not consume changes for `poll`.
+        assert sut.poll().clients == [client]
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+from typing import Generator
+
+from faker import Faker
+from pytest import fixture
+from pytest_mock import MockerFixture
+
+from app.cbp.factories import CbpClientFactory, CertificateWithJWKFactory
+
+
+@fixture(autouse=True)
+def reset_placeholder() -> Generator[None, None, None]:
+    yield
+    CertificateWithJWKFactory._CertificateWithJWKFactory__placeholder = None  # type: ignore[attr-defined]
+
+
+class TestCertificateWithJWKFactory:
+    def test_get_placeholder_returns_shared_certificate(self) -> None:
+        first = CertificateWithJWKFactory.get_placeholder()
+        second = CertificateWithJWKFactory.get_placeholder()
+
+        assert first is second
+
+    def test_get_placeholder_regenerates_expired_certificate(
+        self, mocker: MockerFixture
+    ) -> None:
+        expired = CertificateWithJWKFactory.get_placeholder()
+        datetime_mock = mocker.patch("app.cbp.factories.datetime")
+        datetime_mock.now.return_value = datetime.now(timezone.utc) + timedelta(days=11)
+        create_dummy = mocker.spy(CertificateWithJWKFactory, "create_dummy")
+
+        result = CertificateWithJWKFactory.get_placeholder()
+
+        create_dummy.assert_called_once()
+        assert result is not expired
+
+
+class TestCbpClientFactory:
+    def test_create_does_not_generate_a_certificate_per_client(
+        self, faker: Faker, mocker: MockerFixture
+    ) -> None:
+        CertificateWithJWKFactory.get_placeholder()
+        create_dummy = mocker.spy(CertificateWithJWKFactory, "create_dummy")
+
+        clients = [
+            CbpClientFactory.create(
+                id=faker.uuid4(),
+                redirect_uris=[faker.uri()],
+                client_secret=None,
+                active=True,
+                created_at=str(faker.date_time()),
+                updated_at=str(faker.date_time()),
+            )
+            for _ in range(3)
+        ]
+
+        create_dummy.assert_not_called()
+        assert clients[0].certificate is clients[2].certificate
+
+    def test_create_many_skips_invalid_clients(self, faker: Faker) -> None:
+        def client_data(**kwargs: object) -> dict:
+            return {
+                "id": faker.uuid4(),
+                "redirect_uris": [faker.uri()],
+                "client_secret": None,
+                "active": True,
+                "created_at": str(faker.date_time()),
+                "updated_at": str(faker.date_time()),
+                **kwargs,
+            }
+
+        clients_data = [
+            client_data(),
+            client_data(active="maybe"),
+            "not a client",
+            client_data(name="Named"),
+        ]
+
+        clients, errors = CbpClientFactory.create_many(clients_data)
+
+        assert [client.id for client in clients] == [
+            clients_data[0]["id"],
+            clients_data[3]["id"],
+        ]
+        assert clients[1].name == "Named"
+        assert set(errors) == {1, 2}
+        assert errors[1].startswith("active: ")
@@ -0,0 +1,498 @@
+import fcntl
+from json import dump, dumps, loads
+from pathlib import Path
+from typing import List
+from faker import Faker
+from pytest import fixture, raises
+
+from app.cbp.generations import CbpClientGeneration
+from app.cbp.models import CbpClient
+from app.cbp.filesystem_repositories import FilesystemCbpClientRepository
+from app.cbp.snapshots import CbpClientSnapshot
+from tests.conftest import CreateCbpClient
+
+
+class TestFilesystemCbpClientRepository:
+    @fixture
+    def filepath(self, tmp_path: Path) -> Path:
+        return tmp_path.joinpath("clients.snap")
+
+    @fixture
+    def legacy_filepath(self, tmp_path: Path) -> Path:
+        return tmp_path.joinpath("clients.json")
+
+    @fixture
+    def sut(self, filepath: Path) -> FilesystemCbpClientRepository:
+        return FilesystemCbpClientRepository(str(filepath))
+
+    def _set_clients_on_repository(self, sut, clients: List[CbpClient]):
+        sut._VersionedCbpClientRepository__current = CbpClientGeneration(
+            1, {client.id: client for client in clients}
+        )
+
+    def test_get_by_id_raises_if_client_not_found(
+        self, sut: FilesystemCbpClientRepository, faker: Faker
+    ) -> None:
+        id = faker.uuid4()
+
+        with raises(KeyError, match=f"'{id}'"):
+            sut.get_by_id(id)
+
+    def test_get_by_id_returns_client_if_found(
+        self,
+        sut: FilesystemCbpClientRepository,
+        faker: Faker,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        id = faker.uuid4()
+
+        client = create_cbp_client(id=id)
+        self._set_clients_on_repository(sut, [client])
+
+        assert sut.get_by_id(id) == client
+
+    def test_find_by_id_returns_none_if_client_not_found(
+        self, sut: FilesystemCbpClientRepository, faker: Faker
+    ) -> None:
+        assert sut.find_by_id(faker.uuid4()) is None
+
+    def test_find_by_id_returns_client_if_found(
+        self,
+        sut: FilesystemCbpClientRepository,
+        faker: Faker,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        id = faker.uuid4()
+        client = create_cbp_client(id=id)
+        self._set_clients_on_repository(sut, [client])
+
+        assert sut.find_by_id(id) == client
+
+    def test_get_all_returns_all_clients(
+        self,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client_a = create_cbp_client()
+        client_b = create_cbp_client()
+        self._set_clients_on_repository(sut, [client_a, client_b])
+
+        result = sut.get_all()
+
+        assert len(result) == 2
+        assert client_a in result
+        assert client_b in result
+
+    def test_get_all_returns_same_sequence_until_clients_change(
+        self,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        sut.update([create_cbp_client()])
+
+        result = sut.get_all()
+
+        assert sut.get_all() is result
+
+        sut.update([create_cbp_client(), create_cbp_client()])
+
+        assert len(sut.get_all()) == 2
+
+    def test_indexes_are_rebuilt_after_merge(
+        self,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        active = create_cbp_client(active=True, login_methods=["digid"])
+        inactive = create_cbp_client(active=False, login_methods=["yivi"])
+        sut.update([active, inactive])
+
+        assert sut.get_active() == (active,)
+        assert sut.find_by_login_method("digid") == (active,)
+
+        changed = active.model_copy(
+            update={"active": False, "exclude_login_methods": ["digid"]}
+        )
+        sut.merge([changed], [inactive.id])
+
+        assert not sut.get_active()
+        assert not sut.find_by_login_method("digid")
+        assert not sut.find_by_login_method("yivi")
+        assert sut.get_effective_login_methods(active.id) == frozenset()
+
+    def test_init_migrates_clients_from_legacy_json_file(
+        self,
+        filepath: Path,
+        legacy_filepath: Path,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client = create_cbp_client()
+        with open(legacy_filepath, mode="w", encoding="utf-8") as tmp_file:
+            dump(
+                [client],
+                tmp_file,
+                ensure_ascii=False,
+                indent=2,
+                default=lambda client: client.model_dump(),
+            )
+        sut = FilesystemCbpClientRepository(
+            str(filepath), legacy_filepath=str(legacy_filepath)
+        )
+
+        result = sut.get_all()
+
+        assert len(result) == 1
+        assert not filepath.exists()
+
+    def test_init_prefers_snapshot_over_legacy_json_file(
+        self,
+        filepath: Path,
+        legacy_filepath: Path,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client = create_cbp_client()
+        legacy_filepath.write_text(dumps([create_cbp_client().model_dump(mode="json")]))
+        FilesystemCbpClientRepository(str(filepath)).update([client])
+
+        sut = FilesystemCbpClientRepository(
+            str(filepath), legacy_filepath=str(legacy_filepath)
+        )
+
+        assert [c.id for c in sut.get_all()] == [client.id]
+
+    def test_init_does_not_load_clients_if_file_not_found(self, filepath: Path) -> None:
+        sut = FilesystemCbpClientRepository(str(filepath))
+
+        result = sut.get_all()
+
+        assert len(result) == 0
+
+    def test_init_does_not_load_clients_if_file_is_empty(self, filepath: Path) -> None:
+        with open(filepath, mode="w", encoding="utf-8") as tmp_file:
+            tmp_file.write("")
+        sut = FilesystemCbpClientRepository(str(filepath))
+
+        result = sut.get_all()
+
+        assert len(result) == 0
+
+    def test_init_raises_if_filepath_directory_is_not_writable(self) -> None:
+        with raises(ValueError, match="Cannot write to directory"):
+            FilesystemCbpClientRepository("/root/clients.json")
+
+    def test_update_overwrites_class_property(
+        self,
+        sut: FilesystemCbpClientRepository,
+        faker: Faker,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        id_a = faker.uuid4()
+        id_b = faker.uuid4()
+        client_a = create_cbp_client(id=id_a)
+        client_b = create_cbp_client(id=id_b)
+        self._set_clients_on_repository(sut, [client_a])
+
+        sut.update([client_b])
+
+        assert sut.get_generation().hydrated_clients == {id_b: client_b}
+
+    def test_update_writes_snapshot_and_leaves_legacy_json_file(
+        self,
+        filepath: Path,
+        legacy_filepath: Path,
+        faker: Faker,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        id_a = faker.uuid4()
+        id_b = faker.uuid4()
+        client_a = create_cbp_client(id=id_a)
+        client_b = create_cbp_client(id=id_b)
+        legacy_content = dumps([client_a.model_dump(mode="json")])
+        legacy_filepath.write_text(legacy_content)
+        sut = FilesystemCbpClientRepository(
+            str(filepath), legacy_filepath=str(legacy_filepath)
+        )
+
+        sut.update([client_b])
+
+        with CbpClientSnapshot.open(str(filepath)) as snapshot:
+            assert list(snapshot.ids()) == [id_b]
+            assert loads(snapshot.get(id_b) or b"") == client_b.model_dump(mode="json")
+        assert legacy_filepath.read_text() == legacy_content
+
+    def test_init_loads_clients_from_snapshot(
+        self,
+        filepath: Path,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client = create_cbp_client()
+        FilesystemCbpClientRepository(str(filepath)).update([client])
+
+        sut = FilesystemCbpClientRepository(str(filepath))
+
+        result = sut.get_by_id(client.id)
+        assert result.model_dump() == client.model_dump()
+        assert result.certificate is not None
+        assert sut.clients_as_mapping[client.id] == client.model_dump()
+
+    def test_merge_replaces_changed_and_removes_deleted_clients(
+        self,
+        filepath: Path,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        kept = create_cbp_client()
+        changed = create_cbp_client()
+        deleted = create_cbp_client()
+        sut.update([kept, changed, deleted])
+        changed_copy = changed.model_copy(update={"name": "Changed"})
+        added = create_cbp_client()
+
+        sut.merge([changed_copy, added], [deleted.id])
+
+        assert sut.find_by_id(deleted.id) is None
+        assert sut.get_by_id(changed.id).name == "Changed"
+        assert sut.get_by_id(added.id) == added
+        assert sut.get_by_id(kept.id) == kept
+        assert set(sut.clients_as_mapping) == {kept.id, changed.id, added.id}
+        assert sut.clients_as_mapping[changed.id]["name"] == "Changed"
+        with CbpClientSnapshot.open(str(filepath)) as snapshot:
+            assert set(snapshot.ids()) == {kept.id, changed.id, added.id}
+
+    def test_update_only_invalidates_mapping_of_changed_clients(
+        self,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        kept = create_cbp_client()
+        changed = create_cbp_client()
+        sut.update([kept, changed])
+        kept_dump = sut.clients_as_mapping[kept.id]
+        changed_dump = sut.clients_as_mapping[changed.id]
+
+        sut.update([kept.model_copy(), changed.model_copy(update={"name": "Changed"})])
+
+        assert sut.clients_as_mapping[kept.id] is kept_dump
+        assert sut.clients_as_mapping[changed.id] is not changed_dump
+        assert sut.clients_as_mapping[changed.id]["name"] == "Changed"
+
+    def test_update_publishes_new_generation(
+        self,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        previous = sut.get_generation()
+
+        sut.update([create_cbp_client()])
+
+        assert sut.get_generation().generation == previous.generation + 1
+        assert len(previous) == 0
+
+    def test_pin_keeps_reading_pinned_generation(
+        self,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client = create_cbp_client()
+        sut.update([client])
+
+        with sut.pin() as pinned:
+            sut.update([create_cbp_client()])
+
+            assert sut.get_generation() is pinned
+            assert sut.get_by_id(client.id) == client
+            assert list(sut.clients_as_mapping) == [client.id]
+
+        assert sut.find_by_id(client.id) is None
+
+    def test_reload_if_changed_is_idle_if_file_is_unchanged(
+        self,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        sut.update([create_cbp_client()])
+
+        assert sut.reload_if_changed() is False
+
+    def test_reload_if_changed_loads_snapshot_written_by_other_worker(
+        self,
+        filepath: Path,
+        sut: FilesystemCbpClientRepository,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        sut.update([create_cbp_client()])
+        client = create_cbp_client()
+        FilesystemCbpClientRepository(str(filepath)).update([client])
+
+        assert sut.reload_if_changed() is True
+        assert [c.id for c in sut.get_all()] == [client.id]
+        assert list(sut.clients_as_mapping) == [client.id]
+        assert sut.reload_if_changed() is False
+
+    def test_reload_if_changed_is_idle_if_file_does_not_exist(
+        self, sut: FilesystemCbpClientRepository
+    ) -> None:
+        assert sut.reload_if_changed() is False
+
+    def test_fetch_lock_is_exclusive_across_processes(
+        self, filepath: Path, sut: FilesystemCbpClientRepository
+    ) -> None:
+        lock_filepath = f"{filepath}.lock"
+
+        with sut.fetch_lock():
+            # A separate open file description, as another worker process holds.
+            with open(lock_filepath, "a", encoding="utf-8") as lock_file:
+                with raises(BlockingIOError):
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        with open(lock_filepath, "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+class TestLazyFilesystemCbpClientRepository:
+    @fixture
+    def filepath(self, tmp_path: Path) -> Path:
+        return tmp_path.joinpath("clients.snap")
+
+    @fixture
+    def clients(self, create_cbp_client: CreateCbpClient) -> List[CbpClient]:
+        return [create_cbp_client() for _ in range(3)]
+
+    @fixture
+    def sut(
+        self, filepath: Path, clients: List[CbpClient]
+    ) -> FilesystemCbpClientRepository:
+        FilesystemCbpClientRepository(str(filepath)).update(clients)
+        return FilesystemCbpClientRepository(str(filepath), lazy=True)
+
+    def _hydrated_ids(self, sut: FilesystemCbpClientRepository) -> set[str]:
+        return set(sut.get_generation().hydrated_clients)
+
+    def test_init_does_not_hydrate_clients(
+        self, sut: FilesystemCbpClientRepository
+    ) -> None:
+        assert self._hydrated_ids(sut) == set()
+
+    def test_find_by_id_hydrates_and_memoizes_client(
+        self, sut: FilesystemCbpClientRepository, clients: List[CbpClient]
+    ) -> None:
+        result = sut.find_by_id(clients[0].id)
+
+        assert result is not None
+        assert result.model_dump() == clients[0].model_dump()
+        assert sut.get_by_id(clients[0].id) is result
+        assert self._hydrated_ids(sut) == {clients[0].id}
+
+    def test_get_by_id_raises_if_client_not_found(
+        self, sut: FilesystemCbpClientRepository, faker: Faker
+    ) -> None:
+        id = faker.uuid4()
+
+        with raises(KeyError, match=f"'{id}'"):
+            sut.get_by_id(id)
+
+    def test_get_all_hydrates_all_clients(
+        self, sut: FilesystemCbpClientRepository, clients: List[CbpClient]
+    ) -> None:
+        result = sut.get_all()
+
+        assert [client.id for client in result] == [client.id for client in clients]
+
+    def test_get_effective_login_methods_only_hydrates_client(
+        self, filepath: Path, create_cbp_client: CreateCbpClient
+    ) -> None:
+        client = create_cbp_client(
+            login_methods=["digid", "yivi"], exclude_login_methods=["yivi"]
+        )
+        FilesystemCbpClientRepository(str(filepath)).update(
+            [client, create_cbp_client()]
+        )
+        sut = FilesystemCbpClientRepository(str(filepath), lazy=True)
+
+        assert sut.get_effective_login_methods(client.id) == {"digid"}
+        assert self._hydrated_ids(sut) == {client.id}
+
+    def test_queries_only_hydrate_clients_in_result(
+        self, filepath: Path, create_cbp_client: CreateCbpClient
+    ) -> None:
+        active = create_cbp_client(active=True, login_methods=["digid"])
+        inactive = create_cbp_client(active=False, login_methods=["yivi"])
+        FilesystemCbpClientRepository(str(filepath)).update([active, inactive])
+        sut = FilesystemCbpClientRepository(str(filepath), lazy=True)
+
+        assert [client.id for client in sut.get_active()] == [active.id]
+        assert [client.id for client in sut.find_by_login_method("digid")] == [
+            active.id
+        ]
+        assert sut.get_effective_login_methods(inactive.id) == {"yivi"}
+        assert self._hydrated_ids(sut) == {active.id}
+
+    def test_clients_as_mapping_dumps_clients_on_access(
+        self, sut: FilesystemCbpClientRepository, clients: List[CbpClient]
+    ) -> None:
+        mapping = sut.clients_as_mapping
+
+        assert len(mapping) == 3
+        assert clients[1].id in mapping
+        assert self._hydrated_ids(sut) == set()
+        assert mapping[clients[1].id] == clients[1].model_dump()
+        assert self._hydrated_ids(sut) == {clients[1].id}
+
+    def test_update_replaces_clients(
+        self,
+        sut: FilesystemCbpClientRepository,
+        clients: List[CbpClient],
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client = create_cbp_client()
+
+        sut.update([client])
+
+        assert sut.find_by_id(clients[0].id) is None
+        assert sut.get_by_id(client.id).model_dump() == client.model_dump()
+        assert list(sut.clients_as_mapping) == [client.id]
+
+    def test_update_only_keeps_clients_in_use_hydrated(
+        self,
+        sut: FilesystemCbpClientRepository,
+        clients: List[CbpClient],
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        in_use = sut.get_by_id(clients[0].id)
+
+        sut.update([*clients, create_cbp_client()])
+
+        assert self._hydrated_ids(sut) == {clients[0].id}
+        assert sut.get_by_id(clients[0].id) is in_use
+
+    def test_merge_does_not_hydrate_unchanged_clients(
+        self,
+        filepath: Path,
+        sut: FilesystemCbpClientRepository,
+        clients: List[CbpClient],
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        added = create_cbp_client()
+
+        sut.merge([added], [clients[0].id])
+
+        assert self._hydrated_ids(sut) == {added.id}
+        assert set(sut.clients_as_mapping) == {clients[1].id, clients[2].id, added.id}
+        with CbpClientSnapshot.open(str(filepath)) as snapshot:
+            assert set(snapshot.ids()) == {clients[1].id, clients[2].id, added.id}
+
+    def test_reload_if_changed_resets_hydrated_clients(
+        self,
+        filepath: Path,
+        sut: FilesystemCbpClientRepository,
+        clients: List[CbpClient],
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        sut.get_by_id(clients[0].id)
+        client = create_cbp_client()
+        FilesystemCbpClientRepository(str(filepath)).update([client])
+
+        assert sut.reload_if_changed() is True
+        assert self._hydrated_ids(sut) == set()
+        assert sut.find_by_id(clients[0].id) is None
+        assert list(sut.clients_as_mapping) == [client.id]
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+from pytest import raises
+
+from app.cbp.generations import CbpClientGeneration
+from app.cbp.models import CbpClient
+from app.cbp.snapshots import CbpClientSnapshot
+from tests.conftest import CreateCbpClient
+
+
+class TestCbpClientGeneration:
+    def test_find_by_id_returns_client(
+        self, create_cbp_client: CreateCbpClient
+    ) -> None:
+        client = create_cbp_client()
+
+        sut = CbpClientGeneration(1, {client.id: client})
+
+        assert sut.generation == 1
+        assert len(sut) == 1
+        assert sut.find_by_id(client.id) is client
+        assert sut.find_by_id("unknown") is None
+        with raises(KeyError):
+            sut.get_by_id("unknown")
+
+    def test_find_by_id_hydrates_and_memoizes_snapshot_records(
+        self, create_cbp_client: CreateCbpClient, tmp_path: Path
+    ) -> None:
+        client = create_cbp_client()
+        filepath = str(tmp_path.joinpath("clients.json"))
+        CbpClientSnapshot.write(
+            filepath, [(client.id, client.model_dump_json().encode("utf-8"))]
+        )
+
+        def hydrate(client_data: dict) -> CbpClient:
+            return CbpClient(**client_data, certificate=client.certificate)
+
+        with CbpClientSnapshot.open(filepath) as snapshot:
+            sut = CbpClientGeneration(1, {}, snapshot, hydrate)
+
+            assert list(sut.ids()) == [client.id]
+            assert not sut.hydrated_clients
+
+            result = sut.get_by_id(client.id)
+
+            assert result.model_dump() == client.model_dump()
+            assert sut.find_by_id(client.id) is result
+            assert set(sut.hydrated_clients) == {client.id}
+
+    def test_index_is_built_once(self, create_cbp_client: CreateCbpClient) -> None:
+        client = create_cbp_client()
+
+        sut = CbpClientGeneration(1, {client.id: client})
+
+        assert sut.index is sut.index
+        assert sut.index.clients == (client,)
+
+    def test_updated_at_is_read_from_snapshot_without_hydrating(
+        self, create_cbp_client: CreateCbpClient, tmp_path: Path
+    ) -> None:
+        client = create_cbp_client()
+        filepath = str(tmp_path.joinpath("clients.json"))
+        CbpClientSnapshot.write(
+            filepath,
+            [(client.id, client.model_dump_json().encode("utf-8"))],
+            client.updated_at,
+        )
+
+        with CbpClientSnapshot.open(filepath) as snapshot:
+            sut = CbpClientGeneration(1, {}, snapshot)
+
+            assert sut.updated_at == client.updated_at
+            assert not sut.hydrated_clients
+
+    def test_updated_at_is_latest_of_clients(
+        self, create_cbp_client: CreateCbpClient
+    ) -> None:
+        clients = [create_cbp_client() for _ in range(3)]
+
+        sut = CbpClientGeneration(1, {client.id: client for client in clients})
+
+        assert sut.updated_at == max(client.updated_at for client in clients)
+        assert CbpClientGeneration(1, {}).updated_at is None
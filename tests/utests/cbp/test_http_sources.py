@@ -0,0 +1,549 @@
+import json
+from hashlib import sha256
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List
+
+from app.cbp.exceptions import CbpClientsNotModified, CbpFetchError
+from app.cbp.models import CbpResponseValidators
+from app.cbp.http_sources import CbpHttpClient
+from app.resilience import CircuitBreaker, ResilientCaller
+from faker import Faker
+from pytest import fixture, mark, raises
+from pytest_mock import MockerFixture, MockType
+from requests import ConnectionError as RequestsConnectionError
+from requests import JSONDecodeError, Response
+
+
+class TestCbpHttpClient:
+    @fixture
+    def logger(self, mocker: MockerFixture) -> Logger:
+        return mocker.Mock(spec=Logger)
+
+    @fixture
+    def validators_filepath(self, tmp_path: Path) -> Path:
+        return tmp_path.joinpath("clients.json.validators")
+
+    @fixture
+    def sut(self, logger: Logger, validators_filepath: Path) -> CbpHttpClient:
+        return CbpHttpClient(
+            logger=logger,
+            base_url="http://example.com",
+            validators_filepath=str(validators_filepath),
+        )
+
+    @staticmethod
+    def _create_response(
+        mocker: MockerFixture,
+        content: bytes = b"{}",
+        status_code: int = 200,
+        headers: Dict[str, str] | None = None,
+    ) -> MockType:
+        return mocker.Mock(
+            spec=Response,
+            status_code=status_code,
+            content=content,
+            headers=headers or {},
+        )
+
+    def test_get_clients_returns_cbp_clients(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        sut: CbpHttpClient,
+    ) -> None:
+        response = self._create_response(mocker)
+        clients = [
+            {
+                "id": faker.uuid4(),
+                "redirect_uris": [faker.uri()],
+                "client_secret": None,
+                "active": faker.boolean(),
+                "created_at": str(faker.date_time()),
+                "updated_at": str(faker.date_time()),
+            }
+            for _ in range(3)
+        ]
+        mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            return_value=response,
+            autospec=True,
+        )
+        response.json.return_value = {"clients": clients}
+
+        result = sut.get_clients().clients
+
+        assert len(result) == 3
+
+    def test_get_clients_raises_fetch_error_if_connection_fails(
+        self,
+        mocker: MockerFixture,
+        sut: CbpHttpClient,
+    ) -> None:
+        exception = ConnectionError("Connection refused")
+        mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            side_effect=exception,
+            autospec=True,
+        )
+
+        with raises(CbpFetchError, match="Failed to connect to CBP") as exc_info:
+            sut.get_clients()
+
+        assert exc_info.value.__cause__ is exception
+
+    def test_get_clients_raises_fetch_error_if_circuit_is_open(
+        self,
+        mocker: MockerFixture,
+        logger: Logger,
+    ) -> None:
+        sut = CbpHttpClient(
+            logger=logger,
+            base_url="http://example.com",
+            resilient_caller=ResilientCaller(
+                "CBP", circuit_breaker=CircuitBreaker(1, reset_timeout_seconds=30)
+            ),
+        )
+        get = mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            side_effect=RequestsConnectionError("Connection refused"),
+        )
+
+        with raises(CbpFetchError, match="Connection refused"):
+            sut.get_clients()
+        with raises(CbpFetchError, match="Circuit breaker for CBP is open"):
+            sut.get_clients()
+
+        get.assert_called_once()
+
+    def test_get_clients_raises_fetch_error_if_no_json_response(
+        self,
+        mocker: MockerFixture,
+        sut: CbpHttpClient,
+    ) -> None:
+        response = self._create_response(mocker)
+        exception = JSONDecodeError("Invalid JSON", "", 0)
+        mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            return_value=response,
+            autospec=True,
+        )
+        response.json.side_effect = exception
+
+        with raises(CbpFetchError, match="Failed to parse CBP response as JSON"):
+            sut.get_clients()
+
+    def test_get_clients_raises_fetch_error_if_json_structure_is_invalid(
+        self,
+        mocker: MockerFixture,
+        sut: CbpHttpClient,
+    ) -> None:
+        response = self._create_response(mocker)
+        json = {"invalid": "structure"}
+        mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            return_value=response,
+            autospec=True,
+        )
+        response.json.return_value = json
+
+        with raises(CbpFetchError, match="Missing 'clients' property"):
+            sut.get_clients()
+
+    def test_get_clients_skips_invalid_clients(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        sut: CbpHttpClient,
+        logger: Logger,
+    ) -> None:
+        response = self._create_response(mocker)
+        valid_client = {
+            "id": faker.uuid4(),
+            "redirect_uris": [faker.uri()],
+            "client_secret": None,
+            "active": faker.boolean(),
+            "created_at": str(faker.date_time()),
+            "updated_at": str(faker.date_time()),
+        }
+        invalid_client = {**valid_client, "id": faker.uuid4(), "active": "maybe"}
+        mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            return_value=response,
+            autospec=True,
+        )
+        response.json.return_value = {"clients": [invalid_client, valid_client]}
+
+        result = sut.get_clients().clients
+
+        assert [client.id for client in result] == [valid_client["id"]]
+        logger.warning.assert_called_once()
+        msg, client_id, index, _ = logger.warning.call_args.args
+        assert msg == "Skipping invalid CBP client %s at index %d: %s"
+        assert client_id == invalid_client["id"]
+        assert index == 0
+
+    def test_get_clients_returns_response_validators_without_storing_them(
+        self,
+        mocker: MockerFixture,
+        sut: CbpHttpClient,
+        validators_filepath: Path,
+    ) -> None:
+        response = self._create_response(
+            mocker,
+            content=b'{"clients": []}',
+            headers={"ETag": '"v1"', "Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"},
+        )
+        response.json.return_value = {"clients": []}
+        mocker.patch("app.cbp.http_sources.requests.Session.get", return_value=response)
+
+        validators = sut.get_clients().validators
+
+        assert validators is not None
+        assert validators.etag == '"v1"'
+        assert validators.last_modified == "Wed, 21 Oct 2026 07:28:00 GMT"
+        assert validators.digest == sha256(b'{"clients": []}').hexdigest()
+        assert not validators_filepath.exists()
+
+    def test_save_validators_stores_validators(
+        self, sut: CbpHttpClient, validators_filepath: Path
+    ) -> None:
+        validators = CbpResponseValidators(etag='"v1"', digest="digest")
+
+        sut.save_validators(validators)
+
+        assert (
+            CbpResponseValidators.model_validate_json(
+                validators_filepath.read_text(encoding="utf-8")
+            )
+            == validators
+        )
+
+    def test_get_clients_sends_stored_validators_if_conditional(
+        self,
+        mocker: MockerFixture,
+        sut: CbpHttpClient,
+        validators_filepath: Path,
+    ) -> None:
+        validators_filepath.write_text(
+            CbpResponseValidators(
+                etag='"v1"', last_modified="yesterday"
+            ).model_dump_json(),
+            encoding="utf-8",
+        )
+        get = mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            return_value=self._create_response(mocker, status_code=304),
+        )
+
+        with raises(CbpClientsNotModified):
+            sut.get_clients(conditional=True)
+
+        assert get.call_args.kwargs["headers"] == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "yesterday",
+        }
+
+    def test_get_clients_does_not_send_validators_if_not_conditional(
+        self,
+        mocker: MockerFixture,
+        sut: CbpHttpClient,
+        validators_filepath: Path,
+    ) -> None:
+        validators_filepath.write_text(
+            CbpResponseValidators(etag='"v1"').model_dump_json(), encoding="utf-8"
+        )
+        response = self._create_response(mocker)
+        response.json.return_value = {"clients": []}
+        get = mocker.patch(
+            "app.cbp.http_sources.requests.Session.get", return_value=response
+        )
+
+        sut.get_clients()
+
+        assert get.call_args.kwargs["headers"] == {}
+
+    def test_get_clients_raises_not_modified_if_digest_is_unchanged(
+        self,
+        mocker: MockerFixture,
+        sut: CbpHttpClient,
+        validators_filepath: Path,
+    ) -> None:
+        content = b'{"clients": []}'
+        validators_filepath.write_text(
+            CbpResponseValidators(digest=sha256(content).hexdigest()).model_dump_json(),
+            encoding="utf-8",
+        )
+        response = self._create_response(mocker, content=content)
+        mocker.patch("app.cbp.http_sources.requests.Session.get", return_value=response)
+
+        with raises(CbpClientsNotModified):
+            sut.get_clients(conditional=True)
+
+        response.json.assert_not_called()
+
+    def test_get_clients_streams_clients_if_streaming_is_enabled(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        logger: Logger,
+        validators_filepath: Path,
+    ) -> None:
+        sut = CbpHttpClient(
+            logger=logger,
+            base_url="http://example.com",
+            validators_filepath=str(validators_filepath),
+            streaming=True,
+        )
+        content = json.dumps(
+            {
+                "clients": [
+                    {
+                        "id": faker.uuid4(),
+                        "redirect_uris": [faker.uri()],
+                        "client_secret": None,
+                        "active": faker.boolean(),
+                        "created_at": str(faker.date_time()),
+                        "updated_at": str(faker.date_time()),
+                    }
+                    for _ in range(3)
+                ]
+            }
+        ).encode("utf-8")
+        response = self._create_response(mocker, content=content)
+        response.iter_content.return_value = iter(
+            [content[i : i + 10] for i in range(0, len(content), 10)]
+        )
+        get = mocker.patch(
+            "app.cbp.http_sources.requests.Session.get", return_value=response
+        )
+
+        result = sut.get_clients()
+
+        assert len(result.clients) == 3
+        assert get.call_args.kwargs["stream"] is True
+        response.json.assert_not_called()
+        response.close.assert_called_once()
+        assert result.validators is not None
+        assert result.validators.digest == sha256(content).hexdigest()
+
+    def test_get_clients_checks_streamed_digest_before_validating_clients(
+        self,
+        mocker: MockerFixture,
+        logger: Logger,
+        validators_filepath: Path,
+    ) -> None:
+        sut = CbpHttpClient(
+            logger=logger,
+            base_url="http://example.com",
+            validators_filepath=str(validators_filepath),
+            streaming=True,
+        )
+        content = b'{"clients": [{"id": "unchanged"}]}'
+        validators_filepath.write_text(
+            CbpResponseValidators(digest=sha256(content).hexdigest()).model_dump_json(),
+            encoding="utf-8",
+        )
+        response = self._create_response(mocker, content=content)
+        response.iter_content.return_value = iter([content[:10], content[10:]])
+        mocker.patch("app.cbp.http_sources.requests.Session.get", return_value=response)
+        validate = mocker.patch("app.cbp.http_sources.CbpClientBatchValidator.validate")
+
+        with raises(CbpClientsNotModified):
+            sut.get_clients(conditional=True)
+
+        validate.assert_not_called()
+        response.close.assert_called_once()
+
+    def test_get_clients_raises_fetch_error_if_streamed_json_is_invalid(
+        self,
+        mocker: MockerFixture,
+        logger: Logger,
+    ) -> None:
+        sut = CbpHttpClient(
+            logger=logger, base_url="http://example.com", streaming=True
+        )
+        response = self._create_response(mocker)
+        response.iter_content.return_value = iter([b'{"clients": [{"id": '])
+        mocker.patch("app.cbp.http_sources.requests.Session.get", return_value=response)
+
+        with raises(CbpFetchError, match="Failed to parse CBP client data"):
+            sut.get_clients()
+
+    def test_get_changed_clients_returns_changed_and_deleted_clients(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        sut: CbpHttpClient,
+    ) -> None:
+        since = faker.date_time()
+        deleted_client_id = faker.uuid4()
+        response = self._create_response(mocker)
+        response.json.return_value = {
+            "clients": [
+                {
+                    "id": faker.uuid4(),
+                    "redirect_uris": [faker.uri()],
+                    "client_secret": None,
+                    "active": faker.boolean(),
+                    "created_at": str(faker.date_time()),
+                    "updated_at": str(faker.date_time()),
+                }
+            ],
+            "deleted": [deleted_client_id],
+        }
+        get = mocker.patch(
+            "app.cbp.http_sources.requests.Session.get", return_value=response
+        )
+
+        result = sut.get_changed_clients(since)
+
+        assert len(result.clients) == 1
+        assert result.deleted_client_ids == [deleted_client_id]
+        assert get.call_args.kwargs["params"] == {"updated_since": since.isoformat()}
+
+    @mark.parametrize("deleted", ["client-id", [None], {"id": "client-id"}])
+    def test_get_changed_clients_raises_fetch_error_if_deleted_is_not_list_of_ids(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        sut: CbpHttpClient,
+        deleted: object,
+    ) -> None:
+        response = self._create_response(mocker)
+        response.json.return_value = {"clients": [], "deleted": deleted}
+        mocker.patch("app.cbp.http_sources.requests.Session.get", return_value=response)
+
+        with raises(CbpFetchError, match="'deleted'"):
+            sut.get_changed_clients(faker.date_time())
+
+    def test_get_changed_clients_raises_fetch_error_if_connection_fails(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        sut: CbpHttpClient,
+    ) -> None:
+        mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            side_effect=ConnectionError("Connection refused"),
+        )
+
+        with raises(CbpFetchError):
+            sut.get_changed_clients(faker.date_time())
+
+    def test_get_clients_by_ids_returns_missing_clients_as_deleted(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        sut: CbpHttpClient,
+    ) -> None:
+        found_client_id, missing_client_id = faker.uuid4(), faker.uuid4()
+        response = self._create_response(mocker)
+        response.json.return_value = {
+            "clients": [
+                {
+                    "id": found_client_id,
+                    "redirect_uris": [faker.uri()],
+                    "client_secret": None,
+                    "active": True,
+                    "created_at": str(faker.date_time()),
+                    "updated_at": str(faker.date_time()),
+                }
+            ]
+        }
+        get = mocker.patch(
+            "app.cbp.http_sources.requests.Session.get", return_value=response
+        )
+
+        result = sut.get_clients_by_ids([found_client_id, missing_client_id])
+
+        assert [client.id for client in result.clients] == [found_client_id]
+        assert result.deleted_client_ids == [missing_client_id]
+        assert get.call_args.kwargs["params"] == {
+            "ids": f"{found_client_id},{missing_client_id}"
+        }
+
+    def test_get_clients_by_ids_raises_fetch_error_if_connection_fails(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        sut: CbpHttpClient,
+    ) -> None:
+        mocker.patch(
+            "app.cbp.http_sources.requests.Session.get",
+            side_effect=ConnectionError("Connection refused"),
+        )
+
+        with raises(CbpFetchError):
+            sut.get_clients_by_ids([faker.uuid4()])
+
+    def test_get_clients_fetches_all_pages_in_order_if_paginated(
+        self,
+        mocker: MockerFixture,
+        faker: Faker,
+        logger: Logger,
+    ) -> None:
+        sut = CbpHttpClient(
+            logger=logger,
+            base_url="http://example.com",
+            page_size=2,
+            max_concurrent_pages=2,
+        )
+        client_ids = [faker.uuid4() for _ in range(5)]
+        responses: List[MockType] = []
+
+        def get_page(_url: str, params: Dict[str, str], **_kwargs: object) -> MockType:
+            page = int(params["page"])
+            response = self._create_response(mocker, content=params["page"].encode())
+            responses.append(response)
+            response.json.return_value = {
+                "clients": [
+                    {
+                        "id": client_id,
+                        "redirect_uris": [faker.uri()],
+                        "client_secret": None,
+                        "active": True,
+                        "created_at": str(faker.date_time()),
+                        "updated_at": str(faker.date_time()),
+                    }
+                    for client_id in client_ids[(page - 1) * 2 : page * 2]
+                ],
+                "total_pages": 3,
+            }
+            return response
+
+        get = mocker.patch(
+            "app.cbp.http_sources.requests.Session.get", side_effect=get_page
+        )
+
+        result = sut.get_clients().clients
+
+        assert [client.id for client in result] == client_ids
+        assert sorted(call.kwargs["params"]["page"] for call in get.call_args_list) == [
+            "1",
+            "2",
+            "3",
+        ]
+        assert all(
+            call.kwargs["params"]["page_size"] == "2" for call in get.call_args_list
+        )
+        assert [response.json.call_count for response in responses] == [1, 1, 1]
+
+    def test_get_clients_raises_fetch_error_if_a_page_fails(
+        self,
+        mocker: MockerFixture,
+        logger: Logger,
+    ) -> None:
+        sut = CbpHttpClient(logger=logger, base_url="http://example.com", page_size=2)
+        first_page = self._create_response(mocker)
+        first_page.json.return_value = {"clients": [], "total_pages": 3}
+
+        def get_page(_url: str, params: Dict[str, str], **_kwargs: object) -> MockType:
+            if params["page"] == "1":
+                return first_page
+            raise ConnectionError("Connection refused")
+
+        mocker.patch("app.cbp.http_sources.requests.Session.get", side_effect=get_page)
+
+        with raises(CbpFetchError, match="Page 2 of 3 of CBP clients failed"):
+            sut.get_clients()
@@ -0,0 +1,43 @@
+from app.cbp.indexes import CbpClientIndex
+from tests.conftest import CreateCbpClient
+
+
+class TestCbpClientIndex:
+    def test_active_clients_only_contains_active_clients(
+        self, create_cbp_client: CreateCbpClient
+    ) -> None:
+        active = create_cbp_client(active=True)
+        inactive = create_cbp_client(active=False)
+
+        sut = CbpClientIndex.of_clients([active, inactive])
+
+        assert sut.clients == (active, inactive)
+        assert sut.active_clients == (active,)
+
+    def test_effective_login_methods_exclude_excluded_login_methods(
+        self, create_cbp_client: CreateCbpClient
+    ) -> None:
+        client = create_cbp_client(
+            login_methods=["digid", "eherkenning", "yivi"],
+            exclude_login_methods=["eherkenning"],
+        )
+
+        sut = CbpClientIndex.of_clients([client])
+
+        assert sut.get_effective_login_methods(client.id) == {"digid", "yivi"}
+        assert sut.get_effective_login_methods("unknown") == frozenset()
+
+    def test_find_by_login_method_uses_effective_login_methods(
+        self, create_cbp_client: CreateCbpClient
+    ) -> None:
+        digid = create_cbp_client(login_methods=["digid"])
+        excluded = create_cbp_client(
+            login_methods=["digid"], exclude_login_methods=["digid"]
+        )
+        yivi = create_cbp_client(login_methods=["digid", "yivi"])
+
+        sut = CbpClientIndex.of_clients([digid, excluded, yivi])
+
+        assert sut.find_by_login_method("digid") == (digid, yivi)
+        assert sut.find_by_login_method("yivi") == (yivi,)
+        assert sut.find_by_login_method("unknown") == ()
@@ -0,0 +1,82 @@
+from typing import Dict
+
+from pytest import fixture, raises
+
+from app.cbp.mappings import CbpClientMappingView
+from app.cbp.models import CbpClient
+from tests.conftest import CreateCbpClient
+
+
+class TestCbpClientMappingView:
+    @fixture
+    def clients(self, create_cbp_client: CreateCbpClient) -> Dict[str, CbpClient]:
+        return {client.id: client for client in [create_cbp_client() for _ in range(2)]}
+
+    @fixture
+    def sut(self, clients: Dict[str, CbpClient]) -> CbpClientMappingView:
+        return CbpClientMappingView(clients.get, clients.keys)
+
+    def test_getitem_returns_dumped_client(
+        self, sut: CbpClientMappingView, clients: Dict[str, CbpClient]
+    ) -> None:
+        client = next(iter(clients.values()))
+
+        assert sut[client.id] == client.model_dump()
+
+    def test_getitem_raises_if_client_not_found(
+        self, sut: CbpClientMappingView
+    ) -> None:
+        with raises(KeyError):
+            sut["unknown"]  # pylint: disable=pointless-statement
+
+    def test_reflects_repository_contents(
+        self, sut: CbpClientMappingView, clients: Dict[str, CbpClient]
+    ) -> None:
+        assert len(sut) == 2
+        assert set(sut) == set(clients)
+        assert "unknown" not in sut
+        assert sut.get("unknown") is None
+
+    def test_is_read_only(
+        self, sut: CbpClientMappingView, clients: Dict[str, CbpClient]
+    ) -> None:
+        client_id = next(iter(clients))
+
+        with raises(TypeError):
+            sut[client_id] = {}
+        with raises(TypeError):
+            del sut[client_id]
+
+    def test_getitem_memoizes_dump(
+        self, sut: CbpClientMappingView, clients: Dict[str, CbpClient]
+    ) -> None:
+        client_id = next(iter(clients))
+
+        assert sut[client_id] is sut[client_id]
+
+    def test_getitem_dumps_again_if_client_was_replaced(
+        self, sut: CbpClientMappingView, clients: Dict[str, CbpClient]
+    ) -> None:
+        client_id = next(iter(clients))
+        dump = sut[client_id]
+        clients[client_id] = clients[client_id].model_copy(update={"name": "Changed"})
+
+        result = sut[client_id]
+
+        assert result is not dump
+        assert result["name"] == "Changed"
+
+    def test_invalidate_drops_memoized_dumps(
+        self, sut: CbpClientMappingView, clients: Dict[str, CbpClient]
+    ) -> None:
+        first_id, second_id = clients
+        first_dump, second_dump = sut[first_id], sut[second_id]
+
+        sut.invalidate([first_id])
+
+        assert sut[first_id] is not first_dump
+        assert sut[second_id] is second_dump
+
+        sut.invalidate()
+
+        assert sut[second_id] is not second_dump
@@ -0,0 +1,45 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from pytest_mock import MockerFixture
+
+from app.cbp.middleware import PinCbpClientGenerationMiddleware
+from app.cbp.repositories import CbpClientRepository
+
+
+class TestPinCbpClientGenerationMiddleware:
+    @staticmethod
+    def _call(mocker: MockerFixture, scope: Dict[str, Any]) -> List[str]:
+        events: List[str] = []
+
+        @contextmanager
+        def pin() -> Iterator[None]:
+            events.append("pinned")
+            yield
+            events.append("unpinned")
+
+        async def app(*_: Any) -> None:
+            events.append("handled")
+
+        client_repository = mocker.Mock(spec=CbpClientRepository)
+        client_repository.pin.side_effect = pin
+        sut = PinCbpClientGenerationMiddleware(app, client_repository=client_repository)
+
+        asyncio.run(sut(scope, mocker.AsyncMock(), mocker.AsyncMock()))
+
+        return events
+
+    def test_pins_generation_while_handling_http_request(
+        self, mocker: MockerFixture
+    ) -> None:
+        events = self._call(mocker, {"type": "http"})
+
+        assert events == ["pinned", "handled", "unpinned"]
+
+    def test_does_not_pin_generation_for_lifespan_events(
+        self, mocker: MockerFixture
+    ) -> None:
+        events = self._call(mocker, {"type": "lifespan"})
+
+        assert events == ["handled"]
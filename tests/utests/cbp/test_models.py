@@ -4,7 +4,7 @@ from cryptography import x509
 from cryptography.hazmat.primitives import serialization
 from jwcrypto.jwk import JWK
 
-from app.cbp.models import CbpClient
+from app.cbp.models import CbpClient, CbpClientsUpdate, CbpClientsWebhookBody
 from max_core.models.certificate_with_jwk import CertificateWithJWK
 
 from tests.conftest import CreateCbpClient
@@ -56,3 +56,19 @@ class TestCbpClient:
     ):
         cbp_client = create_cbp_client(certificate=certificate_with_jwk)
         assert cbp_client.certificate is certificate_with_jwk
+
+
+class TestCbpClientsWebhookBody:
+    def test_to_update_only_names_clients_to_fetch(self) -> None:
+        body = CbpClientsWebhookBody(
+            client_ids=["changed", "deleted"],
+            deleted_client_ids=["deleted"],
+            clients=[{"id": "included", "active": True}, {"active": False}],
+        )
+
+        assert body.to_update() == CbpClientsUpdate(
+            client_ids=["changed", "deleted", "included"]
+        )
+
+    def test_to_update_of_empty_body_requests_full_sync(self) -> None:
+        assert not CbpClientsWebhookBody().to_update().is_targeted
@@ -0,0 +1,59 @@
+from pytest import fixture, raises
+from pytest_mock import MockerFixture
+from redis import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.cbp.notifications import RedisCbpClientNotificationChannel
+
+
+class TestRedisCbpClientNotificationChannel:
+    @fixture
+    def redis(self, mocker: MockerFixture) -> Redis:
+        return mocker.MagicMock(spec=Redis)
+
+    @fixture
+    def sut(self, redis: Redis) -> RedisCbpClientNotificationChannel:
+        return RedisCbpClientNotificationChannel(redis, channel="vad:cbp:updated")
+
+    def test_publish_publishes_generation(
+        self, sut: RedisCbpClientNotificationChannel, redis: Redis
+    ) -> None:
+        sut.publish(7)
+
+        redis.publish.assert_called_once_with("vad:cbp:updated", 7)
+
+    def test_receive_subscribes_once_and_returns_generation(
+        self, sut: RedisCbpClientNotificationChannel, redis: Redis
+    ) -> None:
+        pubsub = redis.pubsub.return_value
+        pubsub.get_message.side_effect = [
+            {"type": "message", "data": b"7"},
+            None,
+        ]
+
+        assert sut.receive(timeout_seconds=1) == 7
+        assert sut.receive(timeout_seconds=1) is None
+        pubsub.subscribe.assert_called_once_with("vad:cbp:updated")
+
+    def test_receive_ignores_malformed_messages(
+        self, sut: RedisCbpClientNotificationChannel, redis: Redis
+    ) -> None:
+        redis.pubsub.return_value.get_message.return_value = {
+            "type": "message",
+            "data": b"not a generation",
+        }
+
+        assert sut.receive(timeout_seconds=1) is None
+
+    def test_receive_resubscribes_after_redis_error(
+        self, sut: RedisCbpClientNotificationChannel, redis: Redis
+    ) -> None:
+        pubsub = redis.pubsub.return_value
+        pubsub.get_message.side_effect = [RedisConnectionError("unreachable"), None]
+
+        with raises(ConnectionError, match="unreachable"):
+            sut.receive(timeout_seconds=1)
+        sut.receive(timeout_seconds=1)
+
+        pubsub.close.assert_called_once()
+        assert pubsub.subscribe.call_count == 2
@@ -0,0 +1,141 @@
+from faker import Faker
+from pytest import fixture, raises
+from pytest_mock import MockerFixture
+
+from app.cbp.redis_repositories import RedisCbpClientRepository
+from app.cbp.stores import InMemoryCbpClientStore
+from tests.conftest import CreateCbpClient
+
+
+class TestRedisCbpClientRepository:
+    @fixture
+    def store(self) -> InMemoryCbpClientStore:
+        return InMemoryCbpClientStore(lock_blocking_timeout=0.01)
+
+    @fixture
+    def sut(self, store: InMemoryCbpClientStore) -> RedisCbpClientRepository:
+        return RedisCbpClientRepository(store)
+
+    def test_init_loads_clients_from_store(
+        self, store: InMemoryCbpClientStore, create_cbp_client: CreateCbpClient
+    ) -> None:
+        client = create_cbp_client()
+        RedisCbpClientRepository(store).update([client])
+
+        sut = RedisCbpClientRepository(store)
+
+        assert [c.id for c in sut.get_all()] == [client.id]
+        assert sut.get_generation().generation == store.get_generation()
+
+    def test_init_tolerates_unreachable_store(
+        self,
+        store: InMemoryCbpClientStore,
+        mocker: MockerFixture,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client = create_cbp_client()
+        RedisCbpClientRepository(store).update([client])
+        loaded = store.load()
+        load = mocker.patch.object(
+            store, "load", side_effect=ConnectionError("Redis is down")
+        )
+
+        sut = RedisCbpClientRepository(store)
+
+        assert len(sut.get_generation()) == 0
+        load.side_effect = None
+        load.return_value = loaded
+        assert sut.reload_if_changed() is True
+        assert [c.id for c in sut.get_all()] == [client.id]
+
+    def test_update_writes_clients_to_store(
+        self,
+        sut: RedisCbpClientRepository,
+        store: InMemoryCbpClientStore,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client = create_cbp_client()
+
+        sut.update([client])
+
+        generation, records = store.load()
+        assert list(records) == [client.id]
+        assert sut.get_generation().generation == generation
+        assert sut.get_by_id(client.id) is client
+
+    def test_reload_if_changed_picks_up_clients_written_by_other_process(
+        self,
+        sut: RedisCbpClientRepository,
+        store: InMemoryCbpClientStore,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        other = RedisCbpClientRepository(store)
+        client = create_cbp_client()
+        other.update([client])
+
+        assert sut.find_by_id(client.id) is None
+        assert sut.reload_if_changed()
+        assert sut.get_by_id(client.id).id == client.id
+        assert not sut.reload_if_changed()
+
+    def test_merge_upserts_and_deletes_clients(
+        self,
+        sut: RedisCbpClientRepository,
+        store: InMemoryCbpClientStore,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        kept, deleted = create_cbp_client(), create_cbp_client()
+        sut.update([kept, deleted])
+        added = create_cbp_client()
+
+        sut.merge([added], [deleted.id])
+
+        assert sut.get_by_id(kept.id) is kept
+        assert sut.find_by_id(deleted.id) is None
+        assert set(store.load()[1]) == {kept.id, added.id}
+
+    def test_merge_reloads_if_other_process_wrote_in_between(
+        self,
+        sut: RedisCbpClientRepository,
+        store: InMemoryCbpClientStore,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        other_client = create_cbp_client()
+        RedisCbpClientRepository(store).update([other_client])
+        client = create_cbp_client()
+
+        sut.merge([client], [])
+
+        assert {c.id for c in sut.get_all()} == {other_client.id, client.id}
+        assert sut.get_generation().generation == store.get_generation()
+
+    def test_fetch_lock_is_exclusive_across_repositories_sharing_store(
+        self, sut: RedisCbpClientRepository, store: InMemoryCbpClientStore
+    ) -> None:
+        other = RedisCbpClientRepository(store)
+
+        with sut.fetch_lock():
+            with raises(TimeoutError):
+                with other.fetch_lock():
+                    pass
+
+        with other.fetch_lock():
+            pass
+
+    def test_pinned_generation_is_unaffected_by_reload(
+        self,
+        sut: RedisCbpClientRepository,
+        store: InMemoryCbpClientStore,
+        create_cbp_client: CreateCbpClient,
+        faker: Faker,
+    ) -> None:
+        client = create_cbp_client(name=faker.company())
+        sut.update([client])
+
+        with sut.pin():
+            RedisCbpClientRepository(store).update([])
+            sut.reload_if_changed()
+
+            assert sut.get_by_id(client.id) is client
+
+        assert sut.find_by_id(client.id) is None
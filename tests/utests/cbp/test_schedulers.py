@@ -0,0 +1,222 @@
+from logging import Logger
+
+from pytest import fixture, raises
+from pytest_mock import MockerFixture
+
+from app.cbp.exceptions import CbpFetchError
+from app.cbp.models import CbpClientsUpdate
+from app.cbp.schedulers import CbpClientSyncScheduler
+from app.cbp.services import CbpClientFetcher
+
+
+class TestCbpClientSyncScheduler:
+    @fixture
+    def fetcher(self, mocker: MockerFixture) -> CbpClientFetcher:
+        return mocker.Mock(spec=CbpClientFetcher)
+
+    @fixture
+    def sut(
+        self, fetcher: CbpClientFetcher, mocker: MockerFixture
+    ) -> CbpClientSyncScheduler:
+        return CbpClientSyncScheduler(fetcher=fetcher, logger=mocker.Mock(spec=Logger))
+
+    def test_request_returns_true_if_no_sync_is_scheduled(
+        self, sut: CbpClientSyncScheduler
+    ) -> None:
+        assert sut.request() is True
+
+    def test_request_merges_requests_into_scheduled_sync(
+        self, sut: CbpClientSyncScheduler, fetcher: CbpClientFetcher
+    ) -> None:
+        assert sut.request() is True
+        assert sut.request() is False
+        assert sut.request() is False
+
+        sut.run()
+
+        fetcher.fetch.assert_called_once_with(use_cache=False)
+
+    def test_run_fetches_once_more_if_requested_while_fetching(
+        self, sut: CbpClientSyncScheduler, fetcher: CbpClientFetcher
+    ) -> None:
+        # Simulate a webhook call arriving while the first fetch is running.
+        fetcher.fetch.side_effect = lambda use_cache: (
+            sut.request() if fetcher.fetch.call_count == 1 else None
+        )
+
+        sut.request()
+        sut.run()
+
+        assert fetcher.fetch.call_count == 2
+
+    def test_request_returns_true_after_sync_finished(
+        self, sut: CbpClientSyncScheduler
+    ) -> None:
+        sut.request()
+        sut.run()
+
+        assert sut.request() is True
+
+    def test_run_resets_state_if_fetch_fails(
+        self, sut: CbpClientSyncScheduler, fetcher: CbpClientFetcher
+    ) -> None:
+        fetcher.fetch.side_effect = OSError("Disk full")
+        sut.request()
+
+        with raises(OSError):
+            sut.run()
+
+        assert sut.request() is True
+
+    def test_run_waits_for_debounce_window(
+        self, fetcher: CbpClientFetcher, mocker: MockerFixture
+    ) -> None:
+        sleep = mocker.patch("app.cbp.schedulers.sleep")
+        sut = CbpClientSyncScheduler(
+            fetcher=fetcher, logger=mocker.Mock(spec=Logger), debounce_seconds=0.5
+        )
+        sut.request()
+
+        sut.run()
+
+        sleep.assert_called_once_with(0.5)
+        fetcher.fetch.assert_called_once()
+
+    def test_run_merges_targeted_requests_into_single_update(
+        self, sut: CbpClientSyncScheduler, fetcher: CbpClientFetcher
+    ) -> None:
+        sut.request(CbpClientsUpdate(client_ids=["a", "b"]))
+        sut.request(CbpClientsUpdate(deleted_client_ids=["b"]))
+
+        sut.run()
+
+        fetcher.fetch.assert_not_called()
+        fetcher.fetch_update.assert_called_once_with(
+            CbpClientsUpdate(client_ids=["a"], deleted_client_ids=["b"])
+        )
+
+    def test_run_fetches_all_clients_if_any_request_is_not_targeted(
+        self, sut: CbpClientSyncScheduler, fetcher: CbpClientFetcher
+    ) -> None:
+        sut.request(CbpClientsUpdate(client_ids=["a"]))
+        sut.request()
+
+        sut.run()
+
+        fetcher.fetch.assert_called_once_with(use_cache=False)
+        fetcher.fetch_update.assert_not_called()
+
+    def test_run_retries_failed_fetch_with_backoff(
+        self, fetcher: CbpClientFetcher, mocker: MockerFixture
+    ) -> None:
+        sut = CbpClientSyncScheduler(
+            fetcher=fetcher,
+            logger=mocker.Mock(spec=Logger),
+            retry_attempts=3,
+            retry_delay_seconds=0.001,
+            retry_max_delay_seconds=0.002,
+        )
+        wait = mocker.spy(
+            sut._CbpClientSyncScheduler__stopped, "wait"  # type: ignore[attr-defined]
+        )
+        fetcher.fetch.side_effect = [CbpFetchError(), CbpFetchError(), None]
+
+        sut.request()
+        sut.run()
+
+        assert fetcher.fetch.call_count == 3
+        assert [c.args[0] for c in wait.call_args_list] == [0.001, 0.002]
+        assert sut.request() is True
+
+    def test_run_retries_targeted_update_merged_with_new_requests(
+        self, fetcher: CbpClientFetcher, mocker: MockerFixture
+    ) -> None:
+        sut = CbpClientSyncScheduler(
+            fetcher=fetcher,
+            logger=mocker.Mock(spec=Logger),
+            retry_attempts=1,
+            retry_delay_seconds=0,
+        )
+
+        def fail_once(_update: CbpClientsUpdate) -> None:
+            if fetcher.fetch_update.call_count == 1:
+                sut.request(CbpClientsUpdate(client_ids=["b"]))
+                raise CbpFetchError()
+
+        fetcher.fetch_update.side_effect = fail_once
+
+        sut.request(CbpClientsUpdate(client_ids=["a"]))
+        sut.run()
+
+        fetcher.fetch_update.assert_called_with(CbpClientsUpdate(client_ids=["a", "b"]))
+        assert fetcher.fetch_update.call_count == 2
+
+    def test_run_gives_up_after_retries_are_exhausted(
+        self, fetcher: CbpClientFetcher, mocker: MockerFixture
+    ) -> None:
+        logger = mocker.Mock(spec=Logger)
+        sut = CbpClientSyncScheduler(
+            fetcher=fetcher, logger=logger, retry_attempts=1, retry_delay_seconds=0
+        )
+        fetcher.fetch.side_effect = CbpFetchError()
+
+        sut.request()
+        sut.run()
+
+        assert fetcher.fetch.call_count == 2
+        logger.error.assert_called_once_with(
+            "Giving up fetching CBP clients after %d attempts", 2
+        )
+        assert sut.request() is True
+
+    def test_run_syncs_requests_merged_into_sync_that_was_given_up(
+        self, sut: CbpClientSyncScheduler, fetcher: CbpClientFetcher
+    ) -> None:
+        def fail_once(_update: CbpClientsUpdate) -> None:
+            if fetcher.fetch_update.call_count == 1:
+                sut.request(CbpClientsUpdate(client_ids=["b"]))
+                raise CbpFetchError()
+
+        fetcher.fetch_update.side_effect = fail_once
+
+        sut.request(CbpClientsUpdate(client_ids=["a"]))
+        sut.run()
+
+        assert fetcher.fetch_update.call_count == 2
+        fetcher.fetch_update.assert_called_with(CbpClientsUpdate(client_ids=["b"]))
+        assert sut.request() is True
+
+    def test_run_keeps_requests_merged_into_sync_that_raised(
+        self, sut: CbpClientSyncScheduler, fetcher: CbpClientFetcher
+    ) -> None:
+        def fail_once(_update: CbpClientsUpdate) -> None:
+            if fetcher.fetch_update.call_count == 1:
+                sut.request(CbpClientsUpdate(client_ids=["b"]))
+                raise OSError("Disk full")
+
+        fetcher.fetch_update.side_effect = fail_once
+        sut.request(CbpClientsUpdate(client_ids=["a"]))
+        with raises(OSError):
+            sut.run()
+
+        assert sut.request(CbpClientsUpdate(client_ids=["c"])) is True
+        sut.run()
+
+        fetcher.fetch_update.assert_called_with(CbpClientsUpdate(client_ids=["b", "c"]))
+
+    def test_stop_interrupts_pending_retry(
+        self, fetcher: CbpClientFetcher, mocker: MockerFixture
+    ) -> None:
+        sut = CbpClientSyncScheduler(
+            fetcher=fetcher,
+            logger=mocker.Mock(spec=Logger),
+            retry_attempts=1,
+            retry_delay_seconds=60,
+        )
+        fetcher.fetch.side_effect = CbpFetchError()
+        sut.stop()
+
+        sut.request()
+        sut.run()
+
+        fetcher.fetch.assert_called_once()
@@ -1,21 +1,37 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
 from logging import Logger
-
-from app.cbp.models import CbpClient
-from app.cbp.repositories import CbpClientRepository
-from app.cbp.services import (
-    CbpClientFactory,
-    CbpClientFetcher,
-    CbpHttpClient,
-    CbpSource,
+from pathlib import Path
+from threading import Event
+from typing import List, Sequence
+
+from app.cbp.exceptions import CbpClientsNotModified, CbpFetchError
+from app.cbp.filesystem_repositories import FilesystemCbpClientRepository
+from app.cbp.generations import CbpClientGeneration
+from app.cbp.models import (
+    CbpClient,
+    CbpClientChanges,
+    CbpClientsResponse,
+    CbpClientsUpdate,
+    CbpResponseValidators,
 )
+from app.cbp.repositories import CbpClientRepository
+from app.cbp.factories import CbpClientFactory
+from app.cbp.redis_repositories import RedisCbpClientRepository
+from app.cbp.services import CbpClientFetcher
+from app.cbp.sources import CbpSource
+from app.cbp.stores import InMemoryCbpClientStore
 from faker import Faker
-from pytest import fixture
+from pytest import fixture, mark, raises
 from pytest_mock import MockerFixture
-from requests import JSONDecodeError, Response
 
 from tests.conftest import CreateCbpClient
 
 
+def _generation(clients: Sequence[CbpClient]) -> CbpClientGeneration:
+    return CbpClientGeneration(1, {client.id: client for client in clients})
+
+
 class TestCbpClientFactory:
     def test_create_returns_cbp_client_with_only_cbp_client_args(
         self, faker: Faker
@@ -34,216 +50,449 @@ class TestCbpClientFactory:
         assert isinstance(result, CbpClient)
 
 
-class TestCbpHttpClient:
+class TestCbpClientFetcher:
     @fixture
-    def logger(self, mocker: MockerFixture) -> Logger:
-        return mocker.Mock(spec=Logger)
+    def cached_cbp_client_repository(
+        self, mocker: MockerFixture
+    ) -> CbpClientRepository:
+        repository = mocker.MagicMock(spec=CbpClientRepository)
+        repository.get_generation.return_value = CbpClientGeneration(0, {})
+        repository.reload_if_changed.return_value = False
+        return repository
 
     @fixture
-    def sut(self, logger: Logger) -> CbpHttpClient:
-        return CbpHttpClient(logger=logger, base_url="http://example.com")
+    def cbp_source(self, mocker: MockerFixture) -> CbpSource:
+        return mocker.Mock(spec=CbpSource)
 
-    def test_get_clients_returns_cbp_clients(
+    @fixture
+    def sut(
         self,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
         mocker: MockerFixture,
-        faker: Faker,
-        sut: CbpHttpClient,
-    ) -> None:
-        response = mocker.Mock(spec=Response)
-        clients = [
-            {
-                "id": faker.uuid4(),
-                "redirect_uris": [faker.uri()],
-                "client_secret": None,
-                "active": faker.boolean(),
-                "created_at": str(faker.date_time()),
-                "updated_at": str(faker.date_time()),
-            }
-            for _ in range(3)
-        ]
-        mocker.patch(
-            "app.cbp.services.requests.get",
-            return_value=response,
-            autospec=True,
+    ) -> CbpClientFetcher:
+        return CbpClientFetcher(
+            logger=mocker.Mock(spec=Logger),
+            cached_cbp_client_repository=cached_cbp_client_repository,
+            cbp_source=cbp_source,
         )
-        response.json.return_value = {"clients": clients}
 
-        result = sut.get_clients()
+    def test_fetch_fetches_clients_from_cbp_if_cached_clients_is_empty(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        clients = [create_cbp_client() for _ in range(2)]
+        cbp_source.get_clients.return_value = CbpClientsResponse(clients=clients)
+
+        sut.fetch(use_cache=True)
+
+        cbp_source.get_clients.assert_called_once()
+        cached_cbp_client_repository.update.assert_called_once_with(clients)
+
+    @mark.parametrize("error", [ConnectionError("Redis is down"), TimeoutError()])
+    def test_fetch_raises_fetch_error_if_cache_is_unavailable(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        error: OSError,
+    ) -> None:
+        cached_cbp_client_repository.fetch_lock.side_effect = error
+
+        with raises(CbpFetchError, match="CBP client cache is unavailable"):
+            sut.fetch(use_cache=False)
 
-        assert len(result) == 3
+        cbp_source.get_clients.assert_not_called()
+        assert sut.last_error is not None
 
-    def test_get_clients_empty_response_if_connection_fails(
+    def test_fetch_reloads_cache_while_holding_fetch_lock(
         self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
         mocker: MockerFixture,
-        sut: CbpHttpClient,
-        logger: Logger,
     ) -> None:
-        exception = ConnectionError("Connection refused")
-        mocker.patch(
-            "app.cbp.services.requests.get",
-            side_effect=exception,
-            autospec=True,
+        cached_cbp_client_repository.get_generation.return_value = _generation(
+            [create_cbp_client()]
+        )
+        manager = mocker.Mock()
+        manager.attach_mock(cached_cbp_client_repository.fetch_lock, "fetch_lock")
+        manager.attach_mock(
+            cached_cbp_client_repository.reload_if_changed, "reload_if_changed"
         )
 
-        result = sut.get_clients()
+        sut.fetch(use_cache=True)
 
-        assert len(result) == 0
-        logger.exception.assert_called_once_with(
-            "Failed to connect to CBP", exc_info=exception
-        )
+        assert [call[0] for call in manager.mock_calls] == [
+            "reload_if_changed",
+            "fetch_lock",
+            "fetch_lock().__enter__",
+            "reload_if_changed",
+            "fetch_lock().__exit__",
+        ]
+        cbp_source.get_clients.assert_not_called()
 
-    def test_get_clients_empty_response_if_no_json_response(
+    @mark.parametrize("reloaded_while_waiting", [False, True])
+    def test_fetch_uses_clients_fetched_by_other_process_while_waiting_for_lock(
         self,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
         mocker: MockerFixture,
-        sut: CbpHttpClient,
-        logger: Logger,
+        reloaded_while_waiting: bool,
     ) -> None:
-        response = mocker.Mock(spec=Response)
-        exception = JSONDecodeError("Invalid JSON", "", 0)
-        mocker.patch(
-            "app.cbp.services.requests.get",
-            return_value=response,
-            autospec=True,
+        store = InMemoryCbpClientStore()
+        fetching, waiting = (
+            RedisCbpClientRepository(store),
+            RedisCbpClientRepository(store),
         )
-        response.json.side_effect = exception
+        clients = [create_cbp_client() for _ in range(2)]
+        queued = Event()
+        reload_if_changed = waiting.reload_if_changed
 
-        result = sut.get_clients()
+        def reload_and_signal() -> bool:
+            changed = reload_if_changed()
+            queued.set()
+            return changed
 
-        assert len(result) == 0
-        logger.exception.assert_called_once_with(
-            "Failed to parse CBP response as JSON", exc_info=exception
-        )
-        logger.error.assert_called_once_with(
-            "Missing 'clients' property in CBP response: %s", {}
+        mocker.patch.object(waiting, "reload_if_changed", side_effect=reload_and_signal)
+        if reloaded_while_waiting:
+            update = fetching.update
+
+            def update_and_notify(updated_clients: Sequence[CbpClient]) -> None:
+                # As the notification listener of the waiting process would.
+                update(updated_clients)
+                assert reload_if_changed()
+
+            mocker.patch.object(fetching, "update", side_effect=update_and_notify)
+        waiting_fetcher = CbpClientFetcher(
+            logger=mocker.Mock(spec=Logger),
+            cached_cbp_client_repository=waiting,
+            cbp_source=cbp_source,
         )
 
-    def test_get_clients_empty_response_if_json_structure_is_invalid(
+        waiting_fetch: List["Future[None]"] = []
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+
+            def get_clients(conditional: bool) -> CbpClientsResponse:
+                # Queue the other fetch while this one holds the lock.
+                assert conditional
+                waiting_fetch.append(
+                    executor.submit(waiting_fetcher.fetch, use_cache=False)
+                )
+                queued.wait(timeout=5)
+                return CbpClientsResponse(clients=clients)
+
+            cbp_source.get_clients.side_effect = get_clients
+            CbpClientFetcher(
+                logger=mocker.Mock(spec=Logger),
+                cached_cbp_client_repository=fetching,
+                cbp_source=cbp_source,
+            ).fetch(use_cache=False)
+            waiting_fetch[0].result(timeout=5)
+
+        cbp_source.get_clients.assert_called_once()
+        assert set(waiting.get_generation().ids()) == {client.id for client in clients}
+        assert waiting_fetcher.ready
+
+    def test_fetch_fetches_clients_from_cbp_if_use_cache_is_false(
         self,
-        mocker: MockerFixture,
-        sut: CbpHttpClient,
-        logger: Logger,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
     ) -> None:
-        response = mocker.Mock(spec=Response)
-        json = {"invalid": "structure"}
-        mocker.patch(
-            "app.cbp.services.requests.get",
-            return_value=response,
-            autospec=True,
-        )
-        response.json.return_value = json
+        clients = [create_cbp_client() for _ in range(2)]
+        cbp_source.get_clients.return_value = CbpClientsResponse(clients=clients)
 
-        result = sut.get_clients()
+        sut.fetch(use_cache=False)
 
-        assert len(result) == 0
-        logger.error.assert_called_once_with(
-            "Missing 'clients' property in CBP response: %s", json
+        cbp_source.get_clients.assert_called_once()
+        cached_cbp_client_repository.update.assert_called_once_with(clients)
+
+    def test_fetch_is_idle_if_cached_clients_is_not_empty_and_use_cache_is_true(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        clients = [create_cbp_client() for _ in range(2)]
+        cached_cbp_client_repository.get_generation.return_value = _generation(clients)
+
+        sut.fetch(use_cache=True)
+
+        cbp_source.get_clients.assert_not_called()
+        cached_cbp_client_repository.update.assert_not_called()
+
+    def test_fetch_keeps_cache_if_clients_are_not_modified(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        cbp_source.get_clients.side_effect = CbpClientsNotModified()
+        cached_cbp_client_repository.get_generation.return_value = _generation(
+            [create_cbp_client()]
         )
 
-    def test_get_clients_empty_response_if_client_data_is_invalid(
+        sut.fetch(use_cache=False)
+
+        cbp_source.get_clients.assert_called_once_with(conditional=True)
+        cached_cbp_client_repository.update.assert_not_called()
+
+    def test_fetch_refetches_unconditionally_if_not_modified_and_cache_is_empty(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        clients = [create_cbp_client()]
+        cbp_source.get_clients.side_effect = [
+            CbpClientsNotModified(),
+            CbpClientsResponse(clients=clients),
+        ]
+
+        sut.fetch(use_cache=False)
+
+        assert cbp_source.get_clients.call_count == 2
+        cached_cbp_client_repository.update.assert_called_once_with(clients)
+
+    def test_fetch_saves_validators_after_caching_clients(
         self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
         mocker: MockerFixture,
-        faker: Faker,
-        sut: CbpHttpClient,
-        logger: Logger,
-    ) -> None:
-        response = mocker.Mock(spec=Response)
-        json = {
-            "clients": [
-                {
-                    "redirect_uris": [faker.uri()],
-                    "client_secret": None,
-                    "active": faker.boolean(),
-                    "created_at": str(faker.date_time()),
-                    "updated_at": str(faker.date_time()),
-                }
-            ]
-        }
-        mocker.patch(
-            "app.cbp.services.requests.get",
-            return_value=response,
-            autospec=True,
+    ) -> None:
+        validators = CbpResponseValidators(etag='"v1"')
+        cbp_source.get_clients.return_value = CbpClientsResponse(
+            clients=[create_cbp_client()], validators=validators
         )
-        response.json.return_value = json
+        manager = mocker.Mock()
+        manager.attach_mock(cached_cbp_client_repository.update, "update")
+        manager.attach_mock(cbp_source.save_validators, "save_validators")
 
-        result = sut.get_clients()
+        sut.fetch(use_cache=False)
 
-        assert len(result) == 0
-        logger.exception.assert_called_once()
-        msg, kwargs = logger.exception.call_args
-        assert msg[0] == "Failed to parse CBP client data"
-        assert "exc_info" in kwargs
-        assert isinstance(kwargs["exc_info"], ValueError)
+        assert [call[0] for call in manager.mock_calls] == [
+            "update",
+            "save_validators",
+        ]
+        cbp_source.save_validators.assert_called_once_with(validators)
 
+    def test_fetch_does_not_save_validators_if_caching_fails(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        cbp_source.get_clients.return_value = CbpClientsResponse(
+            clients=[create_cbp_client()],
+            validators=CbpResponseValidators(etag='"v1"'),
+        )
+        cached_cbp_client_repository.update.side_effect = OSError
 
-class TestCbpClientFetcher:
-    @fixture
-    def cached_cbp_client_repository(
-        self, mocker: MockerFixture
-    ) -> CbpClientRepository:
-        return mocker.Mock(spec=CbpClientRepository)
+        with raises(OSError):
+            sut.fetch(use_cache=False)
 
-    @fixture
-    def cbp_source(self, mocker: MockerFixture) -> CbpSource:
-        return mocker.Mock(spec=CbpSource)
+        cbp_source.save_validators.assert_not_called()
 
-    @fixture
-    def sut(
+    def test_fetch_merges_changed_clients_if_incremental_sync_is_enabled(
         self,
         cached_cbp_client_repository: CbpClientRepository,
         cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
         mocker: MockerFixture,
-    ) -> CbpClientFetcher:
-        return CbpClientFetcher(
+        faker: Faker,
+    ) -> None:
+        sut = CbpClientFetcher(
             logger=mocker.Mock(spec=Logger),
             cached_cbp_client_repository=cached_cbp_client_repository,
             cbp_source=cbp_source,
+            incremental_sync=True,
+        )
+        older = create_cbp_client(updated_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+        newer = create_cbp_client(updated_at=datetime(2026, 2, 1, tzinfo=timezone.utc))
+        cached_cbp_client_repository.get_generation.return_value = _generation(
+            [older, newer]
+        )
+        changes = CbpClientChanges(
+            clients=[create_cbp_client()], deleted_client_ids=[faker.uuid4()]
         )
+        cbp_source.get_changed_clients.return_value = changes
 
-    def test_fetch_fetches_clients_from_cbp_if_cached_clients_is_empty(
+        sut.fetch(use_cache=False)
+
+        cbp_source.get_changed_clients.assert_called_once_with(newer.updated_at)
+        cbp_source.get_clients.assert_not_called()
+        cached_cbp_client_repository.merge.assert_called_once_with(
+            changes.clients, changes.deleted_client_ids
+        )
+        cached_cbp_client_repository.update.assert_not_called()
+
+    def test_fetch_does_not_hydrate_clients_of_lazily_loaded_cache(
+        self,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
+        mocker: MockerFixture,
+        tmp_path: Path,
+    ) -> None:
+        clients = [create_cbp_client() for _ in range(3)]
+        filepath = str(tmp_path.joinpath("clients.json"))
+        FilesystemCbpClientRepository(filepath).update(clients)
+        repository = FilesystemCbpClientRepository(filepath, lazy=True)
+        cbp_source.get_changed_clients.return_value = CbpClientChanges()
+        sut = CbpClientFetcher(
+            logger=mocker.Mock(spec=Logger),
+            cached_cbp_client_repository=repository,
+            cbp_source=cbp_source,
+            incremental_sync=True,
+        )
+
+        sut.fetch(use_cache=True)
+        sut.fetch(use_cache=False)
+
+        assert not repository.get_generation().hydrated_clients
+        cbp_source.get_clients.assert_not_called()
+        cbp_source.get_changed_clients.assert_called_once_with(
+            max(client.updated_at for client in clients)
+        )
+
+    def test_fetch_update_merges_fetched_and_included_clients(
         self,
         sut: CbpClientFetcher,
         cached_cbp_client_repository: CbpClientRepository,
         cbp_source: CbpSource,
         create_cbp_client: CreateCbpClient,
+        faker: Faker,
     ) -> None:
-        clients = [create_cbp_client() for _ in range(2)]
-        cbp_source.get_clients.return_value = clients
-        cached_cbp_client_repository.get_all.return_value = []
+        cached_cbp_client_repository.get_generation.return_value = _generation(
+            [create_cbp_client()]
+        )
+        included = create_cbp_client()
+        fetched = create_cbp_client()
+        deleted_client_id, missing_client_id = faker.uuid4(), faker.uuid4()
+        cbp_source.get_clients_by_ids.return_value = CbpClientChanges(
+            clients=[fetched], deleted_client_ids=[missing_client_id]
+        )
 
-        sut.fetch(use_cache=True)
+        sut.fetch_update(
+            CbpClientsUpdate(
+                client_ids=[fetched.id, missing_client_id],
+                deleted_client_ids=[deleted_client_id],
+                clients=[included.model_dump(mode="json")],
+            )
+        )
 
-        cached_cbp_client_repository.get_all.assert_called_once()
-        cbp_source.get_clients.assert_called_once()
-        cached_cbp_client_repository.update.assert_called_once_with(clients)
+        cbp_source.get_clients_by_ids.assert_called_once_with(
+            [fetched.id, missing_client_id]
+        )
+        cbp_source.get_clients.assert_not_called()
+        clients, deleted_client_ids = cached_cbp_client_repository.merge.call_args.args
+        assert [client.id for client in clients] == [included.id, fetched.id]
+        assert deleted_client_ids == [deleted_client_id, missing_client_id]
 
-    def test_fetch_fetches_clients_from_cbp_if_use_cache_is_false(
+    def test_fetch_update_fetches_all_clients_if_cache_is_empty(
         self,
         sut: CbpClientFetcher,
         cached_cbp_client_repository: CbpClientRepository,
         cbp_source: CbpSource,
         create_cbp_client: CreateCbpClient,
     ) -> None:
-        clients = [create_cbp_client() for _ in range(2)]
-        cbp_source.get_clients.return_value = clients
+        clients = [create_cbp_client()]
+        cbp_source.get_clients.return_value = CbpClientsResponse(clients=clients)
+
+        sut.fetch_update(CbpClientsUpdate(client_ids=[clients[0].id]))
+
+        cbp_source.get_clients_by_ids.assert_not_called()
+        cached_cbp_client_repository.update.assert_called_once_with(clients)
+        assert sut.ready
+
+    def test_fetch_fetches_all_clients_if_incremental_sync_has_no_cache(
+        self,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+        create_cbp_client: CreateCbpClient,
+        mocker: MockerFixture,
+    ) -> None:
+        sut = CbpClientFetcher(
+            logger=mocker.Mock(spec=Logger),
+            cached_cbp_client_repository=cached_cbp_client_repository,
+            cbp_source=cbp_source,
+            incremental_sync=True,
+        )
+        clients = [create_cbp_client()]
+        cbp_source.get_clients.return_value = CbpClientsResponse(clients=clients)
 
         sut.fetch(use_cache=False)
 
-        cached_cbp_client_repository.get_all.assert_not_called()
-        cbp_source.get_clients.assert_called_once()
+        cbp_source.get_changed_clients.assert_not_called()
         cached_cbp_client_repository.update.assert_called_once_with(clients)
 
-    def test_fetch_is_idle_if_cached_clients_is_not_empty_and_use_cache_is_true(
+    def test_ready_is_true_if_cache_holds_clients(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        faker: Faker,
+    ) -> None:
+        cached_cbp_client_repository.clients_as_mapping = {faker.uuid4(): {}}
+
+        assert sut.ready
+
+    def test_ready_is_false_until_first_fetch_completes(
         self,
         sut: CbpClientFetcher,
         cached_cbp_client_repository: CbpClientRepository,
         cbp_source: CbpSource,
-        create_cbp_client: CreateCbpClient,
     ) -> None:
-        clients = [create_cbp_client() for _ in range(2)]
-        cached_cbp_client_repository.get_all.return_value = clients
+        cached_cbp_client_repository.clients_as_mapping = {}
+        cbp_source.get_clients.side_effect = OSError
 
-        sut.fetch(use_cache=True)
+        with raises(OSError):
+            sut.fetch(use_cache=False)
+
+        assert not sut.ready
+
+        cbp_source.get_clients.side_effect = None
+        cbp_source.get_clients.return_value = CbpClientsResponse()
+        sut.fetch(use_cache=False)
+
+        assert sut.ready
+
+    def test_fetch_keeps_cache_and_records_error_if_fetch_fails(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+    ) -> None:
+        cbp_source.get_clients.side_effect = CbpFetchError("Failed to connect to CBP")
+
+        with raises(CbpFetchError):
+            sut.fetch(use_cache=False)
 
-        cached_cbp_client_repository.get_all.assert_called_once()
-        cbp_source.get_clients.assert_not_called()
         cached_cbp_client_repository.update.assert_not_called()
+        assert sut.last_error == "Failed to connect to CBP"
+        assert sut.last_fetched_at is None
+
+    def test_fetch_replaces_cache_if_cbp_has_no_clients(
+        self,
+        sut: CbpClientFetcher,
+        cached_cbp_client_repository: CbpClientRepository,
+        cbp_source: CbpSource,
+    ) -> None:
+        cbp_source.get_clients.return_value = CbpClientsResponse()
+
+        sut.fetch(use_cache=False)
+
+        cached_cbp_client_repository.update.assert_called_once_with([])
+        assert sut.last_error is None
+        assert sut.last_fetched_at is not None
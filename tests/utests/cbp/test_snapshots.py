@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from pytest import fixture, raises
+
+from app.cbp.snapshots import CbpClientSnapshot
+
+
+class TestCbpClientSnapshot:
+    @fixture
+    def filepath(self, tmp_path: Path) -> Path:
+        return tmp_path.joinpath("clients.snapshot")
+
+    def test_write_and_open_round_trip(self, filepath: Path) -> None:
+        records = [("a", b'{"id": "a"}'), ("bé", b'{"id": "b\\u00e9"}')]
+
+        CbpClientSnapshot.write(str(filepath), records)
+
+        with CbpClientSnapshot.open(str(filepath)) as snapshot:
+            assert len(snapshot) == 2
+            assert "a" in snapshot
+            assert list(snapshot.ids()) == ["a", "bé"]
+            assert snapshot.get("bé") == b'{"id": "b\\u00e9"}'
+            assert snapshot.get("missing") is None
+            assert list(snapshot.records()) == records
+
+    def test_write_replaces_existing_snapshot_without_leaving_temp_files(
+        self, filepath: Path
+    ) -> None:
+        CbpClientSnapshot.write(str(filepath), [("a", b"{}")])
+        CbpClientSnapshot.write(str(filepath), [("b", b"{}")])
+
+        with CbpClientSnapshot.open(str(filepath)) as snapshot:
+            assert list(snapshot.ids()) == ["b"]
+        assert list(filepath.parent.iterdir()) == [filepath]
+
+    def test_open_keeps_serving_a_replaced_snapshot(self, filepath: Path) -> None:
+        CbpClientSnapshot.write(str(filepath), [("a", b'{"v": 1}')])
+
+        with CbpClientSnapshot.open(str(filepath)) as snapshot:
+            CbpClientSnapshot.write(str(filepath), [("a", b'{"v": 2}')])
+
+            assert snapshot.get("a") == b'{"v": 1}'
+
+    def test_open_empty_file_returns_empty_snapshot(self, filepath: Path) -> None:
+        filepath.write_bytes(b"")
+
+        with CbpClientSnapshot.open(str(filepath)) as snapshot:
+            assert len(snapshot) == 0
+
+    def test_is_snapshot(self, filepath: Path) -> None:
+        filepath.write_text("[]", encoding="utf-8")
+        assert not CbpClientSnapshot.is_snapshot(str(filepath))
+
+        CbpClientSnapshot.write(str(filepath), [])
+        assert CbpClientSnapshot.is_snapshot(str(filepath))
+
+    def test_open_raises_if_file_is_not_a_snapshot(self, filepath: Path) -> None:
+        filepath.write_text("[" + " " * 32 + "]", encoding="utf-8")
+
+        with raises(ValueError, match="not a CBP snapshot"):
+            CbpClientSnapshot.open(str(filepath))
+
+    def test_open_raises_if_snapshot_is_truncated(self, filepath: Path) -> None:
+        CbpClientSnapshot.write(str(filepath), [("a", b'{"id": "a"}')])
+        filepath.write_bytes(filepath.read_bytes()[:-3])
+
+        with raises(ValueError, match="truncated"):
+            CbpClientSnapshot.open(str(filepath))
@@ -0,0 +1,79 @@
+from pytest import fixture, raises
+from pytest_mock import MockerFixture
+from redis import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.cbp.stores import RedisCbpClientStore
+
+
+class TestRedisCbpClientStore:
+    @fixture
+    def redis(self, mocker: MockerFixture) -> Redis:
+        return mocker.MagicMock(spec=Redis)
+
+    @fixture
+    def sut(self, redis: Redis) -> RedisCbpClientStore:
+        return RedisCbpClientStore(
+            redis, key_prefix="vad:cbp", lock_timeout=10, lock_blocking_timeout=1
+        )
+
+    def test_get_generation_defaults_to_zero(
+        self, sut: RedisCbpClientStore, redis: Redis
+    ) -> None:
+        redis.get.return_value = None
+
+        assert sut.get_generation() == 0
+        redis.get.assert_called_once_with("vad:cbp:generation")
+
+    def test_load_decodes_client_ids(
+        self, sut: RedisCbpClientStore, redis: Redis
+    ) -> None:
+        pipeline = redis.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [b"3", {b"client": b"{}"}]
+
+        assert sut.load() == (3, {"client": b"{}"})
+
+    def test_replace_increments_generation_in_same_transaction(
+        self, sut: RedisCbpClientStore, redis: Redis
+    ) -> None:
+        pipeline = redis.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [1, 1, 4]
+
+        assert sut.replace({"client": b"{}"}) == 4
+        pipeline.delete.assert_called_once_with("vad:cbp:clients")
+        pipeline.hset.assert_called_once_with(
+            "vad:cbp:clients", mapping={"client": b"{}"}
+        )
+        pipeline.incr.assert_called_once_with("vad:cbp:generation")
+
+    def test_redis_errors_are_raised_as_connection_error(
+        self, sut: RedisCbpClientStore, redis: Redis
+    ) -> None:
+        redis.get.side_effect = RedisConnectionError("unreachable")
+
+        with raises(ConnectionError, match="unreachable"):
+            sut.get_generation()
+
+    def test_lock_raises_timeout_error_if_not_acquired(
+        self, sut: RedisCbpClientStore, redis: Redis
+    ) -> None:
+        redis.lock.return_value.acquire.return_value = False
+
+        with raises(TimeoutError):
+            with sut.lock():
+                pass
+
+        redis.lock.return_value.release.assert_not_called()
+
+    def test_lock_releases_lock_on_exit(
+        self, sut: RedisCbpClientStore, redis: Redis
+    ) -> None:
+        redis.lock.return_value.acquire.return_value = True
+
+        with sut.lock():
+            redis.lock.return_value.release.assert_not_called()
+
+        redis.lock.assert_called_once_with(
+            "vad:cbp:fetch-lock", timeout=10, blocking_timeout=1
+        )
+        redis.lock.return_value.release.assert_called_once()
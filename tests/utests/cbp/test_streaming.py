@@ -0,0 +1,52 @@
+import json
+from typing import Any, List
+
+from pytest import mark, raises
+
+from app.cbp.streaming import JsonArrayStreamReader
+
+
+def _chunked(data: bytes, size: int) -> List[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestJsonArrayStreamReader:
+    @mark.parametrize("chunk_size", [1, 3, 16, 1024])
+    def test_yields_array_items_across_chunk_boundaries(self, chunk_size: int) -> None:
+        document: dict[str, Any] = {
+            "total": 123456,
+            "meta": {"clients": ["nested"]},
+            "clients": [
+                {"id": str(i), "name": "Zorgverlener é€", "values": [1.5, None, True]}
+                for i in range(25)
+            ],
+            "trailing": "ignored",
+        }
+        data = json.dumps(document, ensure_ascii=False).encode("utf-8")
+
+        result = list(JsonArrayStreamReader(_chunked(data, chunk_size), "clients"))
+
+        assert result == document["clients"]
+
+    def test_does_not_truncate_numbers_split_over_chunks(self) -> None:
+        chunks = [b'{"clients": [12', b"34, 5]}"]
+
+        assert list(JsonArrayStreamReader(chunks, "clients")) == [1234, 5]
+
+    def test_yields_nothing_for_empty_array(self) -> None:
+        assert not list(JsonArrayStreamReader([b'{"clients": []}'], "clients"))
+
+    @mark.parametrize(
+        "data, message",
+        [
+            (b'{"other": []}', "Missing 'clients' property"),
+            (b"[]", "Expected '{'"),
+            (b'{"clients": [1 2]}', "Expected ','"),
+            (b'{"clients": [{"id": 1},', "Unexpected end of JSON stream"),
+        ],
+    )
+    def test_raises_value_error_for_invalid_documents(
+        self, data: bytes, message: str
+    ) -> None:
+        with raises(ValueError, match=message):
+            list(JsonArrayStreamReader([data], "clients"))
@@ -0,0 +1,41 @@
+from logging import Logger
+
+from faker import Faker
+from pytest import fixture
+from pytest_mock import MockerFixture
+
+from app.cbp.validation import CbpClientBatchValidator
+
+
+class TestCbpClientBatchValidator:
+    @fixture
+    def logger(self, mocker: MockerFixture) -> Logger:
+        return mocker.Mock(spec=Logger)
+
+    @fixture
+    def sut(self, logger: Logger) -> CbpClientBatchValidator:
+        return CbpClientBatchValidator(logger)
+
+    def test_validate_reports_index_of_invalid_clients_across_batches(
+        self, sut: CbpClientBatchValidator, logger: Logger, faker: Faker
+    ) -> None:
+        clients_data = [
+            {
+                "id": faker.uuid4(),
+                "redirect_uris": [faker.uri()],
+                "client_secret": None,
+                "active": True,
+                "created_at": str(faker.date_time()),
+                "updated_at": str(faker.date_time()),
+            }
+            for _ in range(5)
+        ]
+        clients_data[3]["created_at"] = "yesterday"
+
+        result = sut.validate(iter(clients_data), batch_size=2)
+
+        assert len(result) == 4
+        logger.warning.assert_called_once()
+        _, client_id, index, _ = logger.warning.call_args.args
+        assert client_id == clients_data[3]["id"]
+        assert index == 3
@@ -0,0 +1,265 @@
+from logging import Logger
+from pathlib import Path
+
+from pytest import fixture
+from pytest_mock import MockerFixture
+
+from app.cbp.directory_sources import DirectoryCbpSource
+from app.cbp.exceptions import CbpFetchError
+from app.cbp.models import CbpClientsUpdate
+from app.cbp.notifications import (
+    CbpClientNotificationChannel,
+    InMemoryCbpClientNotificationChannel,
+)
+from app.cbp.redis_repositories import RedisCbpClientRepository
+from app.cbp.repositories import CbpClientRepository
+from app.cbp.schedulers import CbpClientSyncScheduler
+from app.cbp.stores import InMemoryCbpClientStore
+from app.cbp.watchers import (
+    CbpClientCacheWatcher,
+    CbpClientNotificationListener,
+    CbpClientSourceWatcher,
+)
+from tests.conftest import CreateCbpClient
+
+
+class TestCbpClientCacheWatcher:
+    @fixture
+    def logger(self, mocker: MockerFixture) -> Logger:
+        return mocker.Mock(spec=Logger)
+
+    @fixture
+    def client_repository(self, mocker: MockerFixture) -> CbpClientRepository:
+        return mocker.Mock(spec=CbpClientRepository)
+
+    @fixture
+    def sut(
+        self, logger: Logger, client_repository: CbpClientRepository
+    ) -> CbpClientCacheWatcher:
+        return CbpClientCacheWatcher(
+            logger=logger, client_repository=client_repository, interval_seconds=1
+        )
+
+    def test_poll_reloads_repository(
+        self,
+        sut: CbpClientCacheWatcher,
+        client_repository: CbpClientRepository,
+        logger: Logger,
+    ) -> None:
+        client_repository.reload_if_changed.return_value = True
+
+        sut.poll()
+
+        client_repository.reload_if_changed.assert_called_once()
+        logger.info.assert_called_once()
+
+    def test_poll_logs_reload_failures(
+        self,
+        sut: CbpClientCacheWatcher,
+        client_repository: CbpClientRepository,
+        logger: Logger,
+    ) -> None:
+        exception = ValueError("File is not a CBP snapshot")
+        client_repository.reload_if_changed.side_effect = exception
+
+        sut.poll()
+
+        logger.exception.assert_called_once_with(
+            "Failed to reload CBP clients", exc_info=exception
+        )
+
+    def test_enabled_is_false_if_interval_is_zero(
+        self, logger: Logger, client_repository: CbpClientRepository
+    ) -> None:
+        sut = CbpClientCacheWatcher(
+            logger=logger, client_repository=client_repository, interval_seconds=0
+        )
+
+        assert sut.enabled is False
+
+
+class TestCbpClientNotificationListener:
+    @fixture
+    def logger(self, mocker: MockerFixture) -> Logger:
+        return mocker.Mock(spec=Logger)
+
+    @fixture
+    def store(self) -> InMemoryCbpClientStore:
+        return InMemoryCbpClientStore()
+
+    @fixture
+    def channel(self) -> InMemoryCbpClientNotificationChannel:
+        return InMemoryCbpClientNotificationChannel()
+
+    @fixture
+    def client_repository(
+        self, store: InMemoryCbpClientStore
+    ) -> RedisCbpClientRepository:
+        return RedisCbpClientRepository(store)
+
+    @fixture
+    def sut(
+        self,
+        logger: Logger,
+        client_repository: CbpClientRepository,
+        channel: CbpClientNotificationChannel,
+    ) -> CbpClientNotificationListener:
+        return CbpClientNotificationListener(
+            logger=logger,
+            client_repository=client_repository,
+            notification_channel=channel,
+            enabled=True,
+            receive_timeout_seconds=0.01,
+        )
+
+    def test_receive_reloads_clients_published_by_other_worker(
+        self,
+        sut: CbpClientNotificationListener,
+        client_repository: CbpClientRepository,
+        store: InMemoryCbpClientStore,
+        channel: InMemoryCbpClientNotificationChannel,
+        create_cbp_client: CreateCbpClient,
+    ) -> None:
+        client = create_cbp_client()
+        RedisCbpClientRepository(store, notification_channel=channel).update([client])
+
+        assert sut.receive() is True
+        assert client_repository.get_by_id(client.id).id == client.id
+
+    def test_receive_skips_generation_that_is_already_loaded(
+        self,
+        sut: CbpClientNotificationListener,
+        client_repository: CbpClientRepository,
+        channel: InMemoryCbpClientNotificationChannel,
+        mocker: MockerFixture,
+    ) -> None:
+        reload_if_changed = mocker.spy(client_repository, "reload_if_changed")
+        channel.publish(client_repository.get_generation().generation)
+
+        assert sut.receive() is True
+        reload_if_changed.assert_not_called()
+
+    def test_receive_returns_false_if_channel_fails(
+        self,
+        logger: Logger,
+        client_repository: CbpClientRepository,
+        mocker: MockerFixture,
+    ) -> None:
+        channel = mocker.Mock(spec=CbpClientNotificationChannel)
+        channel.receive.side_effect = ConnectionError("unreachable")
+        sut = CbpClientNotificationListener(
+            logger=logger,
+            client_repository=client_repository,
+            notification_channel=channel,
+            enabled=True,
+        )
+
+        assert sut.receive() is False
+        logger.warning.assert_called_once()
+
+
+class TestCbpClientSourceWatcher:
+    @fixture
+    def source(self, mocker: MockerFixture) -> DirectoryCbpSource:
+        return mocker.Mock(spec=DirectoryCbpSource)
+
+    @fixture
+    def sync_scheduler(self, mocker: MockerFixture) -> CbpClientSyncScheduler:
+        return mocker.Mock(spec=CbpClientSyncScheduler)
+
+    @fixture
+    def sut(
+        self,
+        source: DirectoryCbpSource,
+        sync_scheduler: CbpClientSyncScheduler,
+        mocker: MockerFixture,
+    ) -> CbpClientSourceWatcher:
+        return CbpClientSourceWatcher(
+            logger=mocker.Mock(spec=Logger),
+            sync_scheduler=sync_scheduler,
+            source=source,
+            interval_seconds=1,
+        )
+
+    def test_poll_syncs_changed_clients(
+        self,
+        sut: CbpClientSourceWatcher,
+        source: DirectoryCbpSource,
+        sync_scheduler: CbpClientSyncScheduler,
+    ) -> None:
+        update = CbpClientsUpdate(deleted_client_ids=["removed"])
+        source.poll.return_value = update
+        sync_scheduler.request.return_value = True
+
+        sut.poll()
+
+        sync_scheduler.request.assert_called_once_with(update)
+        sync_scheduler.run.assert_called_once()
+
+    def test_poll_is_idle_if_nothing_changed(
+        self,
+        sut: CbpClientSourceWatcher,
+        source: DirectoryCbpSource,
+        sync_scheduler: CbpClientSyncScheduler,
+    ) -> None:
+        source.poll.return_value = CbpClientsUpdate()
+
+        sut.poll()
+
+        sync_scheduler.request.assert_not_called()
+
+    def test_poll_ignores_source_failures(
+        self,
+        sut: CbpClientSourceWatcher,
+        source: DirectoryCbpSource,
+        sync_scheduler: CbpClientSyncScheduler,
+    ) -> None:
+        source.poll.side_effect = CbpFetchError("Directory is gone")
+
+        sut.poll()
+
+        sync_scheduler.request.assert_not_called()
+
+    def test_enabled_is_false_without_directory_source(
+        self, sync_scheduler: CbpClientSyncScheduler, mocker: MockerFixture
+    ) -> None:
+        sut = CbpClientSourceWatcher(
+            logger=mocker.Mock(spec=Logger),
+            sync_scheduler=sync_scheduler,
+            source=None,
+            interval_seconds=1,
+        )
+
+        assert sut.enabled is False
+
+    def test_poll_only_syncs_in_worker_holding_lock(
+        self,
+        source: DirectoryCbpSource,
+        sync_scheduler: CbpClientSyncScheduler,
+        mocker: MockerFixture,
+        tmp_path: Path,
+    ) -> None:
+        lock_filepath = str(tmp_path.joinpath("clients.snap.watch.lock"))
+        suts = [
+            CbpClientSourceWatcher(
+                logger=mocker.Mock(spec=Logger),
+                sync_scheduler=sync_scheduler,
+                source=source,
+                interval_seconds=1,
+                lock_filepath=lock_filepath,
+            )
+            for _ in range(2)
+        ]
+        source.poll.return_value = CbpClientsUpdate(deleted_client_ids=["removed"])
+        sync_scheduler.request.return_value = True
+
+        suts[0].poll()
+        suts[1].poll()
+
+        assert source.poll.call_count == 1
+
+        suts[0].close()
+        suts[1].poll()
+
+        assert source.poll.call_count == 2
+        suts[1].close()
@@ -1,11 +1,13 @@
 import pytest
 
 from pydantic import ValidationError
+from pytest_mock import MockerFixture
 from max_core.config.schemas import AppConfig
 
 
 from app.config.schemas import (
     BrpConfig,
+    CbpFileCacheConfig,
     PrsConfig,
     PrsRepositoryType,
     VadConfig,
@@ -42,3 +44,38 @@ def test_it_requires_base_url_when_using_prs_api_repo(
         )
 
     assert expected_error in str(e.value)
+
+
+def test_it_disables_brp_cache_by_default() -> None:
+    assert BrpConfig(mock_brp=True).cache_ttl == 0
+
+
+def test_it_rejects_http2_for_brp_without_h2_package(mocker: MockerFixture) -> None:
+    mocker.patch("app.config.schemas.find_spec", return_value=None)
+
+    with pytest.raises(ValidationError) as e:
+        BrpConfig(http2=True)
+
+    assert "http2 requires the 'h2' package" in str(e.value)
+
+
+def test_it_accepts_http2_for_brp_with_h2_package(mocker: MockerFixture) -> None:
+    mocker.patch("app.config.schemas.find_spec", return_value=mocker.Mock())
+
+    assert BrpConfig(http2=True).http2
+
+
+@pytest.mark.parametrize(
+    "filepath, snapshot_filepath, legacy_filepath",
+    [
+        ("cache/cbp-clients.snap", "cache/cbp-clients.snap", "cache/cbp-clients.json"),
+        ("cache/cbp-clients.json", "cache/cbp-clients.snap", "cache/cbp-clients.json"),
+    ],
+)
+def test_it_never_writes_cbp_snapshot_to_json_file(
+    filepath: str, snapshot_filepath: str, legacy_filepath: str
+) -> None:
+    config = CbpFileCacheConfig(filepath=filepath)
+
+    assert config.snapshot_filepath == snapshot_filepath
+    assert config.legacy_filepath == legacy_filepath
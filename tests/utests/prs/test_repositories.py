@@ -6,6 +6,7 @@ from httpx import Client, HTTPStatusError, RequestError
 from pytest_mock import MockerFixture
 
 from app.prs.repositories import ApiPrsRepository, MockPrsRepository
+from app.resilience import CircuitBreaker, ResilientCaller
 
 
 class TestMockPrsRepository:
@@ -67,6 +68,30 @@ class TestApiPrsRepository:
         with raises(RuntimeError, match=f"Request error occurred: {error_text}"):
             repository.get_vad_pdn_by_bsn(faker.numerify(text="#########"))
 
+    def test_get_vad_pdn_by_bsn_handles_open_circuit(
+        self, mocker: MockerFixture, faker: Faker
+    ) -> None:
+        mock_client = mocker.Mock(spec=Client)
+        repository: ApiPrsRepository = ApiPrsRepository(
+            mock_client,
+            faker.uri_path(),
+            faker.uuid4(),
+            ResilientCaller(
+                "PRS", circuit_breaker=CircuitBreaker(1, reset_timeout_seconds=30)
+            ),
+        )
+        mock_client.post.side_effect = RequestError(faker.sentence())
+
+        with raises(RuntimeError, match="Request error occurred"):
+            repository.get_vad_pdn_by_bsn(faker.numerify(text="#########"))
+        with raises(
+            RuntimeError,
+            match="Request error occurred: Circuit breaker for PRS is open",
+        ):
+            repository.get_vad_pdn_by_bsn(faker.numerify(text="#########"))
+
+        mock_client.post.assert_called_once()
+
     def test_get_vad_pdn_by_bsn_handles_generic_exception(
         self, mocker: MockerFixture, faker: Faker
     ) -> None:
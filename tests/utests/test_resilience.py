@@ -0,0 +1,218 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Optional
+
+import pytest
+from pytest_mock import MockerFixture
+
+from app.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+    RetryBudget,
+    RetryPolicy,
+    get_retry_after,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def clock(mocker: MockerFixture) -> Any:
+    return mocker.patch("app.resilience.monotonic", return_value=1000.0)
+
+
+@pytest.fixture
+def sleep(mocker: MockerFixture) -> Any:
+    return mocker.patch("app.resilience.sleep")
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self, clock: Any) -> None:
+        sut = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=30)
+
+        sut.record_failure()
+        sut.record_success()
+        sut.record_failure()
+        assert sut.allow_request()
+
+        sut.record_failure()
+        assert not sut.allow_request()
+
+        clock.return_value = 1029.0
+        assert not sut.allow_request()
+
+    def test_lets_single_trial_through_after_reset_timeout(self, clock: Any) -> None:
+        sut = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=30)
+        sut.record_failure()
+        clock.return_value = 1030.0
+
+        assert sut.allow_request()
+        assert not sut.allow_request()
+
+        sut.record_success()
+        assert sut.allow_request()
+        assert not sut.is_open
+
+    def test_reopens_if_trial_fails(self, clock: Any) -> None:
+        sut = CircuitBreaker(failure_threshold=3, reset_timeout_seconds=30)
+        for _ in range(3):
+            sut.record_failure()
+        clock.return_value = 1030.0
+        assert sut.allow_request()
+
+        sut.record_failure()
+
+        assert not sut.allow_request()
+
+
+@pytest.mark.usefixtures("clock")
+class TestRetryBudget:
+    def test_allows_min_retries_plus_ratio_of_requests(self) -> None:
+        sut = RetryBudget(ratio=0.5, min_retries_per_second=0.1, window_seconds=10)
+        for _ in range(4):
+            sut.record_request()
+
+        assert [sut.try_spend() for _ in range(4)] == [True, True, True, False]
+
+    def test_forgets_retries_outside_window(self, clock: Any) -> None:
+        sut = RetryBudget(ratio=0, min_retries_per_second=0.1, window_seconds=10)
+        assert sut.try_spend()
+        assert not sut.try_spend()
+
+        clock.return_value = 1010.0
+
+        assert sut.try_spend()
+
+
+class TestRetryPolicy:
+    def test_get_delay_is_jittered_and_capped(self) -> None:
+        sut = RetryPolicy(attempts=5, delay_seconds=1, max_delay_seconds=3)
+
+        assert 0 <= sut.get_delay(1, None) <= 1
+        assert all(0 <= sut.get_delay(5, None) <= 3 for _ in range(20))
+        assert sut.get_delay(6, None) is None
+
+    def test_get_delay_respects_retry_after_within_max_delay(self) -> None:
+        sut = RetryPolicy(attempts=2, delay_seconds=1, max_delay_seconds=3)
+
+        assert sut.get_delay(1, 2.5) == 2.5
+        assert sut.get_delay(1, 10) is None
+
+
+def test_get_retry_after_parses_seconds_and_http_date() -> None:
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    assert get_retry_after({"Retry-After": "5"}) == 5
+    assert 25 < get_retry_after({"Retry-After": format_datetime(retry_at)}) <= 30
+    assert get_retry_after({"Retry-After": "soon"}) is None
+    assert get_retry_after({}) is None
+
+
+@pytest.mark.usefixtures("clock")
+class TestResilientCaller:
+    def test_call_retries_transient_errors(self, sleep: Any) -> None:
+        responses = iter([ConnectionResetError(), FakeResponse(200)])
+
+        def send() -> FakeResponse:
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        sut = ResilientCaller("dependency", RetryPolicy(1, 0.1, 1))
+
+        assert sut.call(send, (ConnectionResetError,)).status_code == 200
+        sleep.assert_called_once()
+
+    def test_call_raises_transient_error_once_retries_are_exhausted(
+        self, sleep: Any, mocker: MockerFixture
+    ) -> None:
+        send = mocker.Mock(side_effect=ConnectionResetError())
+        sut = ResilientCaller("dependency", RetryPolicy(2, 0.1, 1))
+
+        with pytest.raises(ConnectionResetError):
+            sut.call(send, (ConnectionResetError,))
+
+        assert send.call_count == 3
+        assert sleep.call_count == 2
+
+    def test_call_waits_retry_after_and_closes_retried_response(
+        self, sleep: Any, mocker: MockerFixture
+    ) -> None:
+        unavailable = FakeResponse(503, {"Retry-After": "1"})
+        send = mocker.Mock(side_effect=[unavailable, FakeResponse(200)])
+        sut = ResilientCaller("dependency", RetryPolicy(1, 0.1, 2))
+
+        assert sut.call(send, ()).status_code == 200
+        sleep.assert_called_once_with(1.0)
+        assert unavailable.closed
+
+    def test_call_returns_retryable_response_once_retries_are_exhausted(
+        self, sleep: Any, mocker: MockerFixture
+    ) -> None:
+        send = mocker.Mock(return_value=FakeResponse(502))
+        sut = ResilientCaller("dependency", RetryPolicy(1, 0.1, 1))
+
+        assert sut.call(send, ()).status_code == 502
+        assert send.call_count == 2
+        sleep.assert_called_once()
+
+    def test_call_does_not_retry_beyond_budget(
+        self, sleep: Any, mocker: MockerFixture
+    ) -> None:
+        send = mocker.Mock(return_value=FakeResponse(503))
+        sut = ResilientCaller(
+            "dependency",
+            RetryPolicy(3, 0.1, 1),
+            retry_budget=RetryBudget(ratio=0, min_retries_per_second=0.1),
+        )
+
+        sut.call(send, ())
+
+        assert send.call_count == 2
+        sleep.assert_called_once()
+
+    def test_call_fails_fast_while_circuit_is_open(self, mocker: MockerFixture) -> None:
+        send = mocker.Mock(return_value=FakeResponse(500))
+        sut = ResilientCaller(
+            "dependency", circuit_breaker=CircuitBreaker(1, reset_timeout_seconds=30)
+        )
+
+        assert sut.call(send, ()).status_code == 500
+        with pytest.raises(CircuitOpenError, match="dependency"):
+            sut.call(send, ())
+
+        send.assert_called_once()
+
+    def test_call_releases_trial_if_send_raises_non_transient_error(
+        self, clock: Any, mocker: MockerFixture
+    ) -> None:
+        circuit_breaker = CircuitBreaker(1, reset_timeout_seconds=30)
+        circuit_breaker.record_failure()
+        sut = ResilientCaller("dependency", circuit_breaker=circuit_breaker)
+        clock.return_value = 1030.0
+
+        with pytest.raises(ValueError):
+            sut.call(mocker.Mock(side_effect=ValueError()), ())
+
+        assert not circuit_breaker.allow_request()
+        clock.return_value = 1060.0
+        assert sut.call(lambda: FakeResponse(200), ()).status_code == 200
+        assert not circuit_breaker.is_open
+
+    def test_call_passes_through_without_retries_and_breaker(
+        self, mocker: MockerFixture
+    ) -> None:
+        response = mocker.Mock()
+        sut = ResilientCaller("dependency")
+
+        assert sut.call(lambda: response, ()) is response